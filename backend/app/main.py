@@ -4,11 +4,21 @@ Snake Arena Masters API - Main Application
 FastAPI application for the Snake Arena Masters multiplayer game backend.
 """
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
 from app.routers import auth, leaderboard, spectate
+from app.services import active_players, leaderboard_service, user_service
+from app.services.db_session import AsyncSessionLocal
+from app.services.leaderboard_store import leaderboard_store
+from app.services.rank_index import rank_index
+from app.services.score_ingestion import score_ingestor
+from app.services.spectate_hub import spectate_hub
+from app.services.token_denylist import token_denylist
+from app.utils.security import password_hasher, token_cache
 
 # Create FastAPI application
 app = FastAPI(
@@ -28,6 +38,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Background tasks started with the app and cancelled on shutdown
+_background_tasks: list[asyncio.Task] = []
+
 # Include routers
 app.include_router(auth.router, prefix=settings.api_v1_prefix)
 app.include_router(leaderboard.router, prefix=settings.api_v1_prefix)
@@ -36,16 +49,78 @@ app.include_router(spectate.router, prefix=settings.api_v1_prefix)
 
 @app.on_event("startup")
 async def startup_event():
-    """Log startup information."""
+    """Log startup information, warm in-memory indexes and start background tasks."""
     import os
+
     print("=" * 50)
     print("🚀 Snake Arena Masters API Starting...")
     print(f"📊 Database URL: {settings.database_url[:50]}...")
     print(f"🌐 CORS Origins: {settings.cors_origins}")
     print(f"🔧 Port: {os.getenv('PORT', '8000')}")
+
+    # Warm the in-memory rank index; ranks fall back to SQL until it is loaded
+    try:
+        async with AsyncSessionLocal() as session:
+            await rank_index.load(session)
+        print("🏆 Rank index loaded")
+    except Exception as e:
+        print(f"⚠️  Rank index not loaded, using database ranks: {e}")
+
+    try:
+        async with AsyncSessionLocal() as session:
+            await leaderboard_store.load(session)
+        print(f"🗄️  Leaderboard store: {settings.leaderboard_store}")
+    except Exception as e:
+        print(f"⚠️  Leaderboard store not loaded, reading from the database: {e}")
+
+    # Restore revoked tokens, so logged-out tokens stay rejected after a restart
+    try:
+        async with AsyncSessionLocal() as session:
+            await token_denylist.load(session)
+            await session.commit()
+        print(f"🚫 Token denylist loaded ({len(token_denylist)} revoked)")
+    except Exception as e:
+        print(f"⚠️  Token denylist not loaded: {e}")
+
+    _background_tasks.append(
+        asyncio.create_task(
+            leaderboard_service.roll_over_windows(
+                AsyncSessionLocal, settings.leaderboard_window_prune_interval_seconds
+            )
+        )
+    )
+
+    _background_tasks.append(
+        asyncio.create_task(
+            token_denylist.reload_periodically(
+                AsyncSessionLocal, settings.token_denylist_reload_interval_seconds
+            )
+        )
+    )
+
+    _background_tasks.append(
+        asyncio.create_task(
+            active_players.sweep_expired_players(settings.active_player_sweep_interval_seconds)
+        )
+    )
+
+    if settings.score_ingestion_enabled:
+        score_ingestor.start()
+        print("📥 Score ingestion: micro-batched")
     print("=" * 50)
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued scores and stop background tasks."""
+    await score_ingestor.stop()
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    password_hasher.shutdown()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -56,3 +131,15 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """In-process pipeline and cache metrics."""
+    return {
+        "score_ingestion": score_ingestor.metrics(),
+        "password_hasher": password_hasher.metrics(),
+        "token_cache": token_cache.stats(),
+        "user_cache": user_service.get_cache_stats(),
+        "spectate": spectate_hub.metrics(),
+    }
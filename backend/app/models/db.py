@@ -6,7 +6,7 @@ This module contains SQLAlchemy ORM models for the database.
 
 from datetime import date, datetime
 
-from sqlalchemy import Date, Integer, String
+from sqlalchemy import Date, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -25,23 +25,133 @@ class UserDB(Base):
     username: Mapped[str] = mapped_column(String(20), unique=True, nullable=False, index=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Version of the claims embedded in access tokens (username). Nothing changes those
+    # claims yet; code that does must bump it so older tokens fall back to the database
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
     def __repr__(self) -> str:
         return f"<User(id={self.id}, username={self.username}, email={self.email})>"
 
 
+class RefreshTokenDB(Base):
+    """
+    Refresh token database model.
+
+    Only a keyed hash of each token is stored. Tokens issued by rotating
+    another token share its ``family_id``, so presenting a rotated token again
+    revokes the whole chain.
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    token_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    family_id: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False)
+    revoked_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<RefreshToken(user_id={self.user_id}, family_id={self.family_id})>"
+
+
+class RevokedTokenDB(Base):
+    """Access token revoked before its expiry, kept until it expires."""
+
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<RevokedToken(jti={self.jti}, expires_at={self.expires_at})>"
+
+
 class LeaderboardEntryDB(Base):
     """Leaderboard entry database model."""
 
     __tablename__ = "leaderboard"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    username: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
-    score: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
-    mode: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
+    username: Mapped[str] = mapped_column(String(20), nullable=False)
+    score: Mapped[int] = mapped_column(Integer, nullable=False)
+    mode: Mapped[str] = mapped_column(String(20), nullable=False)
     date: Mapped[date] = mapped_column(Date, nullable=False, default=date.today)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
     def __repr__(self) -> str:
         return f"<LeaderboardEntry(id={self.id}, username={self.username}, score={self.score}, mode={self.mode})>"
+
+
+# Composite indexes matching the leaderboard's (score DESC, id) ordering
+Index(
+    "ix_leaderboard_mode_score_id",
+    LeaderboardEntryDB.mode,
+    LeaderboardEntryDB.score.desc(),
+    LeaderboardEntryDB.id,
+)
+Index("ix_leaderboard_score_id", LeaderboardEntryDB.score.desc(), LeaderboardEntryDB.id)
+Index(
+    "ix_leaderboard_username_mode_score",
+    LeaderboardEntryDB.username,
+    LeaderboardEntryDB.mode,
+    LeaderboardEntryDB.score.desc(),
+)
+
+
+class UserBestScoreDB(Base):
+    """Best score per user and mode, maintained alongside the leaderboard history."""
+
+    __tablename__ = "user_best_scores"
+
+    username: Mapped[str] = mapped_column(String(20), primary_key=True)
+    mode: Mapped[str] = mapped_column(String(20), primary_key=True)
+    score: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"<UserBestScore(username={self.username}, mode={self.mode}, score={self.score})>"
+
+
+class WindowBestScoreDB(Base):
+    """Best score per user and mode within a daily or weekly leaderboard period."""
+
+    __tablename__ = "window_best_scores"
+    __table_args__ = (
+        UniqueConstraint(
+            "period", "period_start", "mode", "username", name="uq_window_best_scores"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    period: Mapped[str] = mapped_column(String(10), nullable=False)
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    mode: Mapped[str] = mapped_column(String(20), nullable=False)
+    username: Mapped[str] = mapped_column(String(20), nullable=False)
+    score: Mapped[int] = mapped_column(Integer, nullable=False)
+    date: Mapped[date] = mapped_column(Date, nullable=False, default=date.today)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return (
+            f"<WindowBestScore(period={self.period}, period_start={self.period_start}, "
+            f"username={self.username}, score={self.score}, mode={self.mode})>"
+        )
+
+
+Index(
+    "ix_window_best_scores_mode_score_id",
+    WindowBestScoreDB.period,
+    WindowBestScoreDB.period_start,
+    WindowBestScoreDB.mode,
+    WindowBestScoreDB.score.desc(),
+    WindowBestScoreDB.id,
+)
+Index(
+    "ix_window_best_scores_score_id",
+    WindowBestScoreDB.period,
+    WindowBestScoreDB.period_start,
+    WindowBestScoreDB.score.desc(),
+    WindowBestScoreDB.id,
+)
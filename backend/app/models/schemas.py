@@ -19,6 +19,21 @@ class GameMode(str, Enum):
     WALLS = "walls"
 
 
+class LeaderboardWindow(str, Enum):
+    """Leaderboard time window enumeration."""
+
+    DAY = "day"
+    WEEK = "week"
+    ALL = "all"
+
+
+class ExportFormat(str, Enum):
+    """Leaderboard export format enumeration."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class Direction(str, Enum):
     """Snake direction enumeration."""
 
@@ -97,6 +112,12 @@ class SignupRequest(BaseModel):
     password: str = Field(..., min_length=6)
 
 
+class RefreshRequest(BaseModel):
+    """Refresh token payload for token refresh and logout."""
+
+    refresh_token: str
+
+
 class SubmitScoreRequest(BaseModel):
     """Submit score request payload."""
 
@@ -104,6 +125,12 @@ class SubmitScoreRequest(BaseModel):
     mode: GameMode
 
 
+class SubmitScoresBatchRequest(BaseModel):
+    """Batch score submission payload."""
+
+    scores: list[SubmitScoreRequest] = Field(..., min_length=1)
+
+
 # Response Models
 class AuthResponse(BaseModel):
     """Authentication response."""
@@ -121,6 +148,34 @@ class SubmitScoreResponse(BaseModel):
     error: str | None = None
 
 
+class SubmitScoresBatchResponse(BaseModel):
+    """Batch score submission response, with one result per submitted score."""
+
+    results: list[SubmitScoreResponse]
+
+
+class LeaderboardPage(BaseModel):
+    """Page of leaderboard entries."""
+
+    entries: list[LeaderboardEntry]
+    next_cursor: str | None = Field(
+        default=None, description="Cursor for the next page, or null on the last page"
+    )
+
+
+class RankedLeaderboardEntry(LeaderboardEntry):
+    """Leaderboard entry with its absolute rank."""
+
+    rank: int = Field(..., ge=1)
+
+
+class LeaderboardNeighbourhood(BaseModel):
+    """Entries ranked just above and below a user's best score."""
+
+    rank: int | None = Field(default=None, description="The user's rank, or null without a score")
+    entries: list[RankedLeaderboardEntry]
+
+
 class ErrorResponse(BaseModel):
     """Generic error response."""
 
@@ -133,9 +188,24 @@ class Token(BaseModel):
 
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
 
 
 class TokenData(BaseModel):
     """Token payload data."""
 
     user_id: str | None = None
+    username: str | None = None
+    version: int | None = None
+    jti: str | None = None
+    expires_at: float | None = None
+
+
+class Principal(BaseModel):
+    """Authenticated user identity, as carried in access tokens."""
+
+    model_config = ConfigDict(frozen=True)
+
+    user_id: str
+    username: str
+    version: int
@@ -6,14 +6,36 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.schemas import AuthResponse, SignupRequest, Token, User
+from app.models.schemas import (
+    AuthResponse,
+    RefreshRequest,
+    SignupRequest,
+    Token,
+    TokenData,
+    User,
+)
 from app.services import auth_service
 from app.services.db_session import get_db
-from app.utils.security import create_access_token, get_current_user_id
+from app.services.token_denylist import token_denylist
+from app.utils.security import (
+    PasswordHasherBusyError,
+    create_user_token,
+    get_current_token,
+    get_current_user_id,
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def _busy_exception() -> HTTPException:
+    """Build the 503 returned while the password hashing pool is saturated."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent authentication requests, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)
@@ -21,9 +43,14 @@ async def login(
     """
     User login endpoint.
 
-    Authenticate with email and password to receive a JWT token.
+    Authenticate with email and password to receive a JWT token and a
+    refresh token. Returns 503 with a Retry-After header while the server is
+    saturated with logins.
     """
-    user = await auth_service.authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await auth_service.authenticate_user(db, form_data.username, form_data.password)
+    except PasswordHasherBusyError:
+        raise _busy_exception()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -31,8 +58,30 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(data={"sub": user.id})
-    return Token(access_token=access_token)
+    access_token = create_user_token(user)
+    refresh_token = await auth_service.issue_refresh_token(db, user.user_id)
+    return Token(access_token=access_token, refresh_token=refresh_token)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Token refresh endpoint.
+
+    Exchange a refresh token for a new access token without re-sending the
+    password. The refresh token is rotated: the response carries its
+    replacement and the presented token stops working.
+    """
+    session = await auth_service.refresh_session(db, request.refresh_token)
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    principal, refresh_token = session
+    return Token(access_token=create_user_token(principal), refresh_token=refresh_token)
 
 
 @router.post("/signup", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
@@ -49,17 +98,29 @@ async def signup(request: SignupRequest, db: AsyncSession = Depends(get_db)):
         return AuthResponse(success=True, user=user)
     except ValueError as e:
         return AuthResponse(success=False, error=str(e))
+    except PasswordHasherBusyError:
+        raise _busy_exception()
 
 
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
-async def logout(current_user_id: str = Depends(get_current_user_id)):
+async def logout(
+    request: RefreshRequest | None = None,
+    token_data: TokenData = Depends(get_current_token),
+    current_user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
     """
     User logout endpoint.
 
-    End the current user session (client should discard the token).
+    Revoke the current access token until it expires. If a refresh token is
+    sent, it and every token rotated from the same login are revoked too.
     """
-    # In a stateless JWT system, logout is handled client-side
-    # This endpoint exists for API completeness
+    if token_data.jti is not None and token_data.expires_at is not None:
+        await token_denylist.revoke(db, token_data.jti, token_data.expires_at)
+    if request is not None:
+        await auth_service.revoke_refresh_token(db, request.refresh_token, current_user_id)
+    # Commit now, so the tokens are rejected as soon as the client sees the 204
+    await db.commit()
     return None
 
 
@@ -2,35 +2,152 @@
 Leaderboard router for score management and leaderboard retrieval.
 """
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.schemas import GameMode, LeaderboardEntry, SubmitScoreRequest, SubmitScoreResponse
-from app.services import auth_service, leaderboard_service
+from app.config import settings
+from app.models.schemas import (
+    ExportFormat,
+    GameMode,
+    LeaderboardNeighbourhood,
+    LeaderboardPage,
+    LeaderboardWindow,
+    Principal,
+    SubmitScoreRequest,
+    SubmitScoreResponse,
+    SubmitScoresBatchRequest,
+    SubmitScoresBatchResponse,
+)
+from app.services.auth_service import get_current_principal
 from app.services.db_session import get_db
-from app.utils.security import get_current_user_id
+from app.services.leaderboard_store import LeaderboardStore, get_leaderboard_store
+from app.services.score_ingestion import IngestorStoppedError, score_ingestor
+from app.utils.export import csv_chunks, gzip_chunks, ndjson_chunks
+from app.utils.http_cache import etag_matches, json_response, not_modified
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
 
+# Columns of exported leaderboard rows, in order
+EXPORT_COLUMNS = ("id", "username", "score", "mode", "date")
 
-@router.get("", response_model=list[LeaderboardEntry])
+
+@router.get("", response_model=LeaderboardPage)
 async def get_leaderboard(
     mode: GameMode | None = Query(None, description="Filter by game mode"),
+    limit: int = Query(
+        settings.leaderboard_default_limit,
+        ge=1,
+        description=f"Maximum entries to return (capped at {settings.leaderboard_max_limit})",
+    ),
+    cursor: str | None = Query(None, description="Cursor from the previous page"),
+    window: LeaderboardWindow = Query(
+        LeaderboardWindow.ALL, description="Time window: current day, current week or all time"
+    ),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_db),
+    store: LeaderboardStore = Depends(get_leaderboard_store),
+):
+    """
+    Get a page of leaderboard entries.
+
+    Optionally filter by game mode (pass-through or walls) and time window
+    (day, week or all). Daily and weekly windows list each player's best score
+    in the current period. Pass the returned `next_cursor` back as `cursor` to
+    fetch the following page.
+
+    Responses carry an ETag; send it back in `If-None-Match` to get a
+    304 Not Modified while the page is unchanged. The ETag is a hash of the
+    page, so the 304 saves bandwidth and, while the page is cached, the
+    query and serialization too; after a cache miss or expiry the page is
+    read again before it can be compared.
+    """
+    try:
+        etag, body = await store.get_leaderboard_json(
+            db,
+            mode,
+            limit=min(limit, settings.leaderboard_max_limit),
+            cursor=cursor,
+            window=window,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(body, etag)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_leaderboard(
+    export_format: ExportFormat = Query(
+        ExportFormat.NDJSON, alias="format", description="ndjson or csv"
+    ),
+    mode: GameMode | None = Query(None, description="Filter by game mode"),
+    window: LeaderboardWindow = Query(
+        LeaderboardWindow.ALL, description="Time window: current day, current week or all time"
+    ),
+    gzip: bool = Query(False, description="Compress the export as a .gz file"),
+    db: AsyncSession = Depends(get_db),
+    store: LeaderboardStore = Depends(get_leaderboard_store),
+):
+    """
+    Export the full leaderboard as a stream of NDJSON or CSV rows.
+
+    Rows are sent in leaderboard order as they are read from the database,
+    so large exports start immediately and use constant memory on the server.
+    """
+    # The body reads from the request's session: since FastAPI 0.118, get_db is
+    # only torn down after the response has been sent
+    chunks = store.stream_leaderboard(
+        db, mode, window, chunk_size=settings.leaderboard_export_chunk_size
+    )
+    if export_format == ExportFormat.CSV:
+        body = csv_chunks(EXPORT_COLUMNS, chunks)
+        media_type, filename = "text/csv", "leaderboard.csv"
+    else:
+        body = ndjson_chunks(EXPORT_COLUMNS, chunks)
+        media_type, filename = "application/x-ndjson", "leaderboard.ndjson"
+
+    if gzip:
+        body = gzip_chunks(body)
+        media_type, filename = "application/gzip", f"{filename}.gz"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/around-me", response_model=LeaderboardNeighbourhood)
+async def get_leaderboard_around_me(
+    mode: GameMode = Query(..., description="Game mode"),
+    radius: int = Query(
+        5,
+        ge=1,
+        le=settings.leaderboard_around_me_max_radius,
+        description="Entries to return above and below the user's best",
+    ),
+    principal: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
+    store: LeaderboardStore = Depends(get_leaderboard_store),
 ):
     """
-    Get leaderboard entries.
+    Get the leaderboard entries around the authenticated user's best score.
 
-    Optionally filter by game mode (pass-through or walls).
+    Returns the user's rank and up to `radius` entries on either side, each
+    with its absolute rank. Requires authentication.
     """
-    return await leaderboard_service.get_leaderboard(db, mode)
+    return await store.get_around_user(db, principal.username, mode, radius)
 
 
 @router.post("/scores", response_model=SubmitScoreResponse, status_code=status.HTTP_201_CREATED)
 async def submit_score(
     request: SubmitScoreRequest,
-    current_user_id: str = Depends(get_current_user_id),
+    principal: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
+    store: LeaderboardStore = Depends(get_leaderboard_store),
 ):
     """
     Submit a game score to the leaderboard.
@@ -38,14 +155,51 @@ async def submit_score(
     Only saves the score if it's better than the user's previous best for this mode.
     Requires authentication.
     """
-    user = await auth_service.get_user_by_id(db, current_user_id)
-    if not user:
-        return SubmitScoreResponse(success=False, error="User not found")
+    if score_ingestor.is_running:
+        try:
+            # Written with other concurrent submissions in one micro-batch
+            result = await score_ingestor.submit(principal.username, request.score, request.mode)
+            return _submit_score_response(result)
+        except IngestorStoppedError:
+            pass  # Shutting down; write it directly
+
+    result = await store.add_leaderboard_entry(
+        db, username=principal.username, score=request.score, mode=request.mode
+    )
+    return _submit_score_response(result)
+
 
-    result = await leaderboard_service.add_leaderboard_entry(
-        db, username=user.username, score=request.score, mode=request.mode
+@router.post(
+    "/scores:batch",
+    response_model=SubmitScoresBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def submit_scores_batch(
+    request: SubmitScoresBatchRequest,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+    store: LeaderboardStore = Depends(get_leaderboard_store),
+):
+    """
+    Submit several game scores at once, e.g. games queued while offline.
+
+    Scores may span modes. Only the highest score per mode can become the new
+    best; results are returned in submission order. Requires authentication.
+    """
+    if len(request.scores) > settings.leaderboard_batch_max_scores:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.leaderboard_batch_max_scores} scores per batch",
+        )
+
+    results = await store.add_leaderboard_entries(
+        db, principal.username, [(item.score, item.mode) for item in request.scores]
     )
+    return SubmitScoresBatchResponse(results=[_submit_score_response(r) for r in results])
+
 
+def _submit_score_response(result: dict) -> SubmitScoreResponse:
+    """Build the API response for a leaderboard service submission result."""
     if not result["is_new_best"]:
         return SubmitScoreResponse(
             success=False,
@@ -59,17 +213,14 @@ async def submit_score(
 @router.get("/best-score/{mode}", response_model=int | None)
 async def get_user_best_score(
     mode: GameMode,
-    current_user_id: str = Depends(get_current_user_id),
+    principal: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
+    store: LeaderboardStore = Depends(get_leaderboard_store),
 ):
     """
     Get the authenticated user's best score for a specific mode.
 
     Returns the best score or None if no scores exist.
     """
-    user = await auth_service.get_user_by_id(db, current_user_id)
-    if not user:
-        return None
-
-    best_score = await leaderboard_service.get_user_best_score(db, user.username, mode)
+    best_score = await store.get_user_best_score(db, principal.username, mode)
     return best_score
@@ -2,38 +2,262 @@
 Spectate router for viewing active players and their game states.
 """
 
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+import json
 
-from app.models.schemas import ActivePlayer
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.models.schemas import ActivePlayer, GameState, Principal
 from app.services import active_players
+from app.services.auth_service import get_current_principal
+from app.services.db_session import get_session_factory
+from app.services.spectate_hub import Subscription, spectate_hub
+from app.utils.game_codec import (
+    BINARY_MEDIA_TYPE,
+    BINARY_SUBPROTOCOL,
+    accepts_binary,
+    encode_player,
+)
+from app.utils.http_cache import encoded_response, etag_matches, json_response, not_modified
+from app.utils.security import get_current_token
 
 router = APIRouter(prefix="/spectate", tags=["Spectate"])
 
 
 @router.get("/players", response_model=list[ActivePlayer])
-async def get_active_players():
+async def get_active_players(
+    if_none_match: str | None = Header(None), accept: str | None = Header(None)
+):
     """
     Get all currently active players.
 
-    Returns a list of players currently in a game session.
+    Returns a list of players currently in a game session. Responses carry an
+    ETag; send it back in `If-None-Match` to get a 304 while nothing changed.
+    Send `Accept: application/vnd.snake-arena.state` for the compact binary
+    encoding instead of JSON.
     """
-    return active_players.get_active_players()
+    # Both encodings are cached until the store changes, so picking the
+    # representation before comparing ETags costs no serialization
+    if accepts_binary(accept):
+        try:
+            etag, body = active_players.get_active_players_binary()
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, vary="Accept")
+            return encoded_response(body, etag, BINARY_MEDIA_TYPE, vary="Accept")
+        except ValueError:
+            pass  # A state that does not fit the binary encoding is served as JSON
+    etag, body = active_players.get_active_players_json()
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, vary="Accept")
+    return json_response(body, etag, vary="Accept")
 
 
 @router.get("/players/{player_id}", response_model=ActivePlayer)
-async def get_player_game_state(player_id: str):
+async def get_player_game_state(
+    player_id: str,
+    if_none_match: str | None = Header(None),
+    accept: str | None = Header(None),
+):
     """
     Get the current game state for a specific player.
 
     Args:
         player_id: The unique identifier of the player
+        if_none_match: ETag from a previous response
+        accept: `application/vnd.snake-arena.state` for the binary encoding
 
     Returns:
-        The player's current game state
+        The player's current game state, or 304 if it has not changed
     """
+    binary = accepts_binary(accept)
+    etag = active_players.get_player_etag(player_id, binary)
     player = active_players.get_active_player(player_id)
     if not player:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Player not found or not currently playing"
         )
+
+    body = None
+    if binary:
+        try:
+            body = encode_player(player)
+        except ValueError:
+            # Served as JSON, so it is compared and tagged as the JSON representation
+            etag = active_players.get_player_etag(player_id)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, vary="Accept")
+    if body is not None:
+        return encoded_response(body, etag, BINARY_MEDIA_TYPE, vary="Accept")
+    return json_response(player.model_dump_json(by_alias=True).encode(), etag, vary="Accept")
+
+
+async def _send_updates(websocket: WebSocket, subscription: Subscription) -> None:
+    """Forward a subscription's frames until the player leaves or the spectator is dropped."""
+    while True:
+        frame = await subscription.get()
+        if frame is None:
+            break
+        if isinstance(frame, memoryview):
+            # ASGI takes bytes: send the buffer shared by all subscribers, not a copy
+            await websocket.send_bytes(frame.obj)
+        else:
+            await websocket.send_text(frame)
+
+    if subscription.dropped:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Spectator too slow")
+    else:
+        await websocket.close(code=status.WS_1000_NORMAL_CLOSURE, reason="Player left")
+
+
+async def _receive_requests(websocket: WebSocket, subscription: Subscription) -> None:
+    """Answer resync requests until the spectator disconnects."""
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                request = json.loads(message)
+            except ValueError:
+                continue
+            if isinstance(request, dict) and request.get("type") == "resync":
+                spectate_hub.resync(subscription)
+    except WebSocketDisconnect:
+        pass
+
+
+@router.websocket("/ws/{player_id}")
+async def spectate_player_ws(websocket: WebSocket, player_id: str):
+    """
+    Stream a player's game state.
+
+    Sends a keyframe with the player's full state (as returned by
+    `GET /spectate/players/{player_id}`) on connect, then a delta for every
+    change: new head segments, the number of tail segments dropped, and any
+    changed food, score, direction, pause, game-over or speed fields. Changes
+    are sent once per `SPECTATE_TICK_SECONDS`, so several changes within a
+    tick arrive as one delta. Messages carry consecutive `seq` numbers; a
+    spectator that sees a gap sends `{"type": "resync"}` and continues from
+    the keyframe it gets back. Full keyframes are also sent periodically and
+    whenever a change is not a move.
+
+    Offer the `snake-arena.binary.v1` subprotocol to receive the same messages
+    as binary frames in the encoding of `app.utils.game_codec`; a state that
+    does not fit that encoding is still sent as a JSON text frame.
+
+    The connection is closed with code 1000 when the player leaves, and with
+    1013 if the spectator reads too slowly to keep up with updates.
+    """
+    binary = BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    with spectate_hub.subscribe(
+        player_id, active_players.get_active_player, binary=binary
+    ) as subscription:
+        if subscription is None:
+            await websocket.close(
+                code=status.WS_1008_POLICY_VIOLATION,
+                reason="Player not found or not currently playing",
+            )
+            return
+
+        await websocket.accept(subprotocol=BINARY_SUBPROTOCOL if binary else None)
+        sender = asyncio.create_task(_send_updates(websocket, subscription))
+        receiver = asyncio.create_task(_receive_requests(websocket, subscription))
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        # Let the cancelled task finish before the subscription is removed
+        await asyncio.wait(pending)
+        for task in done:
+            # A send to a spectator that already went away is not an error
+            if isinstance(task.exception(), WebSocketDisconnect | RuntimeError):
+                continue
+            task.result()
+
+
+def _publish_game_state(principal: Principal, game_state: GameState) -> ActivePlayer:
+    """Store a player's own game state and restart its TTL."""
+    player = ActivePlayer(
+        id=principal.user_id,
+        username=principal.username,
+        score=game_state.score,
+        mode=game_state.mode,
+        gameState=game_state,
+    )
+    active_players.update_active_player(player, ttl=settings.active_player_ttl_seconds)
     return player
+
+
+@router.put("/session", response_model=ActivePlayer)
+async def update_game_session(
+    game_state: GameState, principal: Principal = Depends(get_current_principal)
+):
+    """
+    Publish the authenticated player's current game state.
+
+    Each call doubles as a heartbeat: a player that sends no update for
+    `ACTIVE_PLAYER_TTL_SECONDS` is removed from the active players.
+    """
+    return _publish_game_state(principal, game_state)
+
+
+@router.delete("/session", status_code=status.HTTP_204_NO_CONTENT)
+async def end_game_session(principal: Principal = Depends(get_current_principal)):
+    """
+    End the authenticated player's game session and stop spectators.
+    """
+    active_players.remove_active_player(principal.user_id)
+    return None
+
+
+@router.websocket("/session/ws")
+async def game_session_ws(
+    websocket: WebSocket,
+    token: str = Query(...),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+):
+    """
+    Publish the authenticated player's game state over a WebSocket.
+
+    Browsers cannot set headers on WebSockets, so the access token is passed
+    as the `token` query parameter. Every message is a game state in the same
+    shape as the body of `PUT /spectate/session` and counts as a heartbeat.
+    The session ends when the connection closes.
+    """
+    # Authenticate with a short-lived session rather than holding a database
+    # connection for as long as the game runs
+    try:
+        async with session_factory() as db:
+            principal = await get_current_principal(await get_current_token(token), db)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+
+    await websocket.accept()
+    published = None  # Last state this connection published
+    try:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                game_state = GameState.model_validate_json(message)
+            except ValidationError:
+                await websocket.close(
+                    code=status.WS_1007_INVALID_FRAME_PAYLOAD_DATA, reason="Invalid game state"
+                )
+                return
+            published = _publish_game_state(principal, game_state)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Leave the player alone if another session has published since
+        if published is not None:
+            active_players.remove_active_player(principal.user_id, state=published)
@@ -3,16 +3,45 @@ In-memory storage for active players.
 
 Active players and their game states are kept in memory for performance.
 This data is transient and does not need to be persisted to the database.
+
+Players publishing their own game state expire unless they send a heartbeat
+within a TTL. Expiry deadlines are kept in a min-heap, so each sweep only
+touches the players that are due.
 """
 
+import asyncio
+import heapq
+import time
+import uuid
 from threading import Lock
 
+from pydantic import TypeAdapter
+
 from app.models.schemas import ActivePlayer, Direction, GameMode, GameState, Position
+from app.services.spectate_hub import spectate_hub
+from app.utils.game_codec import encode_players
+from app.utils.http_cache import make_etag
 
 # Demo active players (in-memory)
 _active_players: dict[str, ActivePlayer] = {}
 _lock = Lock()
 
+# Store version, bumped on every change. Each process has its own store, so
+# ETags also carry a per-process id to keep versions from different workers apart.
+_version = 0
+_instance_id = uuid.uuid4().hex
+_players_adapter = TypeAdapter(list[ActivePlayer])
+_players_json: tuple[int, str, bytes] | None = None  # (version, etag, body)
+_players_binary: tuple[int, str, bytes] | None = None  # (version, etag, body)
+# Store version of each player's last change, so a player's ETag only changes with its own state
+_player_versions: dict[str, int] = {}
+
+# Expiry deadline (time.monotonic()) per player with a TTL, plus a heap of
+# (deadline, player_id). A heartbeat pushes a new heap entry; entries whose
+# deadline no longer matches ``_deadlines`` are stale and skipped when popped.
+_deadlines: dict[str, float] = {}
+_expiry_heap: list[tuple[float, str]] = []
+
 
 def _initialize_demo_players():
     """Initialize demo active players."""
@@ -85,9 +114,12 @@ def _initialize_demo_players():
         ),
     ]
 
+    global _version
     with _lock:
+        _version += 1
         for player in demo_players:
             _active_players[player.id] = player
+            _player_versions[player.id] = _version
 
 
 # Initialize on module load
@@ -104,3 +136,157 @@ def get_active_player(player_id: str) -> ActivePlayer | None:
     """Get an active player by ID."""
     with _lock:
         return _active_players.get(player_id)
+
+
+def update_active_player(player: ActivePlayer, ttl: float | None = None) -> None:
+    """
+    Add a player or replace its state, and notify its spectators.
+
+    Args:
+        player: Player and game state
+        ttl: Seconds until the player expires unless updated again, or None
+            to keep it until it is removed
+    """
+    global _version
+    with _lock:
+        _active_players[player.id] = player
+        _version += 1
+        _player_versions[player.id] = _version
+        if ttl is None:
+            _deadlines.pop(player.id, None)
+        else:
+            deadline = time.monotonic() + ttl
+            _deadlines[player.id] = deadline
+            heapq.heappush(_expiry_heap, (deadline, player.id))
+            if len(_expiry_heap) > 4 * len(_deadlines) + 64:
+                _compact_expiry_heap()
+    spectate_hub.publish(player.id, player)
+
+
+def _compact_expiry_heap() -> None:
+    """Rebuild the expiry heap without stale entries; the caller holds the lock."""
+    global _expiry_heap
+    _expiry_heap = [(deadline, player_id) for player_id, deadline in _deadlines.items()]
+    heapq.heapify(_expiry_heap)
+
+
+def evict_expired_players(now: float | None = None) -> list[str]:
+    """
+    Remove players whose TTL has passed, and notify their spectators.
+
+    Args:
+        now: Current ``time.monotonic()`` value (defaults to the clock)
+
+    Returns:
+        IDs of the evicted players
+    """
+    global _version
+    now = time.monotonic() if now is None else now
+    evicted = []
+    with _lock:
+        while _expiry_heap and _expiry_heap[0][0] <= now:
+            deadline, player_id = heapq.heappop(_expiry_heap)
+            if _deadlines.get(player_id) != deadline:
+                continue  # Superseded by a later heartbeat
+            del _deadlines[player_id]
+            del _active_players[player_id]
+            del _player_versions[player_id]
+            evicted.append(player_id)
+        if evicted:
+            _version += 1
+
+    for player_id in evicted:
+        spectate_hub.publish(player_id, None)
+    return evicted
+
+
+async def sweep_expired_players(interval: float) -> None:
+    """
+    Periodically evict players that stopped sending heartbeats. Runs until cancelled.
+
+    Args:
+        interval: Seconds between sweeps
+    """
+    while True:
+        await asyncio.sleep(interval)
+        evicted = evict_expired_players()
+        if evicted:
+            print(f"🧹 Evicted {len(evicted)} inactive players")
+
+
+def remove_active_player(player_id: str, state: ActivePlayer | None = None) -> bool:
+    """
+    Remove a player whose game session ended, and notify its spectators.
+
+    Args:
+        player_id: ID of the player
+        state: Only remove the player if this is still its stored state, so a
+            session that ends does not remove a newer session's state
+
+    Returns:
+        True if the player was removed
+    """
+    global _version
+    with _lock:
+        current = _active_players.get(player_id)
+        removed = current is not None and (state is None or current is state)
+        if removed:
+            del _active_players[player_id]
+            _deadlines.pop(player_id, None)
+            del _player_versions[player_id]
+            _version += 1
+    if removed:
+        spectate_hub.publish(player_id, None)
+    return removed
+
+
+def get_players_etag(binary: bool = False) -> str:
+    """Get the ETag of the active players list (JSON or binary) for the current store version."""
+    if binary:
+        return make_etag(_instance_id, _version, "binary")
+    return make_etag(_instance_id, _version)
+
+
+def get_player_etag(player_id: str, binary: bool = False) -> str:
+    """Get the ETag of a single player's state (JSON or binary) as of its last change."""
+    version = _player_versions.get(player_id, 0)
+    if binary:
+        return make_etag(_instance_id, version, player_id, "binary")
+    return make_etag(_instance_id, version, player_id)
+
+
+def get_active_players_json() -> tuple[str, bytes]:
+    """
+    Get all active players serialized as JSON.
+
+    The serialized list is reused until the store changes.
+
+    Returns:
+        Tuple of (ETag, JSON body)
+    """
+    global _players_json
+    with _lock:
+        if _players_json is None or _players_json[0] != _version:
+            body = _players_adapter.dump_json(list(_active_players.values()), by_alias=True)
+            _players_json = (_version, make_etag(_instance_id, _version), body)
+        return _players_json[1], _players_json[2]
+
+
+def get_active_players_binary() -> tuple[str, bytes]:
+    """
+    Get all active players in the binary encoding of ``app.utils.game_codec``.
+
+    The encoded list is reused until the store changes.
+
+    Returns:
+        Tuple of (ETag, binary body)
+
+    Raises:
+        ValueError: If a player's state does not fit the binary encoding
+    """
+    global _players_binary
+    with _lock:
+        if _players_binary is None or _players_binary[0] != _version:
+            body = encode_players(list(_active_players.values()))
+            _players_binary = (_version, make_etag(_instance_id, _version, "binary"), body)
+        return _players_binary[1], _players_binary[2]
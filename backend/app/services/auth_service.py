@@ -2,34 +2,94 @@
 Authentication service for user management and authentication.
 """
 
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from app.models.schemas import User
-from app.services import user_service
-from app.utils.security import get_password_hash, verify_password
-
-
-async def authenticate_user(db: AsyncSession, email: str, password: str) -> User | None:
+import asyncio
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.schemas import Principal, TokenData, User
+from app.services import refresh_token_service, user_service
+from app.services.db_session import AsyncSessionLocal, get_db
+from app.utils.security import (
+    get_current_token,
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password_async,
+)
+
+# In-flight background rehashes, keyed by user ID
+_rehash_tasks: dict[str, asyncio.Task] = {}
+
+
+async def authenticate_user(
+    db: AsyncSession,
+    email: str,
+    password: str,
+    session_factory: async_sessionmaker = AsyncSessionLocal,
+) -> Principal | None:
     """
     Authenticate a user with email and password.
 
+    If the stored hash was made with a different argon2 cost profile than the
+    configured one, it is rehashed in the background after a successful login.
+
     Args:
         db: Database session
         email: User email
         password: Plain text password
+        session_factory: Factory for the session used by the background rehash
 
     Returns:
-        User if authenticated, None otherwise
+        The user's identity claims if authenticated, None otherwise
+
+    Raises:
+        PasswordHasherBusyError: If the password hashing pool is saturated
     """
-    result = await user_service.get_user_by_email(db, email)
+    result = await user_service.get_credentials_by_email(db, email)
     if not result:
         return None
 
-    user, password_hash = result
-    if not verify_password(password, password_hash):
+    principal, password_hash = result
+    if not await verify_password_async(password, password_hash):
         return None
 
-    return user
+    user_id = principal.user_id
+    if password_needs_rehash(password_hash) and user_id not in _rehash_tasks:
+        task = asyncio.create_task(
+            rehash_password(session_factory, user_id, password, password_hash)
+        )
+        _rehash_tasks[user_id] = task
+        task.add_done_callback(lambda _: _rehash_tasks.pop(user_id, None))
+
+    return principal
+
+
+async def rehash_password(
+    session_factory: async_sessionmaker, user_id: str, password: str, old_hash: str
+) -> bool:
+    """
+    Store a hash of the password made with the current argon2 cost profile.
+
+    Failures are logged and ignored; the next login tries again.
+
+    Args:
+        session_factory: Factory for database sessions
+        user_id: User ID
+        password: Plain text password that was just verified
+        old_hash: Hash the password was verified against
+
+    Returns:
+        True if the new hash was stored
+    """
+    try:
+        new_hash = await get_password_hash_async(password)
+        async with session_factory() as session:
+            updated = await user_service.update_password_hash(session, user_id, new_hash, old_hash)
+            await session.commit()
+        return updated
+    except Exception as e:
+        print(f"⚠️  Password rehash for user {user_id} failed: {e}")
+        return False
 
 
 async def create_user(db: AsyncSession, email: str, username: str, password: str) -> User:
@@ -44,11 +104,69 @@ async def create_user(db: AsyncSession, email: str, username: str, password: str
 
     Returns:
         Created user
+
+    Raises:
+        ValueError: If the email or username is already registered
+        PasswordHasherBusyError: If the password hashing pool is saturated
     """
-    password_hash = get_password_hash(password)
+    password_hash = await get_password_hash_async(password)
     return await user_service.create_user(db, email, username, password_hash)
 
 
+async def issue_refresh_token(db: AsyncSession, user_id: str) -> str:
+    """
+    Issue a refresh token for a newly authenticated user.
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        The refresh token
+    """
+    return await refresh_token_service.issue_refresh_token(db, user_id)
+
+
+async def revoke_refresh_token(db: AsyncSession, refresh_token: str, user_id: str) -> bool:
+    """
+    Revoke a user's refresh token along with the rest of its family.
+
+    Args:
+        db: Database session
+        refresh_token: Refresh token
+        user_id: ID of the user the token must belong to
+
+    Returns:
+        True if the token was found
+    """
+    return await refresh_token_service.revoke_refresh_token(db, refresh_token, user_id)
+
+
+async def refresh_session(db: AsyncSession, refresh_token: str) -> tuple[Principal, str] | None:
+    """
+    Exchange a refresh token for the user's identity and a new refresh token.
+
+    No password is involved, so this never touches the password hashing pool.
+
+    Args:
+        db: Database session
+        refresh_token: Refresh token presented by the client
+
+    Returns:
+        Tuple of (Principal, new refresh token), or None if the token is
+        invalid, expired, revoked, or its user no longer exists
+    """
+    rotated = await refresh_token_service.rotate_refresh_token(db, refresh_token)
+    if rotated is None:
+        return None
+    user_id, new_refresh_token = rotated
+
+    principal = await user_service.get_principal(db, user_id)
+    if principal is None:
+        return None
+    return principal, new_refresh_token
+
+
 async def get_user_by_id(db: AsyncSession, user_id: str) -> User | None:
     """
     Get a user by ID.
@@ -61,3 +179,36 @@ async def get_user_by_id(db: AsyncSession, user_id: str) -> User | None:
         User or None if not found
     """
     return await user_service.get_user_by_id(db, user_id)
+
+
+async def get_current_principal(
+    token_data: TokenData = Depends(get_current_token), db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """
+    Dependency for getting the authenticated user's identity.
+
+    The identity comes straight from the verified token. The database is
+    only consulted for tokens issued without identity claims, or whose user
+    version is older than one this process has already seen.
+
+    Raises:
+        HTTPException: 401 if the user no longer exists
+    """
+    known_version = user_service.get_known_user_version(token_data.user_id)
+    if (
+        token_data.username is not None
+        and token_data.version is not None
+        and (known_version is None or token_data.version >= known_version)
+    ):
+        return Principal(
+            user_id=token_data.user_id, username=token_data.username, version=token_data.version
+        )
+
+    principal = await user_service.get_principal(db, token_data.user_id)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
@@ -4,8 +4,9 @@ Database session management.
 This module provides database connection and session management using SQLAlchemy.
 """
 
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Callable
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import settings
@@ -50,6 +51,64 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+def get_session_factory() -> async_sessionmaker:
+    """
+    Dependency for getting the session factory.
+
+    For endpoints that must not hold a session for their whole lifetime,
+    such as WebSockets, and open short-lived sessions instead.
+    """
+    return AsyncSessionLocal
+
+
+# Session.info key of state scoped to the session's current transaction
+_TRANSACTION_INFO_KEY = "transaction_info"
+
+
+def transaction_info(db: AsyncSession) -> dict:
+    """
+    Get a dict scoped to the session's current transaction.
+
+    Like ``Session.info``, but emptied when the outermost transaction ends,
+    whether it commits, rolls back or is closed.
+
+    Args:
+        db: Database session
+    """
+    info = db.info.get(_TRANSACTION_INFO_KEY)
+    if info is None:
+        info = db.info[_TRANSACTION_INFO_KEY] = {}
+        event.listen(db.sync_session, "after_commit", _run_after_commit_callbacks)
+        event.listen(db.sync_session, "after_transaction_end", _clear_transaction_info)
+    return info
+
+
+def run_after_commit(db: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Run a callback once the session's current transaction commits.
+
+    Callbacks are discarded if the transaction ends without committing, so
+    in-memory state updated through them never reflects writes that did not
+    reach the database.
+
+    Args:
+        db: Database session
+        callback: Function to call after the commit
+    """
+    transaction_info(db).setdefault("after_commit", []).append(callback)
+
+
+def _run_after_commit_callbacks(session) -> None:
+    for callback in session.info[_TRANSACTION_INFO_KEY].pop("after_commit", []):
+        callback()
+
+
+def _clear_transaction_info(session, transaction) -> None:
+    # Runs after after_commit; nested transactions (savepoints) keep the state
+    if transaction.parent is None:
+        session.info[_TRANSACTION_INFO_KEY].clear()
+
+
 async def init_db():
     """Initialize database tables."""
     from app.models.db import Base
@@ -4,46 +4,309 @@ Leaderboard database service.
 This module provides database operations for leaderboard entries.
 """
 
-from datetime import date
+import asyncio
+import base64
+import binascii
+from collections.abc import AsyncIterator, Sequence
+from datetime import date, datetime, timedelta
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, delete, func, insert, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.models.db import LeaderboardEntryDB
-from app.models.schemas import GameMode, LeaderboardEntry
+from app.config import settings
+from app.models.db import LeaderboardEntryDB, UserBestScoreDB, WindowBestScoreDB
+from app.models.schemas import (
+    GameMode,
+    LeaderboardEntry,
+    LeaderboardNeighbourhood,
+    LeaderboardPage,
+    LeaderboardWindow,
+    RankedLeaderboardEntry,
+)
+from app.services.db_session import run_after_commit, transaction_info
+from app.services.rank_index import rank_index
+from app.utils.cache import TTLCache
+from app.utils.http_cache import make_etag
+
+# Per-(mode, window) data versions, bumped whenever a view gains a new best.
+# Cached pages are keyed by version, so a bump makes older pages unreachable.
+_versions: dict[tuple[GameMode, LeaderboardWindow], int] = {
+    (mode, window): 0 for mode in GameMode for window in LeaderboardWindow
+}
+
+# (ETag, serialized page) pairs, keyed by (mode, window, period, cursor, limit, version)
+_page_cache = TTLCache(settings.leaderboard_cache_size, settings.leaderboard_cache_ttl_seconds)
+
+# Windows backed by the pre-aggregated window_best_scores table
+PERIOD_WINDOWS = (LeaderboardWindow.DAY, LeaderboardWindow.WEEK)
+
+# Transaction info key of (score, mode) entries not yet in the rank index
+_PENDING_RANKS_KEY = "pending_ranks"
+
+
+def get_period_start(window: LeaderboardWindow, today: date | None = None) -> date | None:
+    """
+    Get the first day of the current period of a time window.
+
+    Args:
+        window: Leaderboard window
+        today: Reference date (defaults to today)
+
+    Returns:
+        Today for daily windows, this week's Monday for weekly windows, or
+        None for the all-time window
+    """
+    today = today or date.today()
+    if window == LeaderboardWindow.DAY:
+        return today
+    if window == LeaderboardWindow.WEEK:
+        return today - timedelta(days=today.weekday())
+    return None
+
+
+def get_leaderboard_version(
+    mode: GameMode | None = None, window: LeaderboardWindow = LeaderboardWindow.ALL
+) -> int:
+    """
+    Get the data version of a leaderboard view.
+
+    Args:
+        mode: Game mode, or None for the all-modes view
+        window: Leaderboard time window
+
+    Returns:
+        Counter that increases whenever the view's data changes
+    """
+    if mode:
+        return _versions[(mode, window)]
+    return sum(_versions[(m, window)] for m in GameMode)
+
+
+def _bump_version(db: AsyncSession, mode: GameMode, windows: list[LeaderboardWindow]) -> None:
+    """
+    Invalidate cached pages for a mode's windows after a write.
+
+    The version is bumped right away and again once the session commits, so a
+    page read from the database between the flush and the commit cannot stay
+    cached under the new version.
+    """
+
+    def bump() -> None:
+        for window in windows:
+            _versions[(mode, window)] += 1
+
+    bump()
+    run_after_commit(db, bump)
+
+
+def _add_to_rank_index(db: AsyncSession, scores: list[tuple[int, GameMode]]) -> None:
+    """
+    Add new history entries to the in-memory rank index once the session commits.
+
+    A rolled back write never reaches the index. Until the commit, the
+    entries are kept with the transaction so ``get_rank`` still counts them
+    for this session, as the database does.
+    """
+    if not scores or not rank_index.is_loaded:
+        return
+
+    info = transaction_info(db)
+    pending = info.get(_PENDING_RANKS_KEY)
+    if pending is None:
+        pending = info[_PENDING_RANKS_KEY] = []
+
+        def add() -> None:
+            for score, mode in pending:
+                rank_index.add(mode, score)
+
+        run_after_commit(db, add)
+    pending.extend(scores)
+
+
+def clear_cache() -> None:
+    """Drop all cached leaderboard pages."""
+    _page_cache.clear()
+
+
+def encode_cursor(score: int, entry_id: int) -> str:
+    """Encode a (score, id) keyset position as an opaque cursor."""
+    return base64.urlsafe_b64encode(f"{score}:{entry_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, entry_id = base64.urlsafe_b64decode(padded).decode().split(":")
+        return int(score), int(entry_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def _window_source(window: LeaderboardWindow) -> tuple[type, list]:
+    """Get the table backing a window and the filters selecting its current period."""
+    if window == LeaderboardWindow.ALL:
+        return LeaderboardEntryDB, []
+    return WindowBestScoreDB, [
+        WindowBestScoreDB.period == window.value,
+        WindowBestScoreDB.period_start == get_period_start(window),
+    ]
 
 
 async def get_leaderboard(
-    db: AsyncSession, mode: GameMode | None = None
-) -> list[LeaderboardEntry]:
+    db: AsyncSession,
+    mode: GameMode | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+    window: LeaderboardWindow = LeaderboardWindow.ALL,
+) -> LeaderboardPage:
     """
-    Get leaderboard entries, optionally filtered by mode.
+    Get a page of leaderboard entries, optionally filtered by mode.
+
+    Entries are ordered by score (descending) and then id, and paginated with
+    a keyset cursor on (score, id), so every page costs the same to fetch
+    regardless of its depth. Daily and weekly windows read the pre-aggregated
+    per-period bests instead of the full history.
 
     Args:
         db: Database session
         mode: Optional game mode filter
+        limit: Maximum number of entries to return
+        cursor: Cursor returned with the previous page
+        window: Time window (current day, current week or all time)
 
     Returns:
-        List of leaderboard entries sorted by score (descending)
+        Page of entries with the cursor for the next page
+
+    Raises:
+        ValueError: If the cursor is malformed
     """
-    query = select(LeaderboardEntryDB).order_by(LeaderboardEntryDB.score.desc())
+    model, filters = _window_source(window)
+    query = select(model).where(*filters).order_by(model.score.desc(), model.id)
 
     if mode:
-        query = query.where(LeaderboardEntryDB.mode == mode.value)
+        query = query.where(model.mode == mode.value)
+
+    if cursor:
+        last_score, last_id = decode_cursor(cursor)
+        # The redundant upper bound on score lets planners seek straight into the index
+        query = query.where(
+            model.score <= last_score,
+            or_(model.score < last_score, model.id > last_id),
+        )
 
-    result = await db.execute(query)
+    # Fetch one extra row to find out whether there is a next page
+    result = await db.execute(query.limit(limit + 1))
     db_entries = result.scalars().all()
 
-    return [
-        LeaderboardEntry(
-            id=str(entry.id),
-            username=entry.username,
-            score=entry.score,
-            mode=GameMode(entry.mode),
-            date=entry.date,
-        )
-        for entry in db_entries
-    ]
+    next_cursor = None
+    if len(db_entries) > limit:
+        db_entries = db_entries[:limit]
+        last = db_entries[-1]
+        next_cursor = encode_cursor(last.score, last.id)
+
+    return LeaderboardPage(
+        entries=[
+            LeaderboardEntry(
+                id=str(entry.id),
+                username=entry.username,
+                score=entry.score,
+                mode=GameMode(entry.mode),
+                date=entry.date,
+            )
+            for entry in db_entries
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+async def get_leaderboard_json(
+    db: AsyncSession,
+    mode: GameMode | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+    window: LeaderboardWindow = LeaderboardWindow.ALL,
+) -> tuple[str, bytes]:
+    """
+    Get a page of leaderboard entries as serialized JSON, using the page cache.
+
+    Cache hits skip both the database and Pydantic serialization. Each worker
+    process has its own cache, so pages written by other workers become
+    visible within ``leaderboard_cache_ttl_seconds``. For the same reason the
+    ETag cannot be derived from the local versions without reading the page:
+    they do not move when another worker writes.
+
+    Args:
+        db: Database session
+        mode: Optional game mode filter
+        limit: Maximum number of entries to return
+        cursor: Cursor returned with the previous page
+        window: Time window (current day, current week or all time)
+
+    Returns:
+        Tuple of (ETag, JSON-encoded ``LeaderboardPage``); the ETag is a hash
+        of the body, so it is stable across workers and cache refreshes
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    key = (
+        mode,
+        window,
+        get_period_start(window),
+        cursor,
+        limit,
+        get_leaderboard_version(mode, window),
+    )
+    cached = _page_cache.get(key)
+    if cached is None:
+        page = await get_leaderboard(db, mode, limit=limit, cursor=cursor, window=window)
+        body = page.model_dump_json().encode()
+        cached = (make_etag(body), body)
+        _page_cache.set(key, cached)
+    return cached
+
+
+async def stream_leaderboard(
+    db: AsyncSession,
+    mode: GameMode | None = None,
+    window: LeaderboardWindow = LeaderboardWindow.ALL,
+    chunk_size: int = 1000,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Stream every leaderboard entry in leaderboard order.
+
+    Rows are read through a server-side cursor in chunks of ``chunk_size``,
+    so memory use stays constant however large the leaderboard is.
+
+    Args:
+        db: Database session
+        mode: Optional game mode filter
+        window: Time window (current day, current week or all time)
+        chunk_size: Rows fetched from the cursor at a time
+
+    Yields:
+        Chunks of (id, username, score, mode, date) rows
+    """
+    model, filters = _window_source(window)
+    query = (
+        select(model.id, model.username, model.score, model.mode, model.date)
+        .where(*filters)
+        .order_by(model.score.desc(), model.id)
+    )
+    if mode:
+        query = query.where(model.mode == mode.value)
+
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+    async for rows in result.partitions():
+        yield rows
 
 
 async def get_user_best_score(
@@ -60,14 +323,298 @@ async def get_user_best_score(
     Returns:
         Best score or None if no scores exist
     """
+    result = await db.execute(
+        select(UserBestScoreDB.score).where(
+            UserBestScoreDB.username == username, UserBestScoreDB.mode == mode.value
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+def _insert_for(db: AsyncSession):
+    """Get the dialect-specific INSERT construct that supports ON CONFLICT."""
+    return postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+
+
+async def upsert_best_scores(
+    db: AsyncSession, scores: list[tuple[str, int, GameMode]]
+) -> tuple[set[tuple[str, GameMode]], dict[tuple[str, GameMode], int]]:
+    """
+    Record scores as users' bests where they beat the stored bests.
+
+    Runs a single multi-row ``INSERT ... ON CONFLICT DO UPDATE ... WHERE``
+    statement, so concurrent submissions for the same user and mode cannot
+    both win and losing scores leave the stored rows untouched. The stored
+    bests of losing scores are then read with one primary-key lookup.
+
+    Args:
+        db: Database session
+        scores: (username, score, mode) tuples, at most one per user and mode
+
+    Returns:
+        Tuple of the (username, mode) pairs whose best score changed, and the
+        stored best per (username, mode) pair whose score did not beat it
+    """
+    upsert = _insert_for(db)
+    now = datetime.utcnow()
+    stmt = upsert(UserBestScoreDB).values(
+        [
+            {"username": username, "mode": mode.value, "score": score, "updated_at": now}
+            for username, score, mode in scores
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserBestScoreDB.username, UserBestScoreDB.mode],
+        set_={"score": stmt.excluded.score, "updated_at": stmt.excluded.updated_at},
+        where=stmt.excluded.score > UserBestScoreDB.score,
+    ).returning(UserBestScoreDB.username, UserBestScoreDB.mode, UserBestScoreDB.score)
+
+    # Only rows the statement wrote come back, holding the submitted score
+    submitted = {(username, mode): score for username, score, mode in scores}
+    new_bests = {
+        (username, GameMode(mode))
+        for username, mode, best in (await db.execute(stmt)).all()
+        if best == submitted[(username, GameMode(mode))]
+    }
+
+    current_bests: dict[tuple[str, GameMode], int] = {}
+    rejected = [(u, mode.value) for u, mode in submitted if (u, mode) not in new_bests]
+    if rejected:
+        result = await db.execute(
+            select(UserBestScoreDB.username, UserBestScoreDB.mode, UserBestScoreDB.score).where(
+                tuple_(UserBestScoreDB.username, UserBestScoreDB.mode).in_(rejected)
+            )
+        )
+        current_bests = {(u, GameMode(mode)): best for u, mode, best in result.all()}
+    return new_bests, current_bests
+
+
+async def upsert_windows_scores(
+    db: AsyncSession, scores: list[tuple[str, int, GameMode]]
+) -> set[tuple[str, GameMode, LeaderboardWindow]]:
+    """
+    Record scores in the current daily and weekly periods.
+
+    All users and periods are upserted with one multi-row statement that only
+    replaces a period's stored score when the new one is higher.
+
+    Args:
+        db: Database session
+        scores: (username, score, mode) tuples, at most one per user and mode
+
+    Returns:
+        (username, mode, window) triples whose stored best changed
+    """
+    upsert = _insert_for(db)
+    today = date.today()
+    now = datetime.utcnow()
+    stmt = upsert(WindowBestScoreDB).values(
+        [
+            {
+                "period": window.value,
+                "period_start": get_period_start(window, today),
+                "mode": mode.value,
+                "username": username,
+                "score": score,
+                "date": today,
+                "updated_at": now,
+            }
+            for username, score, mode in scores
+            for window in PERIOD_WINDOWS
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            WindowBestScoreDB.period,
+            WindowBestScoreDB.period_start,
+            WindowBestScoreDB.mode,
+            WindowBestScoreDB.username,
+        ],
+        set_={
+            "score": stmt.excluded.score,
+            "date": stmt.excluded.date,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=stmt.excluded.score > WindowBestScoreDB.score,
+    ).returning(WindowBestScoreDB.username, WindowBestScoreDB.mode, WindowBestScoreDB.period)
+
+    result = await db.execute(stmt)
+    return {
+        (username, GameMode(mode), LeaderboardWindow(period))
+        for username, mode, period in result.all()
+    }
+
+
+async def upsert_window_scores(
+    db: AsyncSession, username: str, score: int, mode: GameMode
+) -> list[LeaderboardWindow]:
+    """
+    Record a score in the current daily and weekly periods.
+
+    Args:
+        db: Database session
+        username: Player username
+        score: Score achieved
+        mode: Game mode
+
+    Returns:
+        Windows whose stored best changed
+    """
+    changed = await upsert_windows_scores(db, [(username, score, mode)])
+    return [window for _, _, window in changed]
+
+
+async def prune_expired_windows(db: AsyncSession) -> int:
+    """
+    Delete daily and weekly bests from periods that have ended.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of rows deleted
+    """
+    deleted = 0
+    for window in PERIOD_WINDOWS:
+        result = await db.execute(
+            delete(WindowBestScoreDB).where(
+                WindowBestScoreDB.period == window.value,
+                WindowBestScoreDB.period_start < get_period_start(window),
+            )
+        )
+        deleted += result.rowcount
+    return deleted
+
+
+async def roll_over_windows(session_factory: async_sessionmaker, interval: float) -> None:
+    """
+    Periodically prune ended daily and weekly periods.
+
+    New periods start on their own (rows are keyed by period start), so this
+    only keeps the window table from growing. Runs until cancelled.
+
+    Args:
+        session_factory: Factory for database sessions
+        interval: Seconds between runs
+    """
+    while True:
+        try:
+            async with session_factory() as session:
+                deleted = await prune_expired_windows(session)
+                await session.commit()
+            if deleted:
+                print(f"🧹 Pruned {deleted} expired leaderboard window entries")
+        except Exception as e:
+            print(f"⚠️  Leaderboard window rollover failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def get_rank(db: AsyncSession, score: int, mode: GameMode) -> int:
+    """
+    Get the rank a score has within a mode.
+
+    Uses the in-memory rank index when it is loaded and falls back to a
+    COUNT query otherwise.
+
+    Args:
+        db: Database session
+        score: Score to rank
+        mode: Game mode
+
+    Returns:
+        1 + the number of entries with a strictly higher score in the mode
+    """
+    if rank_index.is_loaded:
+        pending = transaction_info(db).get(_PENDING_RANKS_KEY, [])
+        higher_pending = sum(1 for s, m in pending if m == mode and s > score)
+        return rank_index.rank(mode, score) + higher_pending
+
+    result = await db.execute(
+        select(func.count())
+        .select_from(LeaderboardEntryDB)
+        .where(LeaderboardEntryDB.mode == mode.value, LeaderboardEntryDB.score > score)
+    )
+    return result.scalar_one() + 1
+
+
+async def get_around_user(
+    db: AsyncSession, username: str, mode: GameMode, radius: int
+) -> LeaderboardNeighbourhood:
+    """
+    Get the entries ranked just above and below a user's best score.
+
+    Neighbours are read with two bounded range scans on the (mode, score, id)
+    index starting at the user's entry, and each entry's rank comes from
+    ``get_rank``, so the cost depends on ``radius`` rather than table size.
+
+    Args:
+        db: Database session
+        username: Player username
+        mode: Game mode
+        radius: Number of entries to return on each side
+
+    Returns:
+        The user's rank and up to ``radius`` entries either side of theirs
+    """
+    best = await get_user_best_score(db, username, mode)
+    if best is None:
+        return LeaderboardNeighbourhood(rank=None, entries=[])
+
     result = await db.execute(
         select(LeaderboardEntryDB)
-        .where(LeaderboardEntryDB.username == username, LeaderboardEntryDB.mode == mode.value)
-        .order_by(LeaderboardEntryDB.score.desc())
+        .where(
+            LeaderboardEntryDB.username == username,
+            LeaderboardEntryDB.mode == mode.value,
+            LeaderboardEntryDB.score == best,
+        )
+        .order_by(LeaderboardEntryDB.id)
         .limit(1)
     )
-    best_entry = result.scalar_one_or_none()
-    return best_entry.score if best_entry else None
+    own_entry = result.scalar_one_or_none()
+    own_id = own_entry.id if own_entry else 0
+
+    in_mode = LeaderboardEntryDB.mode == mode.value
+    above = await db.execute(
+        select(LeaderboardEntryDB)
+        .where(
+            in_mode,
+            LeaderboardEntryDB.score >= best,
+            or_(LeaderboardEntryDB.score > best, LeaderboardEntryDB.id < own_id),
+        )
+        .order_by(LeaderboardEntryDB.score, LeaderboardEntryDB.id.desc())
+        .limit(radius)
+    )
+    below = await db.execute(
+        select(LeaderboardEntryDB)
+        .where(
+            in_mode,
+            LeaderboardEntryDB.score <= best,
+            or_(LeaderboardEntryDB.score < best, LeaderboardEntryDB.id > own_id),
+        )
+        .order_by(LeaderboardEntryDB.score.desc(), LeaderboardEntryDB.id)
+        .limit(radius)
+    )
+
+    db_entries = [*reversed(above.scalars().all())]
+    if own_entry:
+        db_entries.append(own_entry)
+    db_entries += below.scalars().all()
+
+    ranks = {score: await get_rank(db, score, mode) for score in {e.score for e in db_entries}}
+    return LeaderboardNeighbourhood(
+        rank=await get_rank(db, best, mode),
+        entries=[
+            RankedLeaderboardEntry(
+                id=str(entry.id),
+                username=entry.username,
+                score=entry.score,
+                mode=GameMode(entry.mode),
+                date=entry.date,
+                rank=ranks[entry.score],
+            )
+            for entry in db_entries
+        ],
+    )
 
 
 async def add_leaderboard_entry(
@@ -76,6 +623,8 @@ async def add_leaderboard_entry(
     """
     Add a leaderboard entry only if it's better than the user's previous best.
 
+    Every submission also updates the user's daily and weekly bests.
+
     Args:
         db: Database session
         username: Player username
@@ -83,44 +632,134 @@ async def add_leaderboard_entry(
         mode: Game mode
 
     Returns:
-        Dict with rank and whether it was a new best score
+        Dict with rank and whether it was a new best score; accepted scores
+        carry the new history row's ``entry_id`` and rejected scores the
+        user's current best as ``previous_best``
     """
-    # Check user's previous best score
-    previous_best = await get_user_best_score(db, username, mode)
+    # Daily and weekly bests are tracked for every submission
+    changed_windows = await upsert_window_scores(db, username, score, mode)
 
-    # Only save if this is a new best score
-    if previous_best is not None and score <= previous_best:
-        # Calculate rank for current score (even though we're not saving it)
-        result = await db.execute(
-            select(LeaderboardEntryDB).where(
-                LeaderboardEntryDB.mode == mode.value, LeaderboardEntryDB.score > score
-            )
-        )
-        higher_scores = len(result.scalars().all())
+    # Atomically replace the stored best, or learn the best the score did not beat
+    new_bests, current_bests = await upsert_best_scores(db, [(username, score, mode)])
+    if (username, mode) not in new_bests:
+        if changed_windows:
+            _bump_version(db, mode, changed_windows)
         return {
-            "rank": higher_scores + 1,
+            "rank": await get_rank(db, score, mode),
             "is_new_best": False,
-            "previous_best": previous_best,
+            "previous_best": current_bests.get((username, mode)),
         }
 
-    # Create entry
-    db_entry = LeaderboardEntryDB(
-        username=username, score=score, mode=mode.value, date=date.today()
-    )
-    db.add(db_entry)
+    # Append to the leaderboard history
+    entry = LeaderboardEntryDB(username=username, score=score, mode=mode.value, date=date.today())
+    db.add(entry)
     await db.flush()
-    await db.refresh(db_entry)
 
-    # Calculate rank by counting entries with higher scores in the same mode
-    result = await db.execute(
-        select(LeaderboardEntryDB).where(
-            LeaderboardEntryDB.mode == mode.value, LeaderboardEntryDB.score > score
-        )
-    )
-    higher_scores = len(result.scalars().all())
+    _add_to_rank_index(db, [(score, mode)])
+    _bump_version(db, mode, [*changed_windows, LeaderboardWindow.ALL])
 
     return {
-        "rank": higher_scores + 1,
+        "rank": await get_rank(db, score, mode),
         "is_new_best": True,
-        "previous_best": previous_best,
+        "entry_id": entry.id,
     }
+
+
+async def add_leaderboard_entries(
+    db: AsyncSession, username: str, scores: list[tuple[int, GameMode]]
+) -> list[dict]:
+    """
+    Add a batch of scores for one user.
+
+    Scores are collapsed to the highest per mode before touching the
+    database, so each mode costs a single ``add_leaderboard_entry`` call.
+    All writes share the session's transaction.
+
+    Args:
+        db: Database session
+        username: Player username
+        scores: (score, mode) pairs in submission order
+
+    Returns:
+        One result dict per submitted score, in order. Scores beaten by a
+        higher score for the same mode in the batch are reported as not saved.
+    """
+    best_index: dict[GameMode, int] = {}
+    for i, (score, mode) in enumerate(scores):
+        if mode not in best_index or score > scores[best_index[mode]][0]:
+            best_index[mode] = i
+
+    results: dict[int, dict] = {}
+    current_best: dict[GameMode, int] = {}
+    for mode, i in best_index.items():
+        result = await add_leaderboard_entry(db, username, scores[i][0], mode)
+        results[i] = result
+        current_best[mode] = scores[i][0] if result["is_new_best"] else result["previous_best"]
+
+    for i, (score, mode) in enumerate(scores):
+        if i not in results:
+            results[i] = {
+                "rank": await get_rank(db, score, mode),
+                "is_new_best": False,
+                "previous_best": current_best[mode],
+            }
+
+    return [results[i] for i in range(len(scores))]
+
+
+async def add_coalesced_entries(
+    db: AsyncSession, scores: list[tuple[str, int, GameMode]]
+) -> dict[tuple[str, GameMode], dict]:
+    """
+    Add the best scores of many users in a fixed number of statements.
+
+    Used by the write-behind ingestion pipeline: one upsert for the bests,
+    one for the daily and weekly windows, one multi-row history insert and
+    one lookup of the bests that were not beaten.
+
+    Args:
+        db: Database session
+        scores: (username, score, mode) tuples, at most one per user and mode
+
+    Returns:
+        Result dict (as returned by ``add_leaderboard_entry``) per (username, mode)
+    """
+    changed_windows = await upsert_windows_scores(db, scores)
+    new_bests, previous_bests = await upsert_best_scores(db, scores)
+
+    accepted = [(u, score, mode) for u, score, mode in scores if (u, mode) in new_bests]
+
+    entry_ids: dict[tuple[str, GameMode], int] = {}
+    if accepted:
+        today = date.today()
+        result = await db.execute(
+            insert(LeaderboardEntryDB).returning(
+                LeaderboardEntryDB.id, LeaderboardEntryDB.username, LeaderboardEntryDB.mode
+            ),
+            [
+                {"username": u, "score": score, "mode": mode.value, "date": today}
+                for u, score, mode in accepted
+            ],
+        )
+        entry_ids = {(u, GameMode(mode)): entry_id for entry_id, u, mode in result.all()}
+
+    for mode in GameMode:
+        windows = [window for _, m, window in changed_windows if m == mode]
+        if any(m == mode for _, _, m in accepted):
+            windows.append(LeaderboardWindow.ALL)
+        if windows:
+            _bump_version(db, mode, list(dict.fromkeys(windows)))
+
+    _add_to_rank_index(db, [(score, mode) for _, score, mode in accepted])
+
+    results = {}
+    for username, score, mode in scores:
+        is_new_best = (username, mode) in new_bests
+        result = {"rank": await get_rank(db, score, mode), "is_new_best": is_new_best}
+        if is_new_best:
+            result["entry_id"] = entry_ids[(username, mode)]
+        else:
+            result["previous_best"] = previous_bests.get((username, mode))
+        results[(username, mode)] = result
+
+    return results
@@ -0,0 +1,474 @@
+"""
+Pluggable leaderboard storage backends.
+
+Routers and the ingestion pipeline talk to a ``LeaderboardStore`` instead of
+calling ``leaderboard_service`` directly. Two stores are available, selected
+with the ``leaderboard_store`` setting:
+
+- ``sql``: every call goes to the database through ``leaderboard_service``.
+- ``memory``: all-time leaderboard reads, ranks and best scores are served
+  from per-mode in-process sorted sets that are loaded from the database at
+  startup. Writes still go to the database first and are then mirrored into
+  the sets once the transaction commits, so the database stays the source of
+  truth and rolled back writes never show up in memory. Daily and weekly
+  windows and bulk exports are always read from the database.
+
+Like the rank index, the in-memory store is process-local: each worker loads
+its own copy and only sees the writes it handled itself.
+"""
+
+from collections.abc import AsyncIterator, Sequence
+from datetime import date
+from threading import Lock
+from typing import Protocol
+
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.db import LeaderboardEntryDB, UserBestScoreDB
+from app.models.schemas import (
+    GameMode,
+    LeaderboardEntry,
+    LeaderboardNeighbourhood,
+    LeaderboardPage,
+    LeaderboardWindow,
+    RankedLeaderboardEntry,
+)
+from app.services import leaderboard_service
+from app.services.db_session import run_after_commit
+from app.utils.cache import TTLCache
+from app.utils.http_cache import make_etag
+from app.utils.sorted_set import SortedSet
+
+
+class LeaderboardStore(Protocol):
+    """Operations the API needs from a leaderboard backend."""
+
+    async def load(self, db: AsyncSession) -> None: ...
+
+    async def get_leaderboard(
+        self,
+        db: AsyncSession,
+        mode: GameMode | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        window: LeaderboardWindow = LeaderboardWindow.ALL,
+    ) -> LeaderboardPage: ...
+
+    async def get_leaderboard_json(
+        self,
+        db: AsyncSession,
+        mode: GameMode | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        window: LeaderboardWindow = LeaderboardWindow.ALL,
+    ) -> tuple[str, bytes]: ...
+
+    def stream_leaderboard(
+        self,
+        db: AsyncSession,
+        mode: GameMode | None = None,
+        window: LeaderboardWindow = LeaderboardWindow.ALL,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]: ...
+
+    async def get_user_best_score(
+        self, db: AsyncSession, username: str, mode: GameMode
+    ) -> int | None: ...
+
+    async def get_rank(self, db: AsyncSession, score: int, mode: GameMode) -> int: ...
+
+    async def get_around_user(
+        self, db: AsyncSession, username: str, mode: GameMode, radius: int
+    ) -> LeaderboardNeighbourhood: ...
+
+    async def add_leaderboard_entry(
+        self, db: AsyncSession, username: str, score: int, mode: GameMode
+    ) -> dict: ...
+
+    async def add_leaderboard_entries(
+        self, db: AsyncSession, username: str, scores: list[tuple[int, GameMode]]
+    ) -> list[dict]: ...
+
+    async def add_coalesced_entries(
+        self, db: AsyncSession, scores: list[tuple[str, int, GameMode]]
+    ) -> dict[tuple[str, GameMode], dict]: ...
+
+
+class SQLLeaderboardStore:
+    """Leaderboard store backed entirely by the database."""
+
+    async def load(self, db: AsyncSession) -> None:
+        """Nothing to preload; every call goes to the database."""
+
+    async def get_leaderboard(
+        self,
+        db: AsyncSession,
+        mode: GameMode | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        window: LeaderboardWindow = LeaderboardWindow.ALL,
+    ) -> LeaderboardPage:
+        """See ``leaderboard_service.get_leaderboard``."""
+        return await leaderboard_service.get_leaderboard(db, mode, limit, cursor, window)
+
+    async def get_leaderboard_json(
+        self,
+        db: AsyncSession,
+        mode: GameMode | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        window: LeaderboardWindow = LeaderboardWindow.ALL,
+    ) -> tuple[str, bytes]:
+        """See ``leaderboard_service.get_leaderboard_json``."""
+        return await leaderboard_service.get_leaderboard_json(db, mode, limit, cursor, window)
+
+    def stream_leaderboard(
+        self,
+        db: AsyncSession,
+        mode: GameMode | None = None,
+        window: LeaderboardWindow = LeaderboardWindow.ALL,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """See ``leaderboard_service.stream_leaderboard``."""
+        return leaderboard_service.stream_leaderboard(db, mode, window, chunk_size)
+
+    async def get_user_best_score(
+        self, db: AsyncSession, username: str, mode: GameMode
+    ) -> int | None:
+        """See ``leaderboard_service.get_user_best_score``."""
+        return await leaderboard_service.get_user_best_score(db, username, mode)
+
+    async def get_rank(self, db: AsyncSession, score: int, mode: GameMode) -> int:
+        """See ``leaderboard_service.get_rank``."""
+        return await leaderboard_service.get_rank(db, score, mode)
+
+    async def get_around_user(
+        self, db: AsyncSession, username: str, mode: GameMode, radius: int
+    ) -> LeaderboardNeighbourhood:
+        """See ``leaderboard_service.get_around_user``."""
+        return await leaderboard_service.get_around_user(db, username, mode, radius)
+
+    async def add_leaderboard_entry(
+        self, db: AsyncSession, username: str, score: int, mode: GameMode
+    ) -> dict:
+        """See ``leaderboard_service.add_leaderboard_entry``."""
+        return await leaderboard_service.add_leaderboard_entry(db, username, score, mode)
+
+    async def add_leaderboard_entries(
+        self, db: AsyncSession, username: str, scores: list[tuple[int, GameMode]]
+    ) -> list[dict]:
+        """See ``leaderboard_service.add_leaderboard_entries``."""
+        return await leaderboard_service.add_leaderboard_entries(db, username, scores)
+
+    async def add_coalesced_entries(
+        self, db: AsyncSession, scores: list[tuple[str, int, GameMode]]
+    ) -> dict[tuple[str, GameMode], dict]:
+        """See ``leaderboard_service.add_coalesced_entries``."""
+        return await leaderboard_service.add_coalesced_entries(db, scores)
+
+
+class MemoryLeaderboardStore(SQLLeaderboardStore):
+    """
+    Write-through in-process leaderboard store.
+
+    Each mode has a ``SortedSet`` of ``(-score, id)`` keys, so iterating a set
+    yields entries in leaderboard order and the rank of a score is one plus
+    the number of keys before ``(-score,)``. A second set holds every mode for
+    the unfiltered leaderboard. Until ``load`` has run, every call falls back
+    to the database.
+
+    Serialized pages are cached under per-mode versions that every mirrored
+    write bumps, like the SQL store's page cache.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._loaded = False
+        self._versions = dict.fromkeys(GameMode, 0)
+        self._pages = TTLCache(
+            settings.leaderboard_cache_size, settings.leaderboard_cache_ttl_seconds
+        )
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self._all = SortedSet()
+        self._modes: dict[GameMode, SortedSet] = {mode: SortedSet() for mode in GameMode}
+        # id -> (username, score, mode, date)
+        self._entries: dict[int, tuple[str, int, GameMode, date]] = {}
+        # (username, mode) -> (best score, id of the first entry with that score)
+        self._bests: dict[tuple[str, GameMode], tuple[int, int]] = {}
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the store has been populated from the database."""
+        return self._loaded
+
+    def reset(self) -> None:
+        """Drop all entries and fall back to the database until reloaded."""
+        with self._lock:
+            self._reset_state()
+            self._loaded = False
+        self._pages.clear()
+
+    async def load(self, db: AsyncSession) -> None:
+        """
+        Populate the sorted sets from the leaderboard and best-score tables.
+
+        Args:
+            db: Database session
+        """
+        entries: dict[int, tuple[str, int, GameMode, date]] = {}
+        first_ids: dict[tuple[str, GameMode, int], int] = {}
+        result = await db.execute(
+            select(
+                LeaderboardEntryDB.id,
+                LeaderboardEntryDB.username,
+                LeaderboardEntryDB.score,
+                LeaderboardEntryDB.mode,
+                LeaderboardEntryDB.date,
+            ).order_by(LeaderboardEntryDB.id)
+        )
+        for entry_id, username, score, mode, entry_date in result.all():
+            mode = GameMode(mode)
+            entries[entry_id] = (username, score, mode, entry_date)
+            first_ids.setdefault((username, mode, score), entry_id)
+
+        result = await db.execute(
+            select(UserBestScoreDB.username, UserBestScoreDB.mode, UserBestScoreDB.score)
+        )
+        bests = {}
+        for username, mode, score in result.all():
+            mode = GameMode(mode)
+            bests[(username, mode)] = (score, first_ids.get((username, mode, score), 0))
+
+        all_keys = [(-score, entry_id) for entry_id, (_, score, _, _) in entries.items()]
+        modes = {
+            mode: SortedSet([(-score, i) for i, (_, score, m, _) in entries.items() if m == mode])
+            for mode in GameMode
+        }
+
+        with self._lock:
+            self._all = SortedSet(all_keys)
+            self._modes = modes
+            self._entries = entries
+            self._bests = bests
+            self._loaded = True
+            for mode in GameMode:
+                self._versions[mode] += 1
+
+    def _add(self, entry_id: int, username: str, score: int, mode: GameMode) -> None:
+        """Mirror a new best score written to the database."""
+        with self._lock:
+            self._entries[entry_id] = (username, score, mode, date.today())
+            self._all.add((-score, entry_id))
+            self._modes[mode].add((-score, entry_id))
+            self._bests[(username, mode)] = (score, entry_id)
+            self._versions[mode] += 1
+
+    def _version(self, mode: GameMode | None) -> int:
+        """Get the version of a mode's pages, or of the all-modes pages."""
+        if mode:
+            return self._versions[mode]
+        return sum(self._versions.values())
+
+    def _mirror(self, db: AsyncSession, bests: list[tuple[int, str, int, GameMode]]) -> None:
+        """Mirror ``(entry id, username, score, mode)`` new bests once ``db`` commits."""
+        if not self._loaded or not bests:
+            return
+
+        def add() -> None:
+            for best in bests:
+                self._add(*best)
+
+        run_after_commit(db, add)
+
+    def _entry(self, entry_id: int) -> LeaderboardEntry:
+        username, score, mode, entry_date = self._entries[entry_id]
+        return LeaderboardEntry(
+            id=str(entry_id), username=username, score=score, mode=mode, date=entry_date
+        )
+
+    def _rank(self, mode: GameMode, score: int) -> int:
+        return self._modes[mode].count_below((-score,)) + 1
+
+    async def get_leaderboard(
+        self,
+        db: AsyncSession,
+        mode: GameMode | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        window: LeaderboardWindow = LeaderboardWindow.ALL,
+    ) -> LeaderboardPage:
+        """
+        Get a page of leaderboard entries, optionally filtered by mode.
+
+        Same ordering and cursors as ``leaderboard_service.get_leaderboard``.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        if not self._loaded or window != LeaderboardWindow.ALL:
+            return await super().get_leaderboard(db, mode, limit, cursor, window)
+
+        with self._lock:
+            keys = self._modes[mode] if mode else self._all
+            start = 0
+            if cursor:
+                last_score, last_id = leaderboard_service.decode_cursor(cursor)
+                start = keys.count_at_most((-last_score, last_id))
+
+            page_keys = keys.slice(start, start + limit + 1)
+            next_cursor = None
+            if len(page_keys) > limit:
+                page_keys = page_keys[:limit]
+                score, entry_id = page_keys[-1]
+                next_cursor = leaderboard_service.encode_cursor(-score, entry_id)
+
+            return LeaderboardPage(
+                entries=[self._entry(entry_id) for _, entry_id in page_keys],
+                next_cursor=next_cursor,
+            )
+
+    async def get_leaderboard_json(
+        self,
+        db: AsyncSession,
+        mode: GameMode | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+        window: LeaderboardWindow = LeaderboardWindow.ALL,
+    ) -> tuple[str, bytes]:
+        """
+        Get a page of leaderboard entries as serialized JSON.
+
+        Pages are cached with their ETag until a mirrored write changes the
+        mode, so repeated polls skip both paging and serialization.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        if not self._loaded or window != LeaderboardWindow.ALL:
+            return await super().get_leaderboard_json(db, mode, limit, cursor, window)
+
+        key = (mode, cursor, limit, self._version(mode))
+        cached = self._pages.get(key)
+        if cached is None:
+            page = await self.get_leaderboard(db, mode, limit, cursor, window)
+            body = page.model_dump_json().encode()
+            cached = (make_etag(body), body)
+            self._pages.set(key, cached)
+        return cached
+
+    async def get_user_best_score(
+        self, db: AsyncSession, username: str, mode: GameMode
+    ) -> int | None:
+        """Get user's best score for a specific mode."""
+        if not self._loaded:
+            return await super().get_user_best_score(db, username, mode)
+
+        best = self._bests.get((username, mode))
+        return best[0] if best else None
+
+    async def get_rank(self, db: AsyncSession, score: int, mode: GameMode) -> int:
+        """Get the rank a score has within a mode."""
+        if not self._loaded:
+            return await super().get_rank(db, score, mode)
+
+        with self._lock:
+            return self._rank(mode, score)
+
+    async def get_around_user(
+        self, db: AsyncSession, username: str, mode: GameMode, radius: int
+    ) -> LeaderboardNeighbourhood:
+        """Get the entries ranked just above and below a user's best score."""
+        if not self._loaded:
+            return await super().get_around_user(db, username, mode, radius)
+
+        with self._lock:
+            best = self._bests.get((username, mode))
+            if best is None:
+                return LeaderboardNeighbourhood(rank=None, entries=[])
+
+            score, own_id = best
+            keys = self._modes[mode]
+            position = keys.count_below((-score, own_id))
+            neighbours = keys.slice(position - radius, position)
+            own_key = (-score, own_id)
+            if own_key in keys:
+                neighbours.append(own_key)
+                position += 1
+            neighbours += keys.slice(position, position + radius)
+
+            return LeaderboardNeighbourhood(
+                rank=self._rank(mode, score),
+                entries=[
+                    RankedLeaderboardEntry(
+                        **self._entry(entry_id).model_dump(),
+                        rank=self._rank(mode, -neg_score),
+                    )
+                    for neg_score, entry_id in neighbours
+                ],
+            )
+
+    async def add_leaderboard_entry(
+        self, db: AsyncSession, username: str, score: int, mode: GameMode
+    ) -> dict:
+        """Add a score through the database and mirror it on commit if it is a new best."""
+        result = await super().add_leaderboard_entry(db, username, score, mode)
+        if result["is_new_best"]:
+            self._mirror(db, [(result["entry_id"], username, score, mode)])
+        return result
+
+    async def add_leaderboard_entries(
+        self, db: AsyncSession, username: str, scores: list[tuple[int, GameMode]]
+    ) -> list[dict]:
+        """Add a batch of scores for one user and mirror the new bests on commit."""
+        results = await super().add_leaderboard_entries(db, username, scores)
+        self._mirror(
+            db,
+            [
+                (result["entry_id"], username, score, mode)
+                for (score, mode), result in zip(scores, results, strict=True)
+                if result["is_new_best"]
+            ],
+        )
+        return results
+
+    async def add_coalesced_entries(
+        self, db: AsyncSession, scores: list[tuple[str, int, GameMode]]
+    ) -> dict[tuple[str, GameMode], dict]:
+        """Add the best scores of many users and mirror the new bests on commit."""
+        results = await super().add_coalesced_entries(db, scores)
+        self._mirror(
+            db,
+            [
+                (results[(username, mode)]["entry_id"], username, score, mode)
+                for username, score, mode in scores
+                if results[(username, mode)]["is_new_best"]
+            ],
+        )
+        return results
+
+
+def create_leaderboard_store(kind: str) -> LeaderboardStore:
+    """
+    Create the leaderboard store named by the ``leaderboard_store`` setting.
+
+    Raises:
+        ValueError: If the store kind is unknown
+    """
+    if kind == "sql":
+        return SQLLeaderboardStore()
+    if kind == "memory":
+        return MemoryLeaderboardStore()
+    raise ValueError(f"Unknown leaderboard store: {kind}")
+
+
+# Global store instance, loaded at app startup
+leaderboard_store: LeaderboardStore = create_leaderboard_store(settings.leaderboard_store)
+
+
+def get_leaderboard_store() -> LeaderboardStore:
+    """Dependency for getting the configured leaderboard store."""
+    return leaderboard_store
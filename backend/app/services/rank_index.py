@@ -0,0 +1,130 @@
+"""
+In-memory rank index for leaderboard entries.
+
+Keeps a per-mode Fenwick tree (binary indexed tree) over score buckets so that
+"what rank does score S have in mode M" can be answered in O(log N) without
+querying the database. The index is loaded from the leaderboard table at
+startup and updated on every accepted submission.
+
+The index is process-local: each worker holds its own copy, loaded from the
+database when the worker starts.
+"""
+
+from threading import Lock
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.db import LeaderboardEntryDB
+from app.models.schemas import GameMode
+
+# Scores are stored in a 32-bit signed INTEGER column, so every valid score
+# fits into a tree of this size (one bucket per score value).
+MAX_SCORE = 2**31 - 1
+
+
+class FenwickTree:
+    """
+    Sparse Fenwick tree counting entries per score.
+
+    Nodes are kept in a dict, so memory grows with the number of distinct
+    scores rather than with the size of the score domain. Both updates and
+    prefix queries touch at most log2(MAX_SCORE + 1) nodes.
+    """
+
+    def __init__(self, size: int = MAX_SCORE + 1):
+        self._size = size
+        self._tree: dict[int, int] = {}
+        self._total = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def add(self, score: int, count: int = 1) -> None:
+        """Add ``count`` entries with the given score."""
+        i = score + 1
+        while i <= self._size:
+            self._tree[i] = self._tree.get(i, 0) + count
+            i += i & -i
+        self._total += count
+
+    def count_at_most(self, score: int) -> int:
+        """Count entries with a score less than or equal to ``score``."""
+        if score < 0:
+            return 0
+        i = min(score + 1, self._size)
+        total = 0
+        while i > 0:
+            total += self._tree.get(i, 0)
+            i -= i & -i
+        return total
+
+    def count_above(self, score: int) -> int:
+        """Count entries with a score strictly greater than ``score``."""
+        return self._total - self.count_at_most(score)
+
+
+class RankIndex:
+    """Thread-safe per-mode rank index."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._trees: dict[GameMode, FenwickTree] = {}
+        self._loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the index has been populated from the database."""
+        return self._loaded
+
+    def reset(self) -> None:
+        """Drop all indexed entries and mark the index as not loaded."""
+        with self._lock:
+            self._trees = {}
+            self._loaded = False
+
+    async def load(self, db: AsyncSession) -> None:
+        """
+        Populate the index from the leaderboard table.
+
+        Args:
+            db: Database session
+        """
+        result = await db.execute(
+            select(LeaderboardEntryDB.mode, LeaderboardEntryDB.score, func.count()).group_by(
+                LeaderboardEntryDB.mode, LeaderboardEntryDB.score
+            )
+        )
+
+        trees: dict[GameMode, FenwickTree] = {mode: FenwickTree() for mode in GameMode}
+        for mode, score, count in result.all():
+            trees[GameMode(mode)].add(score, count)
+
+        with self._lock:
+            self._trees = trees
+            self._loaded = True
+
+    def add(self, mode: GameMode, score: int) -> None:
+        """Record a new leaderboard entry."""
+        with self._lock:
+            tree = self._trees.setdefault(mode, FenwickTree())
+            tree.add(score)
+
+    def rank(self, mode: GameMode, score: int) -> int:
+        """
+        Get the rank a score would have in a mode.
+
+        Args:
+            mode: Game mode
+            score: Score to rank
+
+        Returns:
+            1 + the number of entries with a strictly higher score
+        """
+        with self._lock:
+            tree = self._trees.get(mode)
+            return (tree.count_above(score) if tree else 0) + 1
+
+
+# Global rank index instance
+rank_index = RankIndex()
@@ -0,0 +1,127 @@
+"""
+Refresh token database service.
+
+Refresh tokens let clients obtain new access tokens without sending their
+password again. Tokens are opaque, stored only as a keyed hash, and rotated
+on every use: refreshing revokes the presented token and issues a new one in
+the same family. Presenting a token that was already rotated means it leaked,
+so the whole family is revoked.
+"""
+
+import secrets
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.db import RefreshTokenDB
+from app.utils.security import generate_refresh_token, hash_refresh_token
+
+
+async def issue_refresh_token(db: AsyncSession, user_id: str, family_id: str | None = None) -> str:
+    """
+    Issue a new refresh token.
+
+    Args:
+        db: Database session
+        user_id: User ID
+        family_id: Family of the token being rotated, or None to start a new family
+
+    Returns:
+        The refresh token
+    """
+    token = generate_refresh_token()
+    db.add(
+        RefreshTokenDB(
+            token_hash=hash_refresh_token(token),
+            user_id=int(user_id),
+            family_id=family_id or secrets.token_hex(16),
+            expires_at=datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days),
+        )
+    )
+    await db.flush()
+    return token
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> tuple[str, str] | None:
+    """
+    Revoke a refresh token and issue its replacement.
+
+    The presented token is consumed with a single UPDATE on its primary key,
+    so checking and revoking it costs one indexed statement.
+
+    Args:
+        db: Database session
+        token: Refresh token presented by the client
+
+    Returns:
+        Tuple of (user_id, new refresh token), or None if the token is unknown,
+        expired or revoked
+    """
+    token_hash = hash_refresh_token(token)
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(RefreshTokenDB)
+        .where(
+            RefreshTokenDB.token_hash == token_hash,
+            RefreshTokenDB.revoked_at.is_(None),
+            RefreshTokenDB.expires_at > now,
+        )
+        .values(revoked_at=now)
+        .returning(RefreshTokenDB.user_id, RefreshTokenDB.family_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        await _revoke_reused_family(db, token_hash)
+        return None
+
+    user_id, family_id = str(row.user_id), row.family_id
+    return user_id, await issue_refresh_token(db, user_id, family_id)
+
+
+async def revoke_refresh_token(db: AsyncSession, token: str, user_id: str) -> bool:
+    """
+    Revoke a refresh token and every token rotated from the same login.
+
+    Args:
+        db: Database session
+        token: Refresh token
+        user_id: ID of the user the token must belong to
+
+    Returns:
+        True if the token was found
+    """
+    family_id = await db.scalar(
+        select(RefreshTokenDB.family_id).where(
+            RefreshTokenDB.token_hash == hash_refresh_token(token),
+            RefreshTokenDB.user_id == int(user_id),
+        )
+    )
+    if family_id is None:
+        return False
+    await _revoke_family(db, family_id)
+    return True
+
+
+async def _revoke_reused_family(db: AsyncSession, token_hash: str) -> None:
+    """Revoke a token's family if the token was already rotated."""
+    family_id = await db.scalar(
+        select(RefreshTokenDB.family_id).where(
+            RefreshTokenDB.token_hash == token_hash, RefreshTokenDB.revoked_at.is_not(None)
+        )
+    )
+    if family_id is None:
+        return
+    await _revoke_family(db, family_id)
+    # Commit now: the caller answers 401, which rolls back the request's session
+    await db.commit()
+
+
+async def _revoke_family(db: AsyncSession, family_id: str) -> None:
+    """Revoke the live tokens of a family."""
+    await db.execute(
+        update(RefreshTokenDB)
+        .where(RefreshTokenDB.family_id == family_id, RefreshTokenDB.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
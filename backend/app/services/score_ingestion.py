@@ -0,0 +1,225 @@
+"""
+Micro-batched write-behind ingestion for score submissions.
+
+When enabled, ``submit_score`` hands each submission to an asyncio queue
+instead of writing it in its own transaction. A background worker drains the
+queue every few milliseconds, keeps only the highest score per user and mode,
+writes the batch with a fixed number of multi-row statements in a single
+transaction, and resolves each caller's future with its result.
+
+Once ``stop`` has begun, new submissions are refused with
+``IngestorStoppedError`` and callers write them directly; everything already
+queued is still written before ``stop`` returns.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.models.schemas import GameMode
+from app.services.db_session import AsyncSessionLocal
+from app.services.leaderboard_store import LeaderboardStore, leaderboard_store
+
+
+class IngestorStoppedError(Exception):
+    """Raised when a score is submitted while the ingestor is not running."""
+
+
+@dataclass
+class _Submission:
+    """A queued score waiting for its batch to be written."""
+
+    username: str
+    score: int
+    mode: GameMode
+    future: asyncio.Future = field(repr=False)
+
+
+class ScoreIngestor:
+    """Queue plus background worker that writes submissions in batches."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        store: LeaderboardStore = leaderboard_store,
+        max_batch_size: int = 500,
+        max_latency: float = 0.005,
+        max_queue_size: int = 10_000,
+    ):
+        self._session_factory = session_factory
+        self._store = store
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.max_queue_size = max_queue_size
+        self._queue: asyncio.Queue[_Submission | None] | None = None
+        self._worker: asyncio.Task | None = None
+        self._stopping = False
+
+        # Metrics
+        self.submissions = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the background worker is accepting submissions."""
+        return self._worker is not None and not self._worker.done() and not self._stopping
+
+    def start(self) -> None:
+        """Start the background worker on the running event loop."""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._stopping = False
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Refuse new submissions, flush the queued ones and stop the worker."""
+        if not self.is_running:
+            return
+        self._stopping = True
+        await self._queue.put(None)
+        await self._worker
+
+        # The worker stops at the sentinel; write what is still queued behind it,
+        # including callers that were waiting for queue space when stop began
+        while True:
+            await asyncio.sleep(0)
+            batch = []
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    batch.append(item)
+            if not batch:
+                break
+            await self._flush(batch)
+        self._worker = None
+
+    async def submit(self, username: str, score: int, mode: GameMode) -> dict:
+        """
+        Queue a score and wait for the batch containing it to be written.
+
+        Waits for queue space when the queue is full, which pushes back on
+        callers instead of letting the backlog grow without bound.
+
+        Args:
+            username: Player username
+            score: Score achieved
+            mode: Game mode
+
+        Returns:
+            Result dict in the shape returned by ``add_leaderboard_entry``
+
+        Raises:
+            IngestorStoppedError: If the ingestor is not running or is stopping
+        """
+        if not self.is_running:
+            raise IngestorStoppedError("Score ingestion is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Submission(username, score, mode, future))
+        self.submissions += 1
+        return await future
+
+    def metrics(self) -> dict:
+        """Get queue depth, batch and flush-time metrics."""
+        return {
+            "running": self.is_running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "submissions": self.submissions,
+            "batches": self.batches,
+            "coalesced": self.coalesced,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.batches, 3) if self.batches else 0.0,
+        }
+
+    async def _run(self) -> None:
+        """Collect batches until a stop sentinel arrives."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[_Submission]) -> None:
+        """Write one batch and resolve its callers' futures."""
+        started = time.perf_counter()
+
+        # Keep the first submission with the highest score per user and mode
+        winners: dict[tuple[str, GameMode], _Submission] = {}
+        for item in batch:
+            key = (item.username, item.mode)
+            if key not in winners or item.score > winners[key].score:
+                winners[key] = item
+
+        try:
+            async with self._session_factory() as session:
+                results = await self._store.add_coalesced_entries(
+                    session, [(item.username, item.score, item.mode) for item in winners.values()]
+                )
+                await session.commit()
+
+                for item in batch:
+                    if item.future.done():
+                        continue
+                    key = (item.username, item.mode)
+                    result = results[key]
+                    if winners[key] is not item:
+                        # Beaten by a higher score from the same user in this batch
+                        result = {
+                            "rank": await self._store.get_rank(session, item.score, item.mode),
+                            "is_new_best": False,
+                            "previous_best": (
+                                winners[key].score
+                                if result["is_new_best"]
+                                else result["previous_best"]
+                            ),
+                        }
+                    item.future.set_result(result)
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.batches += 1
+        self.coalesced += len(batch) - len(winners)
+        self.last_batch_size = len(batch)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+
+
+# Global ingestor, started at app startup when score ingestion is enabled
+score_ingestor = ScoreIngestor(
+    AsyncSessionLocal,
+    max_batch_size=settings.score_ingestion_max_batch_size,
+    max_latency=settings.score_ingestion_max_latency_ms / 1000,
+    max_queue_size=settings.score_ingestion_max_queue_size,
+)
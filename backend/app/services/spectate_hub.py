@@ -0,0 +1,337 @@
+"""
+Publish/subscribe hub for live spectating.
+
+Each watched player has a channel holding the last state sent to its
+spectators and a sequence number. Publishing a new state only records it as
+the channel's pending state; once per tick the hub broadcasts every channel
+that changed. A broadcast encodes the update once, as a delta against the
+last state sent (or as a keyframe every ``keyframe_interval`` updates, or
+when no delta applies), and hands the same immutable frame to every
+subscriber: a ``str`` for JSON text frames, or a read-only ``memoryview``
+over one ``bytes`` buffer for the binary encoding of ``app.utils.game_codec``.
+See ``app.utils.game_delta`` for the message format.
+
+Serialization therefore costs one encoding per changed player, tick and
+format, however many spectators watch, and a player publishing faster than
+the tick is coalesced into one update. Keyframes are cached per sequence
+number, so spectators joining or resyncing at the same time share one too.
+States that do not fit the binary encoding are sent to binary subscribers
+as JSON text frames.
+
+Each spectator connection gets its own bounded queue. Publishing never
+blocks: if a subscriber's queue is full, that subscriber is a slow consumer
+and is dropped instead of letting its backlog grow, so one stalled connection
+cannot hold on to unbounded memory or slow down the others.
+"""
+
+import asyncio
+import json
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any
+
+from app.config import settings
+from app.models.schemas import ActivePlayer
+from app.utils.game_codec import encode_delta, encode_keyframe
+from app.utils.game_delta import delta_message, keyframe_message
+
+# An encoded stream message shared by all its subscribers: JSON text, or a
+# read-only view of a binary message
+Frame = str | memoryview
+
+
+def _encode(message: dict) -> str:
+    """Serialize a stream message."""
+    return json.dumps(message, separators=(",", ":"))
+
+
+class Subscription:
+    """A spectator's queue of frames for one player."""
+
+    def __init__(self, player_id: str, max_queue_size: int, binary: bool = False):
+        self.player_id = player_id
+        self.binary = binary
+        self.dropped = False
+        self.loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[Frame | None] = asyncio.Queue(maxsize=max_queue_size)
+
+    async def get(self) -> Frame | None:
+        """
+        Wait for the next frame.
+
+        Returns:
+            The next message (a memoryview for binary subscriptions, unless the
+            state did not fit the binary encoding), or None once the player has
+            left or the subscription was dropped (see ``dropped``)
+        """
+        return await self._queue.get()
+
+    def offer(self, frame: Frame | None) -> bool:
+        """
+        Queue a frame without waiting; must run on the subscriber's loop.
+
+        Returns:
+            False if the queue was full and the subscription was dropped
+        """
+        if self.dropped:
+            return False
+        try:
+            self._queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            self._drop()
+            return False
+
+    def _drop(self) -> None:
+        """Discard the backlog and wake the consumer so it can disconnect."""
+        self.dropped = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+
+class _Channel:
+    """Stream state of one watched player."""
+
+    def __init__(self, player: ActivePlayer, stats: Counter[str]):
+        self.player = player
+        self.pending: ActivePlayer | None = None
+        self.left = False
+        self.seq = 0
+        self.since_keyframe = 0
+        self.subscribers: set[Subscription] = set()
+        self._stats = stats
+
+        # Latest message as a delta (None for a keyframe), and its frames per format
+        self._delta: dict[str, Any] | None = None
+        self._frames: dict[bool, Frame] = {}
+        self._keyframes: dict[bool, Frame] = {}
+
+    def keyframe(self, binary: bool = False) -> Frame:
+        """Get the current state as a keyframe, encoded at most once per format."""
+        if binary not in self._keyframes:
+            self._keyframes[binary] = self._encode(None, binary)
+        return self._keyframes[binary]
+
+    def frame(self, binary: bool = False) -> Frame:
+        """Get the latest message, encoded at most once per format."""
+        if self._delta is None:
+            return self.keyframe(binary)
+        if binary not in self._frames:
+            self._frames[binary] = self._encode(self._delta, binary)
+        return self._frames[binary]
+
+    def advance(self, keyframe_interval: int) -> bool:
+        """
+        Move to the pending state.
+
+        Returns:
+            Whether the update has to be sent as a keyframe
+        """
+        previous, player = self.player, self.pending
+        self.player, self.pending = player, None
+        self.seq += 1
+        self.since_keyframe += 1
+        self._frames.clear()
+        self._keyframes.clear()
+
+        self._delta = None
+        if self.since_keyframe < keyframe_interval:
+            self._delta = delta_message(previous, player, self.seq)
+        if self._delta is None:
+            self.since_keyframe = 0
+        return self._delta is None
+
+    def _encode(self, delta: dict[str, Any] | None, binary: bool) -> Frame:
+        """Encode a delta, or a keyframe if None, falling back to JSON for unfit states."""
+        self._stats["encoded"] += 1
+        if binary:
+            try:
+                if delta is None:
+                    return memoryview(encode_keyframe(self.player, self.seq))
+                return memoryview(encode_delta(delta))
+            except ValueError:
+                pass
+        return _encode(keyframe_message(self.player, self.seq) if delta is None else delta)
+
+
+class SpectateHub:
+    """Registry of spectator subscriptions per player, broadcast once per tick."""
+
+    def __init__(
+        self, max_queue_size: int = 32, keyframe_interval: int = 100, tick_interval: float = 0.05
+    ):
+        self.max_queue_size = max_queue_size
+        self.keyframe_interval = keyframe_interval
+        self.tick_interval = tick_interval
+        self._lock = Lock()
+        self._channels: dict[str, _Channel] = {}
+        # Channels with a pending update or departure, by player
+        self._dirty: dict[str, _Channel] = {}
+        # Flush task per event loop with subscribers (a single loop in production)
+        self._tickers: dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+        self._loop_subscribers: Counter[asyncio.AbstractEventLoop] = Counter()
+
+        # Metrics
+        self.published = 0
+        self.broadcasts = 0
+        self.keyframes = 0
+        self.dropped = 0
+        self._stats: Counter[str] = Counter()  # Frames encoded, updated by the channels
+
+    @contextmanager
+    def subscribe(
+        self, player_id: str, load: Callable[[str], ActivePlayer | None], binary: bool = False
+    ) -> Iterator[Subscription | None]:
+        """
+        Subscribe to a player's updates for the duration of a ``with`` block.
+
+        The subscription starts with a keyframe of the player's current state.
+        Must be entered on a running event loop, which flushes the hub every
+        tick while it has subscribers.
+
+        Args:
+            player_id: Player to follow
+            load: Function returning a player's current state, used when
+                nobody is watching the player yet
+            binary: Whether to receive the binary encoding instead of JSON
+
+        Yields:
+            The subscription, or None if the player is not active
+        """
+        subscription = Subscription(player_id, self.max_queue_size, binary)
+        with self._lock:
+            channel = self._channels.get(player_id)
+            if channel is None:
+                player = load(player_id)
+                if player is not None:
+                    channel = self._channels[player_id] = _Channel(player, self._stats)
+            if channel is not None:
+                channel.subscribers.add(subscription)
+                subscription.offer(channel.keyframe(binary))
+                self._start_ticker(subscription.loop)
+        if channel is None:
+            yield None
+            return
+
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                channel.subscribers.discard(subscription)
+                if not channel.subscribers:
+                    if self._channels.get(player_id) is channel:
+                        del self._channels[player_id]
+                    if self._dirty.get(player_id) is channel:
+                        del self._dirty[player_id]
+                self._stop_ticker(subscription.loop)
+
+    def publish(self, player_id: str, player: ActivePlayer | None) -> None:
+        """
+        Record a player's new state, or None when the player leaves, for the next tick.
+
+        Nothing is encoded here, and only the latest state per tick is sent.
+        Safe to call from any thread.
+        """
+        with self._lock:
+            channel = self._channels.get(player_id)
+            if channel is None:
+                return
+            self.published += 1
+            if player is None:
+                del self._channels[player_id]
+                channel.left = True
+            else:
+                channel.pending = player
+            self._dirty[player_id] = channel
+
+    def flush(self) -> int:
+        """
+        Broadcast every pending update and departure to its subscribers.
+
+        Called every tick while anyone is subscribed. Safe to call from any
+        thread, e.g. to send updates without waiting for the next tick; frames
+        are handed to each subscriber on its own event loop.
+
+        Returns:
+            The number of players whose update or departure was broadcast
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            for channel in dirty.values():
+                if channel.pending is not None:
+                    self.keyframes += channel.advance(self.keyframe_interval)
+                    self.broadcasts += 1
+                    self._deliver(
+                        (subscription, channel.frame(subscription.binary))
+                        for subscription in channel.subscribers
+                    )
+                if channel.left:
+                    self._deliver((subscription, None) for subscription in channel.subscribers)
+            return len(dirty)
+
+    def resync(self, subscription: Subscription) -> None:
+        """Send a subscriber a keyframe of the current state, e.g. after it missed a frame."""
+        with self._lock:
+            channel = self._channels.get(subscription.player_id)
+            if channel is not None and subscription in channel.subscribers:
+                self._deliver([(subscription, channel.keyframe(subscription.binary))])
+
+    def _deliver(self, deliveries: Iterable[tuple[Subscription, Frame | None]]) -> None:
+        """Hand frames to subscribers in order; the caller holds the lock."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for subscription, frame in deliveries:
+            if subscription.loop is running:
+                self._offer(subscription, frame)
+            else:
+                subscription.loop.call_soon_threadsafe(self._offer, subscription, frame)
+
+    def _offer(self, subscription: Subscription, frame: Frame | None) -> None:
+        """Queue a frame for one subscriber, counting slow consumers that get dropped."""
+        if not subscription.dropped and not subscription.offer(frame):
+            self.dropped += 1
+
+    def _start_ticker(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Count a subscriber on a loop and make sure the loop ticks; the caller holds the lock."""
+        self._loop_subscribers[loop] += 1
+        if loop not in self._tickers:
+            self._tickers[loop] = loop.create_task(self._tick())
+
+    def _stop_ticker(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Uncount a subscriber, stopping its loop's ticks after the last; the caller holds the lock."""
+        self._loop_subscribers[loop] -= 1
+        if self._loop_subscribers[loop] <= 0:
+            del self._loop_subscribers[loop]
+            self._tickers.pop(loop).cancel()
+
+    async def _tick(self) -> None:
+        """Flush pending updates once per tick."""
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.flush()
+
+    def metrics(self) -> dict:
+        """Get subscriber, frame and drop counts."""
+        with self._lock:
+            return {
+                "players": len(self._channels),
+                "subscribers": sum(len(channel.subscribers) for channel in self._channels.values()),
+                "published": self.published,
+                "broadcasts": self.broadcasts,
+                "keyframes": self.keyframes,
+                "encoded": self._stats["encoded"],
+                "dropped": self.dropped,
+            }
+
+
+# Global hub instance
+spectate_hub = SpectateHub(
+    max_queue_size=settings.spectate_ws_queue_size,
+    keyframe_interval=settings.spectate_keyframe_interval,
+    tick_interval=settings.spectate_tick_seconds,
+)
@@ -0,0 +1,140 @@
+"""
+In-memory denylist of revoked access tokens.
+
+Access tokens carry a ``jti`` claim. Logging out records the token's jti
+until the token would have expired anyway, both in the ``revoked_tokens``
+table and, once that commits, in memory, where checking a request is a
+single dict lookup.
+
+The denylist is process-local: each worker loads it at startup and reloads
+it every ``TOKEN_DENYLIST_RELOAD_INTERVAL_SECONDS``, so a logout handled by
+one worker takes up to that long to reach the others.
+"""
+
+import asyncio
+import heapq
+import time
+from datetime import UTC, datetime
+from threading import Lock
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.db import RevokedTokenDB
+from app.services.db_session import run_after_commit
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    """Convert a POSIX timestamp to the naive UTC datetimes stored in the database."""
+    return datetime.fromtimestamp(timestamp, UTC).replace(tzinfo=None)
+
+
+class TokenDenylist:
+    """
+    Thread-safe set of revoked token IDs.
+
+    Each jti maps to its token's expiry. A heap ordered by expiry lets
+    revocations drop entries whose tokens have expired, so the set only holds
+    tokens that could still be presented.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._expiry: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def reset(self) -> None:
+        """Forget every revoked token."""
+        with self._lock:
+            self._expiry = {}
+            self._heap = []
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check whether a token ID has been revoked and its token has not expired."""
+        expires_at = self._expiry.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def add(self, jti: str, expires_at: float) -> None:
+        """Record a revoked token ID in memory only."""
+        with self._lock:
+            self._prune(time.time())
+            if jti not in self._expiry:
+                self._expiry[jti] = expires_at
+                heapq.heappush(self._heap, (expires_at, jti))
+
+    def _prune(self, now: float) -> None:
+        """Drop entries whose tokens have expired; the caller holds the lock."""
+        while self._heap and self._heap[0][0] <= now:
+            _, jti = heapq.heappop(self._heap)
+            self._expiry.pop(jti, None)
+
+    async def load(self, db: AsyncSession) -> None:
+        """
+        Add the unexpired revocations in the database to the denylist.
+
+        Entries already in memory are kept, so revocations committed while
+        loading are not lost. Expired rows are deleted; the caller commits
+        the session.
+
+        Args:
+            db: Database session
+        """
+        now = time.time()
+        await db.execute(
+            delete(RevokedTokenDB).where(RevokedTokenDB.expires_at <= _to_datetime(now))
+        )
+        result = await db.execute(select(RevokedTokenDB.jti, RevokedTokenDB.expires_at))
+
+        loaded = {
+            jti: expires_at.replace(tzinfo=UTC).timestamp() for jti, expires_at in result.all()
+        }
+
+        with self._lock:
+            expiry = {jti: t for jti, t in self._expiry.items() if t > now} | loaded
+            heap = [(expires_at, jti) for jti, expires_at in expiry.items()]
+            heapq.heapify(heap)
+            self._expiry = expiry
+            self._heap = heap
+
+    async def reload_periodically(
+        self, session_factory: async_sessionmaker, interval: float
+    ) -> None:
+        """
+        Periodically load revocations made by other workers. Runs until cancelled.
+
+        Args:
+            session_factory: Factory for database sessions
+            interval: Seconds between reloads
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as session:
+                    await self.load(session)
+                    await session.commit()
+            except Exception as e:
+                print(f"⚠️  Token denylist reload failed: {e}")
+
+    async def revoke(self, db: AsyncSession, jti: str, expires_at: float) -> None:
+        """
+        Revoke a token until it expires.
+
+        The token is rejected by this process once the session commits.
+
+        Args:
+            db: Database session
+            jti: Token ID
+            expires_at: Token expiry as a POSIX timestamp
+        """
+        if self.is_revoked(jti):
+            return
+        db.add(RevokedTokenDB(jti=jti, expires_at=_to_datetime(expires_at)))
+        await db.flush()
+        run_after_commit(db, lambda: self.add(jti, expires_at))
+
+
+# Global denylist instance
+token_denylist = TokenDenylist()
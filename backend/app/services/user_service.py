@@ -2,19 +2,180 @@
 User database service.
 
 This module provides database operations for users.
+
+User rows are cached in two tiers: a memo on the database session, so a
+request that resolves the same user several times only loads it once, and a
+process-wide TTL/LRU cache shared by all requests. Both hold immutable
+``UserRecord`` snapshots and are invalidated when a user is updated.
 """
 
-from sqlalchemy import select
+import re
+from dataclasses import dataclass
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.db import UserDB
-from app.models.schemas import User
+from app.models.schemas import Principal, User
+from app.services.db_session import run_after_commit
+from app.utils.cache import TTLCache
+
+# Latest user versions seen by this process; tokens with an older version are stale.
+# An entry only matters while tokens issued before it was seen can still be valid
+_known_versions = TTLCache(settings.user_cache_size, settings.access_token_expire_minutes * 60)
+
+
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    """Immutable snapshot of a user row."""
+
+    id: str
+    username: str
+    email: str
+    password_hash: str
+    version: int
+
+    def to_user(self) -> User:
+        """Build the public user model."""
+        return User(id=self.id, username=self.username, email=self.email)
+
+    def to_principal(self) -> Principal:
+        """Build the identity claims carried in access tokens."""
+        return Principal(user_id=self.id, username=self.username, version=self.version)
+
+
+# Process-wide cache of user records, keyed by ("id", user_id) and ("email", email)
+_user_cache = TTLCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
+
+# Session.info key of the per-session memo
+_MEMO_KEY = "user_records"
+
+# Column named by a unique violation on users: SQLite reports "users.<column>",
+# Postgres the unique index "ix_users_<column>" ahead of the offending key values
+_UNIQUE_VIOLATION = re.compile(
+    r'UNIQUE constraint failed: users\.(\w+)|unique constraint "ix_users_(\w+)"'
+)
+
+
+def _note_version(user_id: str, version: int) -> None:
+    """Record a user version read from or written to the database."""
+    known = _known_versions.get(user_id)
+    if known is None or version > known:
+        _known_versions.set(user_id, version)
+
+
+def get_known_user_version(user_id: str) -> int | None:
+    """
+    Get the latest version of a user seen by this process.
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        The version, or None if this process has not loaded the user
+    """
+    return _known_versions.get(user_id)
+
+
+def get_cache_stats() -> dict:
+    """Get the size and hit counters of the process-wide user cache."""
+    return _user_cache.stats()
+
+
+def clear_cache() -> None:
+    """Drop every cached user record and known version."""
+    _user_cache.clear()
+    _known_versions.clear()
+
+
+def _memo(db: AsyncSession) -> dict:
+    """Get the user record memo of a session."""
+    return db.info.setdefault(_MEMO_KEY, {})
+
+
+def _remember(db: AsyncSession, record: UserRecord, shared: bool = True) -> None:
+    """Store a record in the session memo and, if ``shared``, the process cache."""
+    memo = _memo(db)
+    for key in (("id", record.id), ("email", record.email)):
+        memo[key] = record
+        if shared:
+            _user_cache.set(key, record)
+
+
+def _forget(db: AsyncSession, record: UserRecord) -> None:
+    """
+    Invalidate a record in both cache tiers.
+
+    The process cache is invalidated again after commit, so a concurrent
+    request cannot leave the pre-update row cached.
+    """
+    keys = (("id", record.id), ("email", record.email))
+
+    def invalidate() -> None:
+        for key in keys:
+            _user_cache.pop(key)
+
+    memo = _memo(db)
+    for key in keys:
+        memo.pop(key, None)
+    invalidate()
+    run_after_commit(db, invalidate)
+
+
+async def _get_record(db: AsyncSession, key: tuple[str, str], where) -> UserRecord | None:
+    """Get a user record from the session memo, the process cache or the database."""
+    memo = _memo(db)
+    record = memo.get(key)
+    if record is not None:
+        return record
+
+    record = _user_cache.get(key)
+    if record is not None:
+        _remember(db, record, shared=False)
+        return record
+
+    result = await db.execute(select(UserDB).where(where))
+    db_user = result.scalar_one_or_none()
+    if not db_user:
+        return None
+
+    record = UserRecord(
+        id=str(db_user.id),
+        username=db_user.username,
+        email=db_user.email,
+        password_hash=db_user.password_hash,
+        version=db_user.version,
+    )
+    _note_version(record.id, record.version)
+    _remember(db, record)
+    return record
+
+
+async def _get_record_by_id(db: AsyncSession, user_id: str) -> UserRecord | None:
+    """Get a user record by ID."""
+    try:
+        user_id_int = int(user_id)
+    except ValueError:
+        return None
+    return await _get_record(db, ("id", str(user_id_int)), UserDB.id == user_id_int)
+
+
+async def _get_record_by_email(db: AsyncSession, email: str) -> UserRecord | None:
+    """Get a user record by email."""
+    return await _get_record(db, ("email", email), UserDB.email == email)
 
 
 async def create_user(db: AsyncSession, email: str, username: str, password_hash: str) -> User:
     """
     Create a new user.
 
+    Inserts the row with a single INSERT ... RETURNING and relies on the
+    unique constraints to detect taken emails and usernames, so concurrent
+    signups cannot both succeed. The INSERT runs in a savepoint, so a conflict
+    only rolls back the INSERT and leaves the caller's other pending work intact.
+
     Args:
         db: Database session
         email: User email
@@ -25,20 +186,49 @@ async def create_user(db: AsyncSession, email: str, username: str, password_hash
         User: Created user
 
     Raises:
-        ValueError: If email already exists
+        ValueError: If the email or username is already registered
     """
-    # Check if email exists
-    result = await db.execute(select(UserDB).where(UserDB.email == email))
-    if result.scalar_one_or_none():
-        raise ValueError("Email already registered")
+    try:
+        async with db.begin_nested():
+            result = await db.execute(
+                insert(UserDB)
+                .values(email=email, username=username, password_hash=password_hash)
+                .returning(UserDB.id, UserDB.version)
+            )
+            user_id, version = result.one()
+    except IntegrityError as e:
+        column = _violated_unique_column(e)
+        if column == "email":
+            raise ValueError("Email already registered") from None
+        if column == "username":
+            raise ValueError("Username already taken") from None
+        raise
+
+    record = UserRecord(
+        id=str(user_id),
+        username=username,
+        email=email,
+        password_hash=password_hash,
+        version=version,
+    )
+    _note_version(record.id, record.version)
 
-    # Create user
-    db_user = UserDB(email=email, username=username, password_hash=password_hash)
-    db.add(db_user)
-    await db.flush()
-    await db.refresh(db_user)
+    # Only memoized until the transaction commits; other requests load it from the database
+    _remember(db, record, shared=False)
+    return record.to_user()
 
-    return User(id=str(db_user.id), username=db_user.username, email=db_user.email)
+
+def _violated_unique_column(error: IntegrityError) -> str | None:
+    """
+    Get the users column whose unique constraint an INSERT violated.
+
+    Only the constraint itself is matched, never the key values echoed in the
+    error details, so e.g. a username containing "email" is reported correctly.
+    """
+    match = _UNIQUE_VIOLATION.search(str(error.orig))
+    if match is None:
+        return None
+    return match.group(1) or match.group(2)
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> tuple[User, str] | None:
@@ -52,14 +242,10 @@ async def get_user_by_email(db: AsyncSession, email: str) -> tuple[User, str] |
     Returns:
         Tuple of (User, password_hash) or None if not found
     """
-    result = await db.execute(select(UserDB).where(UserDB.email == email))
-    db_user = result.scalar_one_or_none()
-
-    if not db_user:
+    record = await _get_record_by_email(db, email)
+    if not record:
         return None
-
-    user = User(id=str(db_user.id), username=db_user.username, email=db_user.email)
-    return user, db_user.password_hash
+    return record.to_user(), record.password_hash
 
 
 async def get_user_by_id(db: AsyncSession, user_id: str) -> User | None:
@@ -73,15 +259,65 @@ async def get_user_by_id(db: AsyncSession, user_id: str) -> User | None:
     Returns:
         User or None if not found
     """
-    try:
-        user_id_int = int(user_id)
-    except ValueError:
-        return None
+    record = await _get_record_by_id(db, user_id)
+    return record.to_user() if record else None
 
-    result = await db.execute(select(UserDB).where(UserDB.id == user_id_int))
-    db_user = result.scalar_one_or_none()
 
-    if not db_user:
-        return None
+async def update_password_hash(
+    db: AsyncSession, user_id: str, new_hash: str, old_hash: str
+) -> bool:
+    """
+    Replace a user's password hash if it has not changed in the meantime.
 
-    return User(id=str(db_user.id), username=db_user.username, email=db_user.email)
+    Args:
+        db: Database session
+        user_id: User ID
+        new_hash: Hash to store
+        old_hash: Hash the caller read; the update is skipped if it no longer matches
+
+    Returns:
+        True if the hash was replaced
+    """
+    record = await _get_record_by_id(db, user_id)
+    if not record:
+        return False
+
+    result = await db.execute(
+        update(UserDB)
+        .where(UserDB.id == int(user_id), UserDB.password_hash == old_hash)
+        .values(password_hash=new_hash)
+    )
+    _forget(db, record)
+    return result.rowcount > 0
+
+
+async def get_principal(db: AsyncSession, user_id: str) -> Principal | None:
+    """
+    Get the identity claims of a user by ID.
+
+    Args:
+        db: Database session
+        user_id: User ID
+
+    Returns:
+        Principal or None if not found
+    """
+    record = await _get_record_by_id(db, user_id)
+    return record.to_principal() if record else None
+
+
+async def get_credentials_by_email(db: AsyncSession, email: str) -> tuple[Principal, str] | None:
+    """
+    Get a user's identity claims and password hash by email.
+
+    Args:
+        db: Database session
+        email: User email
+
+    Returns:
+        Tuple of (Principal, password_hash) or None if not found
+    """
+    record = await _get_record_by_email(db, email)
+    if not record:
+        return None
+    return record.to_principal(), record.password_hash
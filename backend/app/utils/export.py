@@ -0,0 +1,58 @@
+"""
+Streaming encoders for bulk exports.
+
+Each encoder consumes an async iterator of row chunks and yields one
+``bytes`` block per chunk, so a ``StreamingResponse`` can send rows as soon
+as they are read from the database.
+"""
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Sequence
+from datetime import date
+
+
+def _json_default(value: object) -> str:
+    """Encode dates as ISO 8601 strings."""
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+async def ndjson_chunks(
+    columns: Sequence[str], chunks: AsyncIterator[Sequence[Sequence]]
+) -> AsyncIterator[bytes]:
+    """Encode row chunks as newline-delimited JSON objects keyed by ``columns``."""
+    async for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(columns, row, strict=True)), default=_json_default) + "\n"
+            for row in rows
+        ).encode()
+
+
+async def csv_chunks(
+    columns: Sequence[str], chunks: AsyncIterator[Sequence[Sequence]]
+) -> AsyncIterator[bytes]:
+    """Encode row chunks as CSV, starting with a header row of ``columns``."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Compress a byte stream into a single gzip member as it is produced."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
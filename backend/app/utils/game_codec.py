@@ -0,0 +1,317 @@
+"""
+Compact binary encoding of spectated game states.
+
+An alternative to JSON for spectate responses and streams. The game grid is
+20x20, so every coordinate fits in one byte and a snake segment takes two
+bytes instead of a ``{"x":..,"y":..}`` object. All integers are big-endian.
+
+Player (``encode_player``)::
+
+    u8 id length, id (UTF-8), u8 username length, username (UTF-8),
+    u32 score, u8 mode, game state
+
+Game state::
+
+    u8 flags (bits 0-1 direction, bit 2 isGameOver, bit 3 isPaused, bit 4 mode),
+    u32 score, u16 speed, u8 food x, u8 food y,
+    u16 snake length, then one (u8 x, u8 y) pair per segment, head first
+
+Player list (``encode_players``)::
+
+    u16 count, then each player
+
+Stream messages (``encode_keyframe`` / ``encode_delta``) start with u8 type
+(0 keyframe, 1 delta) and u32 seq. A keyframe continues with a player. A
+delta continues with a u8 mask of the fields present, then those fields in
+mask bit order: head (u8 count + pairs), drop (u16), food (u8 x, u8 y),
+direction (u8), score (u32), isGameOver (u8), isPaused (u8), speed (u16).
+"""
+
+import struct
+from itertools import chain
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from app.models.schemas import ActivePlayer, Direction, GameMode, GameState, Position
+
+# Media type for Accept negotiation on HTTP, and WebSocket subprotocol
+BINARY_MEDIA_TYPE = "application/vnd.snake-arena.state"
+BINARY_SUBPROTOCOL = "snake-arena.binary.v1"
+
+_DIRECTIONS = list(Direction)
+_MODES = list(GameMode)
+
+_STATE_HEADER = struct.Struct("!BIHBBH")  # flags, score, speed, food x, food y, snake length
+_PLAYER_SCORE_MODE = struct.Struct("!IB")
+_MESSAGE_HEADER = struct.Struct("!BI")  # type, seq
+_U8 = struct.Struct("!B")
+_U16 = struct.Struct("!H")
+_U32 = struct.Struct("!I")
+
+_KEYFRAME, _DELTA = 0, 1
+
+_players_adapter = TypeAdapter(list[ActivePlayer])
+
+# Delta fields in mask bit order, with their encodings
+_DELTA_FIELDS = (
+    "head",
+    "drop",
+    "food",
+    "direction",
+    "score",
+    "isGameOver",
+    "isPaused",
+    "speed",
+)
+
+
+def accepts_binary(accept: str | None) -> bool:
+    """Check whether an Accept header asks for the binary encoding."""
+    if not accept:
+        return False
+    for media_range in accept.split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        if media_type.lower() != BINARY_MEDIA_TYPE:
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _pack_positions(positions: list[Position]) -> bytes:
+    return bytes(chain.from_iterable((position.x, position.y) for position in positions))
+
+
+def _unpack_positions(data: bytes | memoryview, offset: int, count: int) -> list[dict[str, int]]:
+    end = offset + 2 * count
+    if end > len(data):
+        raise ValueError("Truncated snake")
+    coordinates = iter(data[offset:end])
+    return [{"x": x, "y": y} for x, y in zip(coordinates, coordinates, strict=True)]
+
+
+def _pack_str(value: str) -> bytes:
+    encoded = value.encode()
+    return _U8.pack(len(encoded)) + encoded
+
+
+def _unpack_str(data: bytes | memoryview, offset: int) -> tuple[str, int]:
+    (length,) = _U8.unpack_from(data, offset)
+    offset += 1
+    if offset + length > len(data):
+        raise ValueError("Truncated string")
+    return bytes(data[offset : offset + length]).decode(), offset + length
+
+
+def _pack_state(state: GameState) -> bytes:
+    flags = (
+        _DIRECTIONS.index(state.direction)
+        | state.isGameOver << 2
+        | state.isPaused << 3
+        | _MODES.index(state.mode) << 4
+    )
+    header = _STATE_HEADER.pack(
+        flags, state.score, state.speed, state.food.x, state.food.y, len(state.snake)
+    )
+    return header + _pack_positions(state.snake)
+
+
+def _unpack_state(data: bytes | memoryview, offset: int) -> tuple[dict[str, Any], int]:
+    flags, score, speed, food_x, food_y, length = _STATE_HEADER.unpack_from(data, offset)
+    offset += _STATE_HEADER.size
+    state = {
+        "snake": _unpack_positions(data, offset, length),
+        "food": {"x": food_x, "y": food_y},
+        "direction": _DIRECTIONS[flags & 0b11].value,
+        "score": score,
+        "isGameOver": bool(flags & 0b100),
+        "isPaused": bool(flags & 0b1000),
+        "mode": _MODES[flags >> 4 & 1].value,
+        "speed": speed,
+    }
+    return state, offset + 2 * length
+
+
+def _pack_player(player: ActivePlayer) -> bytes:
+    return b"".join(
+        (
+            _pack_str(player.id),
+            _pack_str(player.username),
+            _PLAYER_SCORE_MODE.pack(player.score, _MODES.index(player.mode)),
+            _pack_state(player.gameState),
+        )
+    )
+
+
+def _unpack_player(data: bytes | memoryview, offset: int) -> tuple[dict[str, Any], int]:
+    """Decode a player into its JSON form; validating it once is cheaper than building models."""
+    player_id, offset = _unpack_str(data, offset)
+    username, offset = _unpack_str(data, offset)
+    score, mode = _PLAYER_SCORE_MODE.unpack_from(data, offset)
+    state, offset = _unpack_state(data, offset + _PLAYER_SCORE_MODE.size)
+    player = {
+        "id": player_id,
+        "username": username,
+        "score": score,
+        "mode": _MODES[mode].value,
+        "gameState": state,
+    }
+    return player, offset
+
+
+def encode_player(player: ActivePlayer) -> bytes:
+    """
+    Encode a player and its game state.
+
+    Raises:
+        ValueError: If a value does not fit its field (e.g. a coordinate above 255)
+    """
+    try:
+        return _pack_player(player)
+    except struct.error as e:
+        raise ValueError(str(e)) from e
+
+
+def decode_player(data: bytes | memoryview) -> ActivePlayer:
+    """
+    Decode a player encoded with ``encode_player``.
+
+    Raises:
+        ValueError: If the data is malformed
+    """
+    try:
+        player, _ = _unpack_player(data, 0)
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed player: {e}") from e
+    return ActivePlayer.model_validate(player)
+
+
+def encode_players(players: list[ActivePlayer]) -> bytes:
+    """
+    Encode a list of players.
+
+    Raises:
+        ValueError: If a value does not fit its field
+    """
+    try:
+        return _U16.pack(len(players)) + b"".join(map(_pack_player, players))
+    except struct.error as e:
+        raise ValueError(str(e)) from e
+
+
+def decode_players(data: bytes | memoryview) -> list[ActivePlayer]:
+    """
+    Decode a list of players encoded with ``encode_players``.
+
+    Raises:
+        ValueError: If the data is malformed
+    """
+    try:
+        (count,) = _U16.unpack_from(data, 0)
+        offset = _U16.size
+        players = []
+        for _ in range(count):
+            player, offset = _unpack_player(data, offset)
+            players.append(player)
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed player list: {e}") from e
+    return _players_adapter.validate_python(players)
+
+
+def encode_keyframe(player: ActivePlayer, seq: int) -> bytes:
+    """
+    Encode a keyframe stream message.
+
+    Raises:
+        ValueError: If a value does not fit its field
+    """
+    try:
+        return _MESSAGE_HEADER.pack(_KEYFRAME, seq) + _pack_player(player)
+    except struct.error as e:
+        raise ValueError(str(e)) from e
+
+
+def encode_delta(message: dict[str, Any]) -> bytes:
+    """
+    Encode a delta stream message built by ``app.utils.game_delta.delta_message``.
+
+    Raises:
+        ValueError: If a value does not fit its field
+    """
+    mask = 0
+    parts = []
+    try:
+        for bit, field in enumerate(_DELTA_FIELDS):
+            if field not in message:
+                continue
+            mask |= 1 << bit
+            value = message[field]
+            if field == "head":
+                parts.append(_U8.pack(len(value)))
+                parts.append(bytes(chain.from_iterable((p["x"], p["y"]) for p in value)))
+            elif field == "food":
+                parts.append(bytes((value["x"], value["y"])))
+            elif field == "direction":
+                parts.append(_U8.pack(_DIRECTIONS.index(Direction(value))))
+            elif field in ("drop", "speed"):
+                parts.append(_U16.pack(value))
+            elif field == "score":
+                parts.append(_U32.pack(value))
+            else:
+                parts.append(_U8.pack(bool(value)))
+        return _MESSAGE_HEADER.pack(_DELTA, message["seq"]) + _U8.pack(mask) + b"".join(parts)
+    except struct.error as e:
+        raise ValueError(str(e)) from e
+
+
+def decode_message(data: bytes | memoryview) -> dict[str, Any]:
+    """
+    Decode a stream message into the same structure as its JSON form.
+
+    Raises:
+        ValueError: If the data is malformed
+    """
+    try:
+        kind, seq = _MESSAGE_HEADER.unpack_from(data, 0)
+        offset = _MESSAGE_HEADER.size
+        if kind == _KEYFRAME:
+            player, _ = _unpack_player(data, offset)
+            return {"type": "keyframe", "seq": seq, "player": player}
+        if kind != _DELTA:
+            raise ValueError(f"Unknown message type {kind}")
+
+        message: dict[str, Any] = {"type": "delta", "seq": seq}
+        (mask,) = _U8.unpack_from(data, offset)
+        offset += 1
+        for bit, field in enumerate(_DELTA_FIELDS):
+            if not mask & 1 << bit:
+                continue
+            if field == "head":
+                (count,) = _U8.unpack_from(data, offset)
+                message[field] = _unpack_positions(data, offset + 1, count)
+                offset += 1 + 2 * count
+            elif field == "food":
+                message[field] = {"x": data[offset], "y": data[offset + 1]}
+                offset += 2
+            elif field == "direction":
+                message[field] = _DIRECTIONS[data[offset]].value
+                offset += 1
+            elif field in ("drop", "speed"):
+                (message[field],) = _U16.unpack_from(data, offset)
+                offset += 2
+            elif field == "score":
+                (message[field],) = _U32.unpack_from(data, offset)
+                offset += 4
+            else:
+                message[field] = bool(data[offset])
+                offset += 1
+        return message
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed message: {e}") from e
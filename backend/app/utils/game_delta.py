@@ -0,0 +1,89 @@
+"""
+Delta encoding of game states for spectator streams.
+
+A snake step only adds a head segment and usually drops the tail, so instead
+of resending the whole snake every update, a delta carries the new head
+segments, how many tail segments were dropped, and whichever other game
+state fields changed. Keyframes carry the full player and let a spectator
+(re)start from a known state.
+
+Messages are numbered with a per-player sequence. A delta applies to the
+state of the message with the previous sequence number; a spectator that
+sees a gap asks for a keyframe instead of applying it.
+"""
+
+from typing import Any
+
+from app.models.schemas import ActivePlayer, Position
+
+# New head segments a delta may carry before a keyframe is cheaper
+MAX_DELTA_HEAD = 8
+
+# Game state fields sent in a delta when they change
+_DELTA_FIELDS = ("direction", "score", "isGameOver", "isPaused", "speed")
+
+
+def keyframe_message(player: ActivePlayer, seq: int) -> dict[str, Any]:
+    """Build a keyframe carrying a player's full state."""
+    return {"type": "keyframe", "seq": seq, "player": player.model_dump(by_alias=True, mode="json")}
+
+
+def delta_message(previous: ActivePlayer, current: ActivePlayer, seq: int) -> dict[str, Any] | None:
+    """
+    Build a delta turning ``previous`` into ``current``.
+
+    Returns:
+        The delta, or None if the change cannot be expressed as one (a new
+        game, a different player or mode, or a snake that did not just move)
+        and a keyframe has to be sent instead
+    """
+    before, after = previous.gameState, current.gameState
+    if (
+        previous.username != current.username
+        or previous.mode != current.mode
+        or before.mode != after.mode
+        or current.score != after.score
+    ):
+        return None
+
+    old, new = before.snake, after.snake
+    for added in range(min(len(new), MAX_DELTA_HEAD) + 1):
+        kept = len(new) - added
+        if kept <= len(old) and new[added:] == old[:kept]:
+            break
+    else:
+        return None
+
+    message: dict[str, Any] = {"type": "delta", "seq": seq}
+    if added:
+        message["head"] = [position.model_dump() for position in new[:added]]
+    if len(old) > kept:
+        message["drop"] = len(old) - kept
+    if after.food != before.food:
+        message["food"] = after.food.model_dump()
+    for field in _DELTA_FIELDS:
+        value = getattr(after, field)
+        if value != getattr(before, field):
+            message[field] = value
+    return message
+
+
+def apply_delta(player: ActivePlayer, message: dict[str, Any]) -> ActivePlayer:
+    """
+    Apply a delta to the state it was built from.
+
+    This is the reference for clients; the server only encodes.
+    """
+    state = player.gameState
+    snake = state.snake[: len(state.snake) - message.get("drop", 0)]
+    snake = [Position(**position) for position in message.get("head", [])] + snake
+
+    updates: dict[str, Any] = {"snake": snake}
+    if "food" in message:
+        updates["food"] = Position(**message["food"])
+    for field in _DELTA_FIELDS:
+        if field in message:
+            updates[field] = message[field]
+
+    game_state = state.model_copy(update=updates)
+    return player.model_copy(update={"score": game_state.score, "gameState": game_state})
@@ -0,0 +1,64 @@
+"""
+HTTP conditional request helpers (ETag / If-None-Match).
+"""
+
+import hashlib
+
+from fastapi import Response, status
+
+# Clients may reuse a stored response only after revalidating it with us
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Build a strong ETag from a representation's content or version parts."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\x00")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+
+    Uses the weak comparison RFC 9110 requires for If-None-Match, so a
+    ``W/`` prefix on the client's tag is ignored.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def _cache_headers(etag: str, vary: str | None) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def not_modified(etag: str, vary: str | None = None) -> Response:
+    """Build a 304 Not Modified response for an ETag."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag, vary))
+
+
+def json_response(body: bytes, etag: str, vary: str | None = None) -> Response:
+    """Build a JSON response carrying an ETag."""
+    return encoded_response(body, etag, "application/json", vary)
+
+
+def encoded_response(body: bytes, etag: str, media_type: str, vary: str | None = None) -> Response:
+    """
+    Build a response of any media type carrying an ETag.
+
+    Args:
+        body: Encoded representation
+        etag: ETag of the representation
+        media_type: Content type of the body
+        vary: Request headers the representation was selected by, e.g. "Accept"
+    """
+    return Response(content=body, media_type=media_type, headers=_cache_headers(etag, vary))
@@ -2,7 +2,16 @@
 Security utilities for JWT token handling and password hashing.
 """
 
+import asyncio
+import hashlib
+import hmac
+import secrets
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
+from threading import Lock
+from typing import TypeVar
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -10,14 +19,25 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.config import settings
-from app.models.schemas import TokenData
+from app.models.schemas import Principal, TokenData
+from app.services.token_denylist import token_denylist
+from app.utils.cache import TTLCache
 
 # Password hashing
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.argon2_time_cost,
+    argon2__memory_cost=settings.argon2_memory_cost,
+    argon2__parallelism=settings.argon2_parallelism,
+)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.api_v1_prefix}/auth/login")
 
+# Verified token claims keyed by token digest; each entry expires with its token
+token_cache = TTLCache(settings.token_cache_size, ttl=settings.access_token_expire_minutes * 60)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -29,6 +49,109 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check whether a hash was made with a different cost profile than the current one."""
+    return pwd_context.needs_update(hashed_password)
+
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+class PasswordHasherPool:
+    """
+    Bounded thread pool for argon2 hashing and verification.
+
+    Each argon2 call takes tens of milliseconds of CPU. Running it on the
+    event loop would stall every other request on the worker, so calls are
+    handed to a dedicated thread pool (argon2 releases the GIL while it
+    hashes). At most ``max_pending`` calls may be running or queued at once;
+    further calls fail fast with ``PasswordHasherBusyError`` instead of
+    growing an unbounded backlog. With ``workers=0`` calls run inline.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+            if workers > 0
+            else None
+        )
+        self._lock = Lock()
+        self._pending = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        """Calls currently running or waiting for a worker."""
+        return self._pending
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """
+        Run a hashing call on the pool.
+
+        Raises:
+            PasswordHasherBusyError: If ``max_pending`` calls are already in flight
+        """
+        if self._executor is None:
+            return fn(*args)
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusyError("Too many concurrent authentication requests")
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def metrics(self) -> dict:
+        """Get pool size, queue depth and rejection count."""
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads once queued calls finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+# Global pool used by the async password helpers
+password_hasher = PasswordHasherPool(
+    workers=settings.password_hash_workers, max_pending=settings.password_hash_max_pending
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its hash on the password hashing pool.
+
+    Raises:
+        PasswordHasherBusyError: If the pool is saturated
+    """
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password on the password hashing pool.
+
+    Raises:
+        PasswordHasherBusyError: If the pool is saturated
+    """
+    return await password_hasher.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -38,12 +161,24 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
         expire = datetime.now(UTC) + timedelta(minutes=settings.access_token_expire_minutes)
 
     to_encode.update({"exp": expire})
+    # Token ID, so a token can be revoked before it expires
+    to_encode.setdefault("jti", secrets.token_urlsafe(12))
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 
 def decode_access_token(token: str) -> TokenData:
-    """Decode and validate a JWT access token."""
+    """
+    Decode and validate a JWT access token.
+
+    Verified tokens are cached by digest until their ``exp``, so a client
+    presenting the same token repeatedly pays for signature verification once.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=32).digest()
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        return token_data
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -54,14 +189,66 @@ def decode_access_token(token: str) -> TokenData:
         user_id: str | None = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-        return TokenData(user_id=user_id)
+        token_data = TokenData(
+            user_id=user_id,
+            username=payload.get("username"),
+            version=payload.get("ver"),
+            jti=payload.get("jti"),
+            expires_at=payload.get("exp"),
+        )
     except JWTError:
         raise credentials_exception
 
+    if "exp" in payload:
+        ttl = payload["exp"] - time.time()
+        if ttl > 0:
+            token_cache.set(key, token_data, ttl=ttl)
+    return token_data
+
+
+def create_user_token(principal: Principal, expires_delta: timedelta | None = None) -> str:
+    """Create an access token carrying a user's ID, username and version."""
+    return create_access_token(
+        data={"sub": principal.user_id, "username": principal.username, "ver": principal.version},
+        expires_delta=expires_delta,
+    )
+
 
-async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> str:
-    """Get the current user ID from the JWT token."""
+def generate_refresh_token() -> str:
+    """Generate an opaque refresh token."""
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Hash a refresh token for storage and lookup.
+
+    Refresh tokens are random 256-bit values, so a keyed HMAC-SHA256 is enough
+    to keep a leaked table from being replayed; a slow password hash would only
+    add latency to every refresh.
+    """
+    return hmac.new(settings.secret_key.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+
+async def get_current_token(token: str = Depends(oauth2_scheme)) -> TokenData:
+    """
+    Get the verified claims of the request's JWT token.
+
+    Raises:
+        HTTPException: 401 if the token is invalid, expired or revoked
+    """
     token_data = decode_access_token(token)
+    if token_data.jti is not None and token_denylist.is_revoked(token_data.jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token_data
+
+
+async def get_current_user_id(token_data: TokenData = Depends(get_current_token)) -> str:
+    """Get the current user ID from the JWT token; revoked tokens are rejected upstream."""
     if token_data.user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,177 @@
+"""
+Ordered set of comparable keys with positional lookups.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from itertools import chain, islice
+from typing import Any
+
+
+class SortedSet:
+    """
+    Sorted set split into bounded buckets.
+
+    Keys live in a list of sorted buckets of at most ``2 * load`` keys, with a
+    parallel list of each bucket's largest key. Inserts and removals bisect to
+    a bucket and only shift keys within it, so they stay cheap as the set
+    grows.
+
+    A Fenwick tree over the bucket sizes gives the number of keys before any
+    bucket, so ranks and offsets cost O(log(N / load)) plus a bisect within
+    one bucket. It is updated in place as keys come and go, and rebuilt in
+    O(N / load) on the next lookup after a bucket is split or dropped, which
+    happens at most once every ``load`` inserts.
+    """
+
+    def __init__(self, keys: list | None = None, load: int = 512):
+        self._load = load
+        self._buckets: list[list] = []
+        self._maxes: list = []
+        self._len = 0
+        # Fenwick tree of bucket sizes (1-based), or None until the next lookup
+        self._index: list[int] | None = None
+        if keys:
+            ordered = sorted(set(keys))
+            self._buckets = [ordered[i : i + load] for i in range(0, len(ordered), load)]
+            self._maxes = [bucket[-1] for bucket in self._buckets]
+            self._len = len(ordered)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, key: Any) -> bool:
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        return j < len(bucket) and bucket[j] == key
+
+    def __iter__(self) -> Iterator:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def add(self, key: Any) -> None:
+        """Insert a key; adding a key that is already present does nothing."""
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._index = None
+            return
+
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+            self._buckets[i].append(key)
+            self._maxes[i] = key
+        else:
+            bucket = self._buckets[i]
+            j = bisect_left(bucket, key)
+            if j < len(bucket) and bucket[j] == key:
+                return
+            bucket.insert(j, key)
+        self._len += 1
+        self._update_index(i, 1)
+
+        bucket = self._buckets[i]
+        if len(bucket) > 2 * self._load:
+            # Split an oversized bucket in two
+            self._buckets.insert(i + 1, bucket[self._load :])
+            del bucket[self._load :]
+            self._maxes[i] = bucket[-1]
+            self._maxes.insert(i + 1, self._buckets[i + 1][-1])
+            self._index = None
+
+    def discard(self, key: Any) -> bool:
+        """
+        Remove a key if present.
+
+        Returns:
+            True if the key was removed
+        """
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        bucket = self._buckets[i]
+        j = bisect_left(bucket, key)
+        if j == len(bucket) or bucket[j] != key:
+            return False
+
+        del bucket[j]
+        self._len -= 1
+        if not bucket:
+            del self._buckets[i]
+            del self._maxes[i]
+            self._index = None
+        else:
+            self._maxes[i] = bucket[-1]
+            self._update_index(i, -1)
+        return True
+
+    def _build_index(self) -> list[int]:
+        """Build the Fenwick tree of bucket sizes in linear time."""
+        index = [0, *map(len, self._buckets)]
+        for i in range(1, len(index)):
+            parent = i + (i & -i)
+            if parent < len(index):
+                index[parent] += index[i]
+        self._index = index
+        return index
+
+    def _update_index(self, i: int, delta: int) -> None:
+        """Adjust the size of bucket ``i`` in the Fenwick tree, if it is built."""
+        index = self._index
+        if index is None:
+            return
+        i += 1
+        while i < len(index):
+            index[i] += delta
+            i += i & -i
+
+    def _count_before(self, i: int) -> int:
+        """Count the keys in the buckets before bucket ``i``."""
+        index = self._index if self._index is not None else self._build_index()
+        total = 0
+        while i > 0:
+            total += index[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position: int) -> tuple[int, int]:
+        """Find the bucket holding the key at ``position`` and its offset within it."""
+        index = self._index if self._index is not None else self._build_index()
+        i = 0
+        step = 1 << (len(index) - 1).bit_length()
+        while step:
+            j = i + step
+            if j < len(index) and index[j] <= position:
+                position -= index[j]
+                i = j
+            step >>= 1
+        return i, position
+
+    def count_below(self, key: Any) -> int:
+        """Count keys strictly less than ``key``."""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        return self._count_before(i) + bisect_left(self._buckets[i], key)
+
+    def count_at_most(self, key: Any) -> int:
+        """Count keys less than or equal to ``key``."""
+        i = bisect_right(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        return self._count_before(i) + bisect_right(self._buckets[i], key)
+
+    def slice(self, start: int, stop: int) -> list:
+        """Get the keys at positions ``start`` (inclusive) to ``stop`` (exclusive)."""
+        start = max(start, 0)
+        if start >= min(stop, self._len):
+            return []
+
+        i, offset = self._locate(start)
+        buckets = (self._buckets[j] for j in range(i, len(self._buckets)))
+        return list(islice(chain.from_iterable(buckets), offset, offset + stop - start))
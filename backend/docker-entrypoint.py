@@ -27,8 +27,9 @@ async def seed_database():
     """Seed database with demo data if empty."""
     from datetime import date
 
-    from app.models.db import LeaderboardEntryDB, UserDB
+    from app.models.db import LeaderboardEntryDB, UserBestScoreDB, UserDB, WindowBestScoreDB
     from app.services.db_session import AsyncSessionLocal
+    from app.services.leaderboard_service import PERIOD_WINDOWS, get_period_start
     from app.utils.security import get_password_hash
     from sqlalchemy import select
 
@@ -72,6 +73,25 @@ async def seed_database():
                 )
                 session.add(entry)
 
+            # Each demo player has a single entry per mode, so it is also their best
+            for username, score, mode, entry_date in demo_entries:
+                session.add(UserBestScoreDB(username=username, mode=mode, score=score))
+
+                # Entries played in the current day or week also count for that window
+                for window in PERIOD_WINDOWS:
+                    period_start = get_period_start(window)
+                    if entry_date >= period_start:
+                        session.add(
+                            WindowBestScoreDB(
+                                period=window.value,
+                                period_start=period_start,
+                                mode=mode,
+                                username=username,
+                                score=score,
+                                date=entry_date,
+                            )
+                        )
+
             await session.commit()
             print("✅ Database seeded successfully!")
             print(f"\n🔑 Demo Credentials:")
@@ -0,0 +1,44 @@
+"""Add user_best_scores table
+
+Revision ID: 4b7e2c91a0d3
+Revises: dfdfe7865376
+Create Date: 2026-10-17 09:12:44.318201
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c91a0d3'
+down_revision: Union[str, Sequence[str], None] = 'dfdfe7865376'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_best_scores',
+    sa.Column('username', sa.String(length=20), nullable=False),
+    sa.Column('mode', sa.String(length=20), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('username', 'mode')
+    )
+
+    # Backfill from the leaderboard history
+    op.execute(
+        """
+        INSERT INTO user_best_scores (username, mode, score, updated_at)
+        SELECT username, mode, MAX(score), MAX(created_at)
+        FROM leaderboard
+        GROUP BY username, mode
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_best_scores')
@@ -0,0 +1,45 @@
+"""Composite leaderboard indexes
+
+Revision ID: 9c31d5e8f2a7
+Revises: 4b7e2c91a0d3
+Create Date: 2026-10-17 11:40:02.771935
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c31d5e8f2a7'
+down_revision: Union[str, Sequence[str], None] = '4b7e2c91a0d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The single-column indexes are prefixes of the composite ones below
+    op.drop_index(op.f('ix_leaderboard_username'), table_name='leaderboard')
+    op.drop_index(op.f('ix_leaderboard_score'), table_name='leaderboard')
+    op.drop_index(op.f('ix_leaderboard_mode'), table_name='leaderboard')
+    op.create_index(
+        'ix_leaderboard_mode_score_id', 'leaderboard', ['mode', sa.text('score DESC'), 'id'], unique=False
+    )
+    op.create_index(
+        'ix_leaderboard_score_id', 'leaderboard', [sa.text('score DESC'), 'id'], unique=False
+    )
+    op.create_index(
+        'ix_leaderboard_username_mode_score', 'leaderboard', ['username', 'mode', sa.text('score DESC')], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leaderboard_username_mode_score', table_name='leaderboard')
+    op.drop_index('ix_leaderboard_score_id', table_name='leaderboard')
+    op.drop_index('ix_leaderboard_mode_score_id', table_name='leaderboard')
+    op.create_index(op.f('ix_leaderboard_mode'), 'leaderboard', ['mode'], unique=False)
+    op.create_index(op.f('ix_leaderboard_score'), 'leaderboard', ['score'], unique=False)
+    op.create_index(op.f('ix_leaderboard_username'), 'leaderboard', ['username'], unique=False)
@@ -0,0 +1,32 @@
+"""Add users.version
+
+Revision ID: a7d4f0b2c8e6
+Revises: e5a8b3c6d9f1
+Create Date: 2026-10-17 16:42:08.913204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d4f0b2c8e6'
+down_revision: Union[str, Sequence[str], None] = 'e5a8b3c6d9f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(
+            sa.Column('version', sa.Integer(), server_default='1', nullable=False)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('version')
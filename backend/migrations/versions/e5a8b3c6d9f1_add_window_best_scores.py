@@ -0,0 +1,70 @@
+"""Add window_best_scores table
+
+Revision ID: e5a8b3c6d9f1
+Revises: 9c31d5e8f2a7
+Create Date: 2026-10-17 14:03:27.502816
+
+"""
+from datetime import date, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8b3c6d9f1'
+down_revision: Union[str, Sequence[str], None] = '9c31d5e8f2a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('window_best_scores',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('mode', sa.String(length=20), nullable=False),
+    sa.Column('username', sa.String(length=20), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('period', 'period_start', 'mode', 'username', name='uq_window_best_scores')
+    )
+    op.create_index(
+        'ix_window_best_scores_mode_score_id', 'window_best_scores',
+        ['period', 'period_start', 'mode', sa.text('score DESC'), 'id'], unique=False
+    )
+    op.create_index(
+        'ix_window_best_scores_score_id', 'window_best_scores',
+        ['period', 'period_start', sa.text('score DESC'), 'id'], unique=False
+    )
+
+    # Backfill the current day and week from the leaderboard history
+    today = date.today()
+    for period, period_start in (
+        ('day', today),
+        ('week', today - timedelta(days=today.weekday())),
+    ):
+        op.get_bind().execute(
+            sa.text(
+                """
+                INSERT INTO window_best_scores
+                    (period, period_start, mode, username, score, date, updated_at)
+                SELECT :period, :period_start, mode, username, MAX(score), MAX(date), MAX(created_at)
+                FROM leaderboard
+                WHERE date >= :period_start
+                GROUP BY mode, username
+                """
+            ),
+            {'period': period, 'period_start': period_start},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_window_best_scores_score_id', table_name='window_best_scores')
+    op.drop_index('ix_window_best_scores_mode_score_id', table_name='window_best_scores')
+    op.drop_table('window_best_scores')
@@ -0,0 +1,132 @@
+"""
+Latency benchmark for argon2 offloading.
+
+Runs a burst of concurrent logins alongside leaderboard reads against the
+app in-process, once with argon2 hashing inline on the event loop and once
+on the password hashing pool, and reports leaderboard read latency and login
+throughput for each.
+
+Usage:
+    uv run python scripts/benchmark_auth_offload.py
+    uv run python scripts/benchmark_auth_offload.py --logins 8 --readers 8 --seconds 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# Point the app at a scratch database before it creates its engine
+DB_PATH = os.path.join(tempfile.gettempdir(), "snake_arena_auth_bench.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+
+import httpx  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.db import Base, UserDB  # noqa: E402
+from app.services.db_session import AsyncSessionLocal, engine  # noqa: E402
+from app.utils import security  # noqa: E402
+
+EMAIL = "bench@snake.game"
+PASSWORD = "bench-password"
+
+
+async def setup_database() -> None:
+    """Create the schema and the benchmark user."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        session.add(
+            UserDB(
+                username="Bench",
+                email=EMAIL,
+                password_hash=security.get_password_hash(PASSWORD),
+            )
+        )
+        await session.commit()
+
+
+async def run_scenario(workers: int, logins: int, readers: int, seconds: float) -> dict:
+    """Run concurrent logins and leaderboard reads with the given pool size."""
+    security.password_hasher = security.PasswordHasherPool(
+        workers=workers, max_pending=settings.password_hash_max_pending
+    )
+    read_latencies: list[float] = []
+    login_count = 0
+    busy_count = 0
+    deadline = time.perf_counter() + seconds
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def login_loop():
+            nonlocal login_count, busy_count
+            while time.perf_counter() < deadline:
+                response = await client.post(
+                    f"{settings.api_v1_prefix}/auth/login",
+                    data={"username": EMAIL, "password": PASSWORD},
+                )
+                if response.status_code == 503:
+                    busy_count += 1
+                    await asyncio.sleep(0.01)
+                else:
+                    login_count += 1
+
+        async def reader_loop():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await client.get(f"{settings.api_v1_prefix}/leaderboard?limit=10")
+                read_latencies.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(
+            *(login_loop() for _ in range(logins)), *(reader_loop() for _ in range(readers))
+        )
+
+    security.password_hasher.shutdown()
+    quantiles = statistics.quantiles(read_latencies, n=100, method="inclusive")
+    return {
+        "reads": len(read_latencies),
+        "p50": quantiles[49],
+        "p99": quantiles[98],
+        "max": max(read_latencies),
+        "logins_per_s": login_count / seconds,
+        "busy": busy_count,
+    }
+
+
+async def main_async(args) -> None:
+    await setup_database()
+    print(
+        f"\n🔐 {args.logins} login loops + {args.readers} leaderboard readers, {args.seconds}s each"
+    )
+    print(
+        f"\n  {'argon2':<14} {'reads':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+        f"{'logins/s':>9} {'503s':>6}"
+    )
+    for label, workers in (("inline", 0), (f"pool ({args.workers})", args.workers)):
+        result = await run_scenario(workers, args.logins, args.readers, args.seconds)
+        print(
+            f"  {label:<14} {result['reads']:>7} {result['p50']:>8.2f} {result['p99']:>8.2f} "
+            f"{result['max']:>8.2f} {result['logins_per_s']:>9.1f} {result['busy']:>6}"
+        )
+    await engine.dispose()
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark argon2 offloading")
+    parser.add_argument("--logins", type=int, default=8, help="Concurrent login loops")
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent leaderboard readers")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each scenario")
+    parser.add_argument(
+        "--workers", type=int, default=settings.password_hash_workers, help="Pool size"
+    )
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Size and speed benchmark of the binary game state encoding against JSON.
+
+Builds players with snakes of several lengths and compares the payload size
+and the median encode/decode time of ``app.utils.game_codec`` with the
+Pydantic JSON path used by the spectate endpoints.
+
+Usage:
+    uv run python scripts/benchmark_game_codec.py
+    uv run python scripts/benchmark_game_codec.py --repeat 20000
+"""
+
+import argparse
+import statistics
+import time
+
+from app.models.schemas import ActivePlayer, Direction, GameMode, GameState, Position
+from app.utils.game_codec import decode_player, encode_player
+
+SNAKE_LENGTHS = (3, 20, 100, 400)
+
+
+def make_player(length: int) -> ActivePlayer:
+    """Build a player whose snake fills ``length`` cells of the 20x20 grid."""
+    snake = [Position(x=i % 20, y=i // 20) for i in reversed(range(length))]
+    return ActivePlayer(
+        id="ap1",
+        username="SnakeMaster",
+        score=length * 10,
+        mode=GameMode.WALLS,
+        gameState=GameState(
+            snake=snake,
+            food=Position(x=15, y=15),
+            direction=Direction.RIGHT,
+            score=length * 10,
+            mode=GameMode.WALLS,
+            speed=150,
+        ),
+    )
+
+
+def time_call(call, repeat: int) -> float:
+    """Return the median latency of ``call`` in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(samples)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Compare binary and JSON game state encoding")
+    parser.add_argument("--repeat", type=int, default=5000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    print(
+        f"\n  {'snake':>5} {'json B':>8} {'binary B':>9} {'ratio':>6}"
+        f" {'json enc µs':>12} {'bin enc µs':>11} {'json dec µs':>12} {'bin dec µs':>11}"
+    )
+    for length in SNAKE_LENGTHS:
+        player = make_player(length)
+        as_json = player.model_dump_json(by_alias=True).encode()
+        as_binary = encode_player(player)
+        assert decode_player(as_binary) == player
+
+        json_encode = time_call(
+            lambda player=player: player.model_dump_json(by_alias=True), args.repeat
+        )
+        binary_encode = time_call(lambda player=player: encode_player(player), args.repeat)
+        json_decode = time_call(
+            lambda data=as_json: ActivePlayer.model_validate_json(data), args.repeat
+        )
+        binary_decode = time_call(lambda data=as_binary: decode_player(data), args.repeat)
+        print(
+            f"  {length:>5} {len(as_json):>8} {len(as_binary):>9}"
+            f" {len(as_json) / len(as_binary):>5.1f}x"
+            f" {json_encode:>12.2f} {binary_encode:>11.2f}"
+            f" {json_decode:>12.2f} {binary_decode:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Side-by-side benchmark of the SQL and in-memory leaderboard stores.
+
+Seeds a scratch SQLite database (the same data as the query plan benchmark),
+loads the in-memory store from it, and times the hot leaderboard operations
+against both stores.
+
+Usage:
+    uv run python scripts/benchmark_leaderboard_store.py
+    uv run python scripts/benchmark_leaderboard_store.py --rows 100000 --repeat 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmark_query_plans import MAX_SCORE, seed
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models.schemas import GameMode
+from app.services import leaderboard_service
+from app.services.leaderboard_store import MemoryLeaderboardStore, SQLLeaderboardStore
+
+
+def operations(rng: random.Random):
+    """Store calls to time, each taking (store, db)."""
+    deep_cursor = leaderboard_service.encode_cursor(MAX_SCORE // 2, 0)
+    return {
+        "top 50 (mode)": lambda store, db: store.get_leaderboard(db, GameMode.WALLS, limit=50),
+        "page 50 (deep cursor)": lambda store, db: store.get_leaderboard(
+            db, GameMode.WALLS, limit=50, cursor=deep_cursor
+        ),
+        "rank": lambda store, db: store.get_rank(db, rng.randrange(MAX_SCORE), GameMode.WALLS),
+        "user best score": lambda store, db: store.get_user_best_score(
+            db, "player42", GameMode.WALLS
+        ),
+        "around me (radius 10)": lambda store, db: store.get_around_user(
+            db, "player42", GameMode.WALLS, radius=10
+        ),
+    }
+
+
+async def time_call(call, repeat: int) -> float:
+    """Return the median latency of ``call`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def run(path: str, rows: int, repeat: int) -> None:
+    """Seed the database and time every operation against both stores."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", echo=False)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        print(f"\n📊 Seeding {rows:,} rows...")
+        await seed(engine, rows)
+
+        memory = MemoryLeaderboardStore()
+        async with session_factory() as db:
+            started = time.perf_counter()
+            await memory.load(db)
+        print(f"   in-memory store loaded in {time.perf_counter() - started:.1f}s")
+
+        stores = {"sql": SQLLeaderboardStore(), "memory": memory}
+        print(f"\n  {'operation':<24} {'sql (ms)':>10} {'memory (ms)':>12} {'speedup':>9}")
+        for name, op in operations(random.Random(42)).items():
+            medians = {}
+            for store_name, store in stores.items():
+                async with session_factory() as db:
+                    medians[store_name] = await time_call(
+                        lambda op=op, store=store, db=db: op(store, db), repeat
+                    )
+            speedup = medians["sql"] / medians["memory"] if medians["memory"] else float("inf")
+            print(
+                f"  {name:<24} {medians['sql']:>10.3f} {medians['memory']:>12.3f} {speedup:>8.1f}x"
+            )
+    finally:
+        await engine.dispose()
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Compare the SQL and in-memory stores")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to seed")
+    parser.add_argument("--repeat", type=int, default=100, help="Calls per operation")
+    parser.add_argument(
+        "--sqlite-path",
+        default=os.path.join(tempfile.gettempdir(), "snake_arena_store_bench.db"),
+        help="Scratch SQLite database file (overwritten)",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.sqlite_path, args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
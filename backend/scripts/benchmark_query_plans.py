@@ -0,0 +1,246 @@
+"""
+Query plan benchmark for the leaderboard service.
+
+Seeds a scratch database with a large leaderboard, runs each hot service
+query, and EXPLAINs the SQL it emitted. Exits non-zero if any plan falls
+back to a full table scan (or, on SQLite, to a temporary sort).
+
+Usage:
+    uv run python scripts/benchmark_query_plans.py
+    uv run python scripts/benchmark_query_plans.py --postgres-url postgresql://user:pw@localhost/bench
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.models.db import Base, LeaderboardEntryDB
+from app.models.schemas import GameMode, LeaderboardWindow
+from app.services import leaderboard_service
+
+CHUNK_SIZE = 50_000
+USERS = 100_000
+MAX_SCORE = 5_000
+
+
+async def seed(engine: AsyncEngine, rows: int) -> None:
+    """Create the schema and insert ``rows`` random leaderboard entries."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    rng = random.Random(42)
+    modes = [mode.value for mode in GameMode]
+    today = date.today()
+    now = datetime.utcnow()
+
+    for start in range(0, rows, CHUNK_SIZE):
+        batch = [
+            {
+                "username": f"player{rng.randrange(USERS)}",
+                "score": rng.randrange(MAX_SCORE),
+                "mode": rng.choice(modes),
+                "date": today - timedelta(days=rng.randrange(365)),
+                "created_at": now,
+            }
+            for _ in range(min(CHUNK_SIZE, rows - start))
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(LeaderboardEntryDB), batch)
+
+    # Give the user probed by the per-user queries a mid-table score in every mode
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(LeaderboardEntryDB),
+            [
+                {
+                    "username": "player42",
+                    "score": MAX_SCORE // 2,
+                    "mode": mode,
+                    "date": today,
+                    "created_at": now,
+                }
+                for mode in modes
+            ],
+        )
+
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO user_best_scores (username, mode, score, updated_at) "
+                "SELECT username, mode, MAX(score), MAX(created_at) FROM leaderboard "
+                "GROUP BY username, mode"
+            )
+        )
+        week_start = leaderboard_service.get_period_start(LeaderboardWindow.WEEK)
+        await conn.execute(
+            text(
+                "INSERT INTO window_best_scores "
+                "(period, period_start, mode, username, score, date, updated_at) "
+                "SELECT 'week', :week_start, mode, username, MAX(score), MAX(date), MAX(created_at) "
+                "FROM leaderboard WHERE date >= :week_start GROUP BY mode, username"
+            ),
+            {"week_start": week_start},
+        )
+        await conn.execute(text("ANALYZE"))
+
+
+def hot_queries():
+    """Service calls whose SQL must be served from an index."""
+    deep_cursor = leaderboard_service.encode_cursor(MAX_SCORE // 2, 0)
+    return {
+        "leaderboard (all modes)": lambda db: leaderboard_service.get_leaderboard(db, limit=50),
+        "leaderboard (mode)": lambda db: leaderboard_service.get_leaderboard(
+            db, GameMode.WALLS, limit=50
+        ),
+        "leaderboard (mode, deep cursor)": lambda db: leaderboard_service.get_leaderboard(
+            db, GameMode.WALLS, limit=50, cursor=deep_cursor
+        ),
+        "leaderboard (mode, week)": lambda db: leaderboard_service.get_leaderboard(
+            db, GameMode.WALLS, limit=100, window=LeaderboardWindow.WEEK
+        ),
+        "user best score": lambda db: leaderboard_service.get_user_best_score(
+            db, "player42", GameMode.WALLS
+        ),
+        "around me": lambda db: leaderboard_service.get_around_user(
+            db, "player42", GameMode.WALLS, radius=10
+        ),
+        "rank (count of higher scores)": lambda db: leaderboard_service.get_rank(
+            db, MAX_SCORE - 50, GameMode.WALLS
+        ),
+    }
+
+
+def sqlite_problems(plan_rows) -> list[str]:
+    """
+    Return the plan steps that scan a whole table or sort in a temp b-tree.
+
+    A plain ``SCAN ... USING INDEX`` is allowed: it walks an index in ORDER BY
+    order and stops at the LIMIT. Table scans and covering-index scans read
+    every row.
+    """
+    problems = []
+    for row in plan_rows:
+        detail = row[-1]
+        full_scan = detail.startswith("SCAN ") and " USING INDEX " not in detail
+        if full_scan or "TEMP B-TREE" in detail:
+            problems.append(detail)
+    return problems
+
+
+def postgres_problems(plan_json) -> list[str]:
+    """Return the plan nodes that are sequential scans."""
+    plan = plan_json if isinstance(plan_json, list) else json.loads(plan_json)
+    problems = []
+    stack = [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if node["Node Type"] == "Seq Scan":
+            problems.append(f"Seq Scan on {node.get('Relation Name')}")
+        stack.extend(node.get("Plans", []))
+    return problems
+
+
+async def check_plans(engine: AsyncEngine) -> bool:
+    """EXPLAIN every statement emitted by the hot queries."""
+    dialect = engine.dialect.name
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    ok = True
+
+    for name, call in hot_queries().items():
+        captured: list[tuple[str, object]] = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany, sink=captured):
+            if statement.lstrip().upper().startswith("SELECT"):
+                sink.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            async with session_factory() as db:
+                started = time.perf_counter()
+                await call(db)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        problems = []
+        async with engine.connect() as conn:
+            for statement, parameters in captured:
+                if dialect == "postgresql":
+                    result = await conn.exec_driver_sql(
+                        f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                    )
+                    problems += postgres_problems(result.scalar_one())
+                else:
+                    result = await conn.exec_driver_sql(
+                        f"EXPLAIN QUERY PLAN {statement}", parameters
+                    )
+                    problems += sqlite_problems(result.all())
+
+        status = "✅" if not problems else "❌"
+        print(f"  {status} {name:<34} {elapsed_ms:8.2f} ms")
+        for problem in problems:
+            print(f"       {problem}")
+        ok = ok and not problems
+
+    return ok
+
+
+async def run(url: str, rows: int) -> bool:
+    """Seed one database and check its plans."""
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    engine = create_async_engine(url, echo=False)
+    try:
+        print(f"\n📊 {engine.dialect.name}: seeding {rows:,} rows...")
+        started = time.perf_counter()
+        await seed(engine, rows)
+        print(f"   seeded in {time.perf_counter() - started:.1f}s")
+        return await check_plans(engine)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Check leaderboard query plans")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to seed")
+    parser.add_argument(
+        "--sqlite-path",
+        default=os.path.join(tempfile.gettempdir(), "snake_arena_bench.db"),
+        help="Scratch SQLite database file (overwritten)",
+    )
+    parser.add_argument(
+        "--postgres-url",
+        default=os.getenv("BENCH_POSTGRES_URL"),
+        help="Scratch Postgres database URL (tables are dropped and recreated)",
+    )
+    args = parser.parse_args()
+
+    urls = [f"sqlite+aiosqlite:///{args.sqlite_path}"]
+    if args.postgres_url:
+        urls.append(args.postgres_url)
+    else:
+        print("⚠️  No --postgres-url given, checking SQLite only")
+
+    results = [asyncio.run(run(url, args.rows)) for url in urls]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
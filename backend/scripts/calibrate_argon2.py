@@ -0,0 +1,82 @@
+"""
+Measure argon2 hash time for candidate cost profiles on this host.
+
+Use the results to choose ARGON2_TIME_COST, ARGON2_MEMORY_COST and
+ARGON2_PARALLELISM for the CPU budget of the machine the API runs on.
+Changing them is safe: existing hashes are rehashed on each user's next login.
+
+Usage:
+    uv run python scripts/calibrate_argon2.py
+    uv run python scripts/calibrate_argon2.py --samples 10 --target-ms 100
+"""
+
+import argparse
+import statistics
+import time
+
+from passlib.context import CryptContext
+
+from app.config import settings
+
+# name -> (time_cost, memory_cost in KiB, parallelism)
+PROFILES = {
+    "owasp-min (19 MiB)": (2, 19456, 1),
+    "owasp-alt (46 MiB)": (1, 47104, 1),
+    "balanced (64 MiB)": (2, 65536, 2),
+    "strong (128 MiB)": (3, 131072, 4),
+}
+
+
+def measure(time_cost: int, memory_cost: int, parallelism: int, samples: int) -> float:
+    """Return the median time in milliseconds to hash a password with a profile."""
+    context = CryptContext(
+        schemes=["argon2"],
+        argon2__time_cost=time_cost,
+        argon2__memory_cost=memory_cost,
+        argon2__parallelism=parallelism,
+    )
+    context.hash("warm-up")
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash("calibration-password")
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Measure argon2 cost profiles")
+    parser.add_argument("--samples", type=int, default=5, help="Hashes per profile")
+    parser.add_argument(
+        "--target-ms", type=float, default=250.0, help="Highest acceptable hash time"
+    )
+    args = parser.parse_args()
+
+    profiles = {
+        "configured": (
+            settings.argon2_time_cost,
+            settings.argon2_memory_cost,
+            settings.argon2_parallelism,
+        ),
+        **PROFILES,
+    }
+
+    print(f"\n🔐 argon2id hash time ({args.samples} samples, target ≤ {args.target_ms:.0f} ms)\n")
+    print(f"  {'profile':<20} {'t':>3} {'m (KiB)':>9} {'p':>3} {'median ms':>10}")
+    for name, (time_cost, memory_cost, parallelism) in profiles.items():
+        elapsed = measure(time_cost, memory_cost, parallelism, args.samples)
+        status = "✅" if elapsed <= args.target_ms else "⚠️ "
+        print(
+            f"  {name:<20} {time_cost:>3} {memory_cost:>9} {parallelism:>3} "
+            f"{elapsed:>10.1f} {status}"
+        )
+
+    print(
+        "\nSet ARGON2_TIME_COST, ARGON2_MEMORY_COST and ARGON2_PARALLELISM to the "
+        "strongest profile within target."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ import asyncio
 from datetime import date
 
 from app.config import settings
-from app.models.db import Base, LeaderboardEntryDB, UserDB
+from app.models.db import Base, LeaderboardEntryDB, UserBestScoreDB, UserDB
 from app.services.db_session import engine
 from app.utils.security import get_password_hash
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
@@ -73,6 +73,10 @@ async def seed_database():
             )
             session.add(entry)
 
+        # Each demo player has a single entry per mode, so it is also their best
+        for username, score, mode, _ in demo_entries:
+            session.add(UserBestScoreDB(username=username, mode=mode, score=score))
+
         await session.commit()
 
     print("✅ Database seeded successfully!")
@@ -158,7 +158,7 @@ class APIVerifier:
             response = self.client.get(f"{self.api_url}/leaderboard")
             passed = response.status_code == 200
             if passed:
-                data = response.json()
+                data = response.json()["entries"]
                 passed = isinstance(data, list) and len(data) > 0
             self.print_test("Get Leaderboard", passed, f"Status: {response.status_code}")
             return passed
@@ -172,7 +172,7 @@ class APIVerifier:
             response = self.client.get(f"{self.api_url}/leaderboard?mode=walls")
             passed = response.status_code == 200
             if passed:
-                data = response.json()
+                data = response.json()["entries"]
                 passed = isinstance(data, list)
                 if passed and len(data) > 0:
                     passed = all(entry["mode"] == "walls" for entry in data)
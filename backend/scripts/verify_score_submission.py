@@ -41,7 +41,7 @@ async def test_score_submission():
         print("\n3. Fetching leaderboard...")
         leaderboard_response = await client.get(f"{base_url}/leaderboard?mode=walls")
         print(f"   Status: {leaderboard_response.status_code}")
-        leaderboard = leaderboard_response.json()
+        leaderboard = leaderboard_response.json()["entries"]
         print(f"   Top 3 scores:")
         for entry in leaderboard[:3]:
             print(f"     - {entry['username']}: {entry['score']}")
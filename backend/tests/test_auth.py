@@ -2,7 +2,21 @@
 Tests for authentication endpoints.
 """
 
-from fastapi import status
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.db import UserDB
+from app.models.schemas import Principal, TokenData
+from app.services import auth_service, user_service
+from app.utils import security
+from app.utils.security import PasswordHasherBusyError, PasswordHasherPool
 
 
 def test_login_success(client):
@@ -57,6 +71,18 @@ def test_signup_existing_email(client):
     assert "error" in data
 
 
+def test_signup_existing_username(client):
+    """Test signup with a username that is already taken."""
+    response = client.post(
+        "/api/v1/auth/signup",
+        json={"email": "other@test.com", "username": "DemoPlayer", "password": "password"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    data = response.json()
+    assert data["success"] is False
+    assert data["error"] == "Username already taken"
+
+
 def test_get_current_user_authenticated(client, auth_headers):
     """Test getting current user when authenticated."""
     response = client.get("/api/v1/auth/me", headers=auth_headers)
@@ -76,3 +102,235 @@ def test_logout(client, auth_headers):
     """Test logout endpoint."""
     response = client.post("/api/v1/auth/logout", headers=auth_headers)
     assert response.status_code == status.HTTP_204_NO_CONTENT
+
+
+def test_login_returns_503_when_hasher_saturated(client, monkeypatch):
+    """Test that logins fail fast while the password hashing pool is full."""
+    monkeypatch.setattr(security, "password_hasher", PasswordHasherPool(workers=1, max_pending=0))
+
+    response = client.post(
+        "/api/v1/auth/login", data={"username": "demo@snake.game", "password": "demo123"}
+    )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "1"
+
+    response = client.post(
+        "/api/v1/auth/signup",
+        json={"email": "busy@test.com", "username": "Busy", "password": "password123"},
+    )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_pool_keeps_event_loop_free():
+    """Test that pooled calls run off the event loop and respect the pending cap."""
+    pool = PasswordHasherPool(workers=1, max_pending=2)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    first = asyncio.create_task(pool.run(time.sleep, 0.1))
+    second = asyncio.create_task(pool.run(time.sleep, 0.1))
+    await asyncio.sleep(0)
+    with pytest.raises(PasswordHasherBusyError):
+        await pool.run(time.sleep, 0.1)
+
+    await asyncio.gather(first, second, ticker())
+    assert ticks == 5
+    assert pool.metrics()["pending"] == 0
+    assert pool.metrics()["rejected"] == 1
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password_hash(test_db, test_db_engine):
+    """Test that a hash with an old cost profile is replaced after login."""
+    old_context = CryptContext(
+        schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=1024, argon2__parallelism=1
+    )
+    old_hash = old_context.hash("oldcost123")
+    test_db.add(UserDB(username="OldCost", email="old@snake.game", password_hash=old_hash))
+    await test_db.commit()
+    assert security.password_needs_rehash(old_hash)
+
+    session_factory = async_sessionmaker(test_db_engine, class_=AsyncSession)
+    user = await auth_service.authenticate_user(
+        test_db, "old@snake.game", "oldcost123", session_factory=session_factory
+    )
+    assert user is not None
+    await asyncio.gather(*auth_service._rehash_tasks.values())
+
+    test_db.expire_all()
+    stored = await test_db.scalar(
+        select(UserDB.password_hash).where(UserDB.id == int(user.user_id))
+    )
+    assert stored != old_hash
+    assert not security.password_needs_rehash(stored)
+    assert security.verify_password("oldcost123", stored)
+
+
+def test_verified_tokens_are_cached(auth_token):
+    """Test that repeat verifications of a token are served from the cache."""
+    security.token_cache.clear()
+
+    first = security.decode_access_token(auth_token)
+    second = security.decode_access_token(auth_token)
+
+    assert second is first
+    assert security.token_cache.stats()["hits"] == 1
+    assert security.token_cache.stats()["misses"] == 1
+
+
+def test_expired_and_tampered_tokens_are_not_cached():
+    """Test that only valid, unexpired tokens are cached."""
+    security.token_cache.clear()
+    expired = security.create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(HTTPException):
+        security.decode_access_token(expired)
+
+    valid = security.create_access_token({"sub": "1"})
+    security.decode_access_token(valid)
+    with pytest.raises(HTTPException):
+        security.decode_access_token(valid[:-2] + ("AA" if valid[-2:] != "AA" else "BB"))
+    assert len(security.token_cache) == 1
+
+
+def test_login_token_carries_identity_claims(auth_token):
+    """Test that access tokens embed the username and user version."""
+    token_data = security.decode_access_token(auth_token)
+    assert token_data.username == "DemoPlayer"
+    assert token_data.version == 1
+
+
+@pytest.mark.asyncio
+async def test_principal_from_token_skips_database():
+    """Test that a token with current identity claims resolves without a lookup."""
+    token_data = TokenData(user_id="424242", username="Ghost", version=1)
+
+    # The user does not exist, so any database lookup would fail
+    principal = await auth_service.get_current_principal(token_data, db=None)
+    assert principal == Principal(user_id="424242", username="Ghost", version=1)
+
+
+@pytest.mark.asyncio
+async def test_principal_falls_back_to_database(test_db):
+    """Test that legacy and stale tokens are resolved from the database."""
+    legacy = TokenData(user_id="1")
+    principal = await auth_service.get_current_principal(legacy, db=test_db)
+    assert principal.username == "DemoPlayer"
+
+    user_service._note_version("1", 2)
+    stale = TokenData(user_id="1", username="OldName", version=1)
+    principal = await auth_service.get_current_principal(stale, db=test_db)
+    assert principal.username == "DemoPlayer"
+
+    with pytest.raises(HTTPException) as exc_info:
+        await auth_service.get_current_principal(TokenData(user_id="999"), db=test_db)
+    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_submit_score_with_legacy_token(client):
+    """Test that tokens issued before identity claims still work."""
+    token = security.create_access_token({"sub": "1"})
+    response = client.post(
+        "/api/v1/leaderboard/scores",
+        json={"score": 4321, "mode": "walls"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.json()["success"] is True
+
+    response = client.get("/api/v1/leaderboard?mode=walls&limit=1")
+    assert response.json()["entries"][0]["username"] == "DemoPlayer"
+
+
+def _login(client) -> dict:
+    response = client.post(
+        "/api/v1/auth/login", data={"username": "demo@snake.game", "password": "demo123"}
+    )
+    return response.json()
+
+
+def test_login_returns_refresh_token(client):
+    """Test that login issues a refresh token that is stored only as a hash."""
+    tokens = _login(client)
+    assert tokens["refresh_token"]
+    assert security.hash_refresh_token(tokens["refresh_token"]) != tokens["refresh_token"]
+
+
+def test_refresh_rotates_tokens_without_hashing(client, monkeypatch):
+    """Test that refreshing issues new tokens without touching argon2."""
+    tokens = _login(client)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("refresh must not hash or verify passwords")
+
+    monkeypatch.setattr(security.password_hasher, "run", fail)
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == status.HTTP_200_OK
+    refreshed = response.json()
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    me = client.get(
+        "/api/v1/auth/me", headers={"Authorization": f"Bearer {refreshed['access_token']}"}
+    )
+    assert me.json()["username"] == "DemoPlayer"
+
+
+def test_reused_refresh_token_revokes_family(client):
+    """Test that replaying a rotated refresh token revokes its successor."""
+    tokens = _login(client)
+    rotated = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    ).json()
+
+    replay = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == status.HTTP_401_UNAUTHORIZED
+
+    successor = client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": rotated["refresh_token"]}
+    )
+    assert successor.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_logout_revokes_refresh_token(client):
+    """Test that logging out with a refresh token revokes it."""
+    tokens = _login(client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    response = client.post(
+        "/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_refresh_with_unknown_token(client):
+    """Test that an unknown refresh token is rejected."""
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": "not-a-token"})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_logout_revokes_access_token(client):
+    """Test that an access token is rejected after logging out with it."""
+    tokens = _login(client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == status.HTTP_200_OK
+
+    response = client.post("/api/v1/auth/logout", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.get("/api/v1/auth/me", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token has been revoked"
+
+    # Other sessions of the same user are unaffected
+    other = _login(client)
+    response = client.get(
+        "/api/v1/auth/me", headers={"Authorization": f"Bearer {other['access_token']}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
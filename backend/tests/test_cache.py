@@ -0,0 +1,34 @@
+"""
+Tests for the in-process TTL cache.
+"""
+
+import time
+
+from app.utils.cache import TTLCache
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that the cache never grows past its maximum size."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_entries_expire():
+    """Test that entries are dropped after their TTL."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("short", "value", ttl=0.01)
+    cache.set("long", "value")
+    time.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert cache.get("long") == "value"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,106 @@
+"""
+Tests for the binary encoding of spectated game states.
+"""
+
+import json
+
+import pytest
+
+from app.models.schemas import ActivePlayer, Direction, GameMode, GameState, Position
+from app.utils.game_codec import (
+    BINARY_MEDIA_TYPE,
+    accepts_binary,
+    decode_message,
+    decode_player,
+    decode_players,
+    encode_delta,
+    encode_keyframe,
+    encode_player,
+    encode_players,
+)
+from app.utils.game_delta import delta_message, keyframe_message
+
+
+def make_player(
+    snake: list[tuple[int, int]],
+    score: int = 0,
+    direction: Direction = Direction.RIGHT,
+    mode: GameMode = GameMode.PASS_THROUGH,
+) -> ActivePlayer:
+    """Build an active player from snake coordinates, head first."""
+    return ActivePlayer(
+        id="p1",
+        username="Strömer",
+        score=score,
+        mode=mode,
+        gameState=GameState(
+            snake=[Position(x=x, y=y) for x, y in snake],
+            food=Position(x=19, y=0),
+            direction=direction,
+            score=score,
+            isPaused=direction == Direction.UP,
+            isGameOver=mode == GameMode.WALLS,
+            mode=mode,
+            speed=150,
+        ),
+    )
+
+
+@pytest.mark.parametrize("direction", list(Direction))
+@pytest.mark.parametrize("mode", list(GameMode))
+def test_player_round_trip(direction, mode):
+    """Test that every direction, mode and flag survives encoding."""
+    player = make_player([(5, 5), (4, 5), (4, 6)], score=1234, direction=direction, mode=mode)
+
+    decoded = decode_player(encode_player(player))
+
+    assert decoded.model_dump(by_alias=True) == player.model_dump(by_alias=True)
+
+
+def test_players_round_trip():
+    """Test that a player list round-trips, including an empty one."""
+    players = [make_player([(0, 0)]), make_player([(19, 19), (18, 19)], score=10)]
+
+    assert decode_players(encode_players(players)) == players
+    assert decode_players(encode_players([])) == []
+
+
+def test_stream_messages_round_trip():
+    """Test that keyframes and deltas decode to the same structure as their JSON form."""
+    before = make_player([(5, 5), (4, 5)])
+    after = make_player([(6, 5), (5, 5)], score=10, direction=Direction.DOWN)
+    delta = delta_message(before, after, seq=41)
+    keyframe = keyframe_message(after, seq=42)
+
+    assert decode_message(encode_delta(delta)) == json.loads(json.dumps(delta))
+    assert decode_message(encode_keyframe(after, seq=42)) == keyframe
+
+
+def test_binary_is_smaller_than_json():
+    """Test that the binary encoding is several times smaller than JSON."""
+    player = make_player([(x, 10) for x in range(20)])
+
+    assert len(encode_player(player)) * 4 < len(player.model_dump_json(by_alias=True))
+
+
+def test_out_of_range_values_are_rejected():
+    """Test that states that do not fit the encoding raise ValueError."""
+    with pytest.raises(ValueError):
+        encode_player(make_player([(300, 0)]))
+    with pytest.raises(ValueError):
+        decode_player(encode_player(make_player([(1, 1)]))[:-1])
+
+
+@pytest.mark.parametrize(
+    "accept,expected",
+    [
+        (None, False),
+        ("application/json", False),
+        (BINARY_MEDIA_TYPE, True),
+        (f"application/json;q=0.5, {BINARY_MEDIA_TYPE}", True),
+        (f"{BINARY_MEDIA_TYPE}; q=0", False),
+    ],
+)
+def test_accepts_binary(accept, expected):
+    """Test Accept header negotiation."""
+    assert accepts_binary(accept) is expected
@@ -0,0 +1,86 @@
+"""
+Tests for delta encoding of spectated game states.
+"""
+
+import json
+
+from app.models.schemas import ActivePlayer, Direction, GameMode, GameState, Position
+from app.utils.game_delta import apply_delta, delta_message, keyframe_message
+
+
+def make_player(snake: list[tuple[int, int]], score: int = 0, food=(0, 0)) -> ActivePlayer:
+    """Build an active player from snake coordinates, head first."""
+    return ActivePlayer(
+        id="p1",
+        username="Streamer",
+        score=score,
+        mode=GameMode.PASS_THROUGH,
+        gameState=GameState(
+            snake=[Position(x=x, y=y) for x, y in snake],
+            food=Position(x=food[0], y=food[1]),
+            direction=Direction.RIGHT,
+            score=score,
+            mode=GameMode.PASS_THROUGH,
+            speed=100,
+        ),
+    )
+
+
+def step(snake: list[tuple[int, int]], grow: bool = False) -> list[tuple[int, int]]:
+    """Move a snake one cell to the right, wrapping around a 20-wide grid."""
+    x, y = snake[0]
+    moved = [((x + 1) % 20, y), *snake]
+    return moved if grow else moved[:-1]
+
+
+def test_step_is_head_and_tail_drop():
+    """Test that a plain move encodes as one head segment and one dropped tail segment."""
+    snake = [(5, 5), (4, 5), (3, 5)]
+    before, after = make_player(snake), make_player(step(snake))
+
+    assert delta_message(before, after, seq=7) == {
+        "type": "delta",
+        "seq": 7,
+        "head": [{"x": 6, "y": 5}],
+        "drop": 1,
+    }
+
+
+def test_deltas_replay_a_game():
+    """Test that applying each delta reproduces every state of a game."""
+    snake, score, food = [(3, 3), (2, 3), (1, 3)], 0, (0, 0)
+    expected = make_player(snake)
+    replayed = expected
+    for tick in range(60):
+        eating = tick % 10 == 0
+        snake = step(snake, grow=eating)
+        if eating:
+            score, food = score + 10, (tick % 20, 7)
+        current = make_player(snake, score=score, food=food)
+
+        message = delta_message(expected, current, seq=tick + 1)
+        assert message is not None
+        replayed = apply_delta(replayed, json.loads(json.dumps(message)))
+        assert replayed == current
+        expected = current
+
+
+def test_non_moves_need_a_keyframe():
+    """Test that changes which are not snake steps are not encoded as deltas."""
+    before = make_player([(5, 5), (4, 5)])
+    new_game = make_player([(15, 15), (14, 15), (13, 15)] + [(0, y) for y in range(10)])
+    assert delta_message(before, new_game, seq=1) is None
+
+    other_mode = make_player([(6, 5), (5, 5)])
+    other_mode.mode = other_mode.gameState.mode = GameMode.WALLS
+    assert delta_message(before, other_mode, seq=1) is None
+
+
+def test_delta_is_an_order_of_magnitude_smaller_for_long_snakes():
+    """Test the payload saving for a 100-segment snake."""
+    snake = [(x, y) for y in range(5) for x in range(20)]
+    before, after = make_player(snake), make_player(step(snake), score=10)
+
+    keyframe = json.dumps(keyframe_message(after, seq=1), separators=(",", ":"))
+    delta = json.dumps(delta_message(before, after, seq=1), separators=(",", ":"))
+    assert len(delta) * 10 < len(keyframe)
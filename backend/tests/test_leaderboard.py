@@ -2,14 +2,26 @@
 Tests for leaderboard endpoints.
 """
 
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
 from fastapi import status
+from sqlalchemy import select
+
+from app.models.db import LeaderboardEntryDB, WindowBestScoreDB
+from app.models.schemas import GameMode, LeaderboardWindow
+from app.services import leaderboard_service
 
 
 def test_get_all_leaderboard_entries(client):
     """Test getting all leaderboard entries."""
     response = client.get("/api/v1/leaderboard")
     assert response.status_code == status.HTTP_200_OK
-    data = response.json()
+    data = response.json()["entries"]
     assert isinstance(data, list)
     assert len(data) > 0
 
@@ -18,7 +30,7 @@ def test_get_leaderboard_filtered_by_walls(client):
     """Test getting leaderboard filtered by walls mode."""
     response = client.get("/api/v1/leaderboard?mode=walls")
     assert response.status_code == status.HTTP_200_OK
-    data = response.json()
+    data = response.json()["entries"]
     assert isinstance(data, list)
     for entry in data:
         assert entry["mode"] == "walls"
@@ -28,7 +40,7 @@ def test_get_leaderboard_filtered_by_pass_through(client):
     """Test getting leaderboard filtered by pass-through mode."""
     response = client.get("/api/v1/leaderboard?mode=pass-through")
     assert response.status_code == status.HTTP_200_OK
-    data = response.json()
+    data = response.json()["entries"]
     assert isinstance(data, list)
     for entry in data:
         assert entry["mode"] == "pass-through"
@@ -140,3 +152,307 @@ def test_submit_higher_score_saved(client, auth_headers):
     # Verify best score is now 1000
     response3 = client.get("/api/v1/leaderboard/best-score/walls", headers=auth_headers)
     assert response3.json() == 1000
+
+
+def test_submit_score_rank_uses_index(client, auth_headers):
+    """Test that ranks reflect seeded entries and new submissions."""
+    # Seeded walls entries: 1000 and 600
+    response = client.post(
+        "/api/v1/leaderboard/scores", json={"score": 700, "mode": "walls"}, headers=auth_headers
+    )
+    assert response.json()["rank"] == 2
+
+    response = client.post(
+        "/api/v1/leaderboard/scores", json={"score": 1200, "mode": "walls"}, headers=auth_headers
+    )
+    assert response.json()["rank"] == 1
+
+    # A lower score is not saved but is still ranked against all entries
+    response = client.post(
+        "/api/v1/leaderboard/scores", json={"score": 650, "mode": "walls"}, headers=auth_headers
+    )
+    assert response.json()["success"] is False
+    assert response.json()["rank"] == 4
+
+
+def test_get_leaderboard_paginated(client):
+    """Test walking the leaderboard with keyset cursors."""
+    response = client.get("/api/v1/leaderboard?limit=2")
+    assert response.status_code == status.HTTP_200_OK
+    page1 = response.json()
+    assert [entry["score"] for entry in page1["entries"]] == [1000, 800]
+    assert page1["next_cursor"] is not None
+
+    response = client.get(f"/api/v1/leaderboard?limit=2&cursor={page1['next_cursor']}")
+    page2 = response.json()
+    assert [entry["score"] for entry in page2["entries"]] == [600]
+    assert page2["next_cursor"] is None
+
+
+def test_get_leaderboard_limit_capped(client):
+    """Test that the page size is capped server-side."""
+    response = client.get("/api/v1/leaderboard?limit=100000")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["entries"]) <= 100
+
+
+def test_get_leaderboard_invalid_cursor(client):
+    """Test that a malformed cursor is rejected."""
+    response = client.get("/api/v1/leaderboard?cursor=not-a-cursor")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_submit_equal_score_not_saved(client, auth_headers):
+    """Test that resubmitting the current best does not add a new entry."""
+    client.post(
+        "/api/v1/leaderboard/scores", json={"score": 700, "mode": "walls"}, headers=auth_headers
+    )
+    response = client.post(
+        "/api/v1/leaderboard/scores", json={"score": 700, "mode": "walls"}, headers=auth_headers
+    )
+    data = response.json()
+    assert data["success"] is False
+    assert "best score is 700" in data["error"]
+
+    entries = client.get("/api/v1/leaderboard?mode=walls").json()["entries"]
+    assert [entry["score"] for entry in entries].count(700) == 1
+
+
+def test_get_leaderboard_cache_invalidated_by_new_best(client, auth_headers):
+    """Test that cached pages are refreshed after a new best score."""
+    first = client.get("/api/v1/leaderboard?mode=walls")
+    assert client.get("/api/v1/leaderboard?mode=walls").content == first.content
+
+    client.post(
+        "/api/v1/leaderboard/scores", json={"score": 5000, "mode": "walls"}, headers=auth_headers
+    )
+
+    entries = client.get("/api/v1/leaderboard?mode=walls").json()["entries"]
+    assert entries[0]["score"] == 5000
+    entries = client.get("/api/v1/leaderboard").json()["entries"]
+    assert entries[0]["score"] == 5000
+
+
+def test_get_leaderboard_etag(client, auth_headers):
+    """Test that unchanged pages are answered with 304 until a new best arrives."""
+    response = client.get("/api/v1/leaderboard?mode=walls")
+    etag = response.headers["ETag"]
+
+    response = client.get("/api/v1/leaderboard?mode=walls", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    client.post(
+        "/api/v1/leaderboard/scores", json={"score": 5000, "mode": "walls"}, headers=auth_headers
+    )
+
+    response = client.get("/api/v1/leaderboard?mode=walls", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+
+def test_get_leaderboard_time_windows(client, auth_headers):
+    """Test daily and weekly leaderboards track each submission's period best."""
+    # Seeded entries bypass submission, so the windows start empty
+    response = client.get("/api/v1/leaderboard?mode=walls&window=week")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["entries"] == []
+
+    client.post(
+        "/api/v1/leaderboard/scores", json={"score": 700, "mode": "walls"}, headers=auth_headers
+    )
+    # Not an all-time best, and not better than today's best either
+    client.post(
+        "/api/v1/leaderboard/scores", json={"score": 300, "mode": "walls"}, headers=auth_headers
+    )
+
+    for window in ["day", "week"]:
+        entries = client.get(f"/api/v1/leaderboard?mode=walls&window={window}").json()["entries"]
+        assert [(entry["username"], entry["score"]) for entry in entries] == [("DemoPlayer", 700)]
+
+    entries = client.get("/api/v1/leaderboard?mode=walls&window=all").json()["entries"]
+    assert len(entries) == 3
+
+
+@pytest.mark.asyncio
+async def test_prune_expired_windows(test_db):
+    """Test that only bests from ended daily and weekly periods are deleted."""
+    day = leaderboard_service.get_period_start(LeaderboardWindow.DAY)
+    week = leaderboard_service.get_period_start(LeaderboardWindow.WEEK)
+    periods = [
+        ("day", day - timedelta(days=1)),
+        ("day", day),
+        ("week", week - timedelta(weeks=1)),
+        ("week", week),
+    ]
+    test_db.add_all(
+        WindowBestScoreDB(
+            period=period, period_start=start, mode="walls", username="Player1", score=100
+        )
+        for period, start in periods
+    )
+    await test_db.flush()
+
+    assert await leaderboard_service.prune_expired_windows(test_db) == 2
+
+    result = await test_db.execute(select(WindowBestScoreDB.period, WindowBestScoreDB.period_start))
+    assert sorted(result.all()) == [("day", day), ("week", week)]
+
+
+def test_get_leaderboard_invalid_window(client):
+    """Test that an unknown window is rejected."""
+    response = client.get("/api/v1/leaderboard?window=month")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_get_leaderboard_around_me(client, auth_headers):
+    """Test the rank neighbourhood around the user's best score."""
+    # Seeded walls entries: 1000 and 600
+    client.post(
+        "/api/v1/leaderboard/scores", json={"score": 700, "mode": "walls"}, headers=auth_headers
+    )
+
+    response = client.get("/api/v1/leaderboard/around-me?mode=walls&radius=1", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["rank"] == 2
+    assert [(entry["score"], entry["rank"]) for entry in data["entries"]] == [
+        (1000, 1),
+        (700, 2),
+        (600, 3),
+    ]
+
+
+def test_get_leaderboard_around_me_no_scores(client, auth_headers):
+    """Test the rank neighbourhood when the user has no score yet."""
+    response = client.get("/api/v1/leaderboard/around-me?mode=walls", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"rank": None, "entries": []}
+
+
+def test_get_leaderboard_around_me_unauthenticated(client):
+    """Test that the rank neighbourhood requires authentication."""
+    response = client.get("/api/v1/leaderboard/around-me?mode=walls")
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_submit_scores_batch(client, auth_headers):
+    """Test that a batch keeps only the best score per mode."""
+    response = client.post(
+        "/api/v1/leaderboard/scores:batch",
+        json={
+            "scores": [
+                {"score": 300, "mode": "walls"},
+                {"score": 700, "mode": "walls"},
+                {"score": 900, "mode": "pass-through"},
+                {"score": 500, "mode": "walls"},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    results = response.json()["results"]
+    assert [result["success"] for result in results] == [False, True, True, False]
+    assert [result["rank"] for result in results] == [4, 2, 1, 4]
+    assert "best score is 700" in results[0]["error"]
+
+    response = client.get("/api/v1/leaderboard/best-score/walls", headers=auth_headers)
+    assert response.json() == 700
+    response = client.get("/api/v1/leaderboard/best-score/pass-through", headers=auth_headers)
+    assert response.json() == 900
+
+
+def test_submit_scores_batch_too_large(client, auth_headers):
+    """Test that oversized batches are rejected."""
+    response = client.post(
+        "/api/v1/leaderboard/scores:batch",
+        json={"scores": [{"score": 1, "mode": "walls"}] * 101},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_export_leaderboard_ndjson(client):
+    """Test streaming the leaderboard as NDJSON in leaderboard order."""
+    response = client.get("/api/v1/leaderboard/export")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert 'filename="leaderboard.ndjson"' in response.headers["content-disposition"]
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["score"] for row in rows] == [1000, 800, 600]
+    assert set(rows[0]) == {"id", "username", "score", "mode", "date"}
+
+
+def test_export_leaderboard_csv_by_mode(client):
+    """Test streaming one mode as CSV with a header row."""
+    response = client.get("/api/v1/leaderboard/export?format=csv&mode=walls")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["username"], row["score"]) for row in rows] == [
+        ("Player1", "1000"),
+        ("Player3", "600"),
+    ]
+
+
+def test_export_leaderboard_gzip(client, auth_headers):
+    """Test gzip-compressed exports of the weekly window."""
+    client.post(
+        "/api/v1/leaderboard/scores", json={"score": 400, "mode": "walls"}, headers=auth_headers
+    )
+
+    response = client.get("/api/v1/leaderboard/export?window=week&gzip=true")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="leaderboard.ndjson.gz"' in response.headers["content-disposition"]
+
+    lines = gzip.decompress(response.content).decode().splitlines()
+    assert [json.loads(line)["username"] for line in lines] == ["DemoPlayer"]
+
+
+@pytest.mark.asyncio
+async def test_losing_score_in_the_same_tick_is_rejected(test_db, monkeypatch):
+    """Test that a losing score is rejected even when written in the same clock tick."""
+    tick = datetime(2026, 1, 1, 12, 0, 0)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def utcnow(cls):
+            return tick
+
+    monkeypatch.setattr(leaderboard_service, "datetime", FrozenDatetime)
+
+    result = await leaderboard_service.add_leaderboard_entry(test_db, "alice", 700, GameMode.WALLS)
+    assert result["is_new_best"] is True
+    for score in (500, 700):
+        result = await leaderboard_service.add_leaderboard_entry(
+            test_db, "alice", score, GameMode.WALLS
+        )
+        assert result["is_new_best"] is False
+        assert result["previous_best"] == 700
+
+    entries = await test_db.execute(
+        select(LeaderboardEntryDB.score).where(LeaderboardEntryDB.username == "alice")
+    )
+    assert entries.scalars().all() == [700]
+
+
+@pytest.mark.asyncio
+async def test_version_bumps_are_scoped_to_the_transaction(test_db):
+    """Test that a rolled back write does not bump the version on a later commit."""
+    version = leaderboard_service.get_leaderboard_version(GameMode.WALLS)
+    await leaderboard_service.add_leaderboard_entry(test_db, "alice", 700, GameMode.WALLS)
+    await leaderboard_service.add_leaderboard_entry(test_db, "bob", 800, GameMode.WALLS)
+    await test_db.rollback()
+    after_rollback = leaderboard_service.get_leaderboard_version(GameMode.WALLS)
+    assert after_rollback > version
+
+    # The rolled back transaction's commit-time bumps are gone
+    await test_db.commit()
+    assert leaderboard_service.get_leaderboard_version(GameMode.WALLS) == after_rollback
+
+    await leaderboard_service.add_leaderboard_entry(test_db, "carol", 900, GameMode.WALLS)
+    before_commit = leaderboard_service.get_leaderboard_version(GameMode.WALLS)
+    await test_db.commit()
+    assert leaderboard_service.get_leaderboard_version(GameMode.WALLS) > before_commit
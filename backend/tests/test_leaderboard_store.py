@@ -0,0 +1,179 @@
+"""
+Tests for the pluggable leaderboard stores.
+"""
+
+import pytest
+
+from app.models.db import UserBestScoreDB
+from app.models.schemas import GameMode, LeaderboardWindow
+from app.services.leaderboard_store import (
+    MemoryLeaderboardStore,
+    SQLLeaderboardStore,
+    create_leaderboard_store,
+    get_leaderboard_store,
+)
+
+
+async def _all_pages(store, db, mode, limit):
+    """Walk every page of a leaderboard and return the entries and cursors."""
+    pages, cursor = [], None
+    while True:
+        page = await store.get_leaderboard(db, mode, limit=limit, cursor=cursor)
+        pages.append(page)
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.asyncio
+async def test_memory_store_matches_sql_store(test_db):
+    """Test that the in-memory store pages, ranks and neighbours like the SQL store."""
+    sql = SQLLeaderboardStore()
+    for i, score in enumerate([500, 900, 900, 100, 700, 900, 300]):
+        await sql.add_leaderboard_entry(test_db, f"player{i}", score, GameMode.WALLS)
+    await sql.add_leaderboard_entry(test_db, "player0", 800, GameMode.WALLS)
+    await sql.add_leaderboard_entry(test_db, "player1", 50, GameMode.PASS_THROUGH)
+
+    memory = MemoryLeaderboardStore()
+    await memory.load(test_db)
+    assert memory.is_loaded
+
+    for mode in (None, GameMode.WALLS, GameMode.PASS_THROUGH):
+        assert await _all_pages(memory, test_db, mode, 3) == await _all_pages(sql, test_db, mode, 3)
+
+    for score in (1000, 900, 850, 0):
+        assert await memory.get_rank(test_db, score, GameMode.WALLS) == await sql.get_rank(
+            test_db, score, GameMode.WALLS
+        )
+
+    for username in ("player0", "player2", "player3", "nobody"):
+        assert await memory.get_around_user(
+            test_db, username, GameMode.WALLS, 2
+        ) == await sql.get_around_user(test_db, username, GameMode.WALLS, 2)
+        assert await memory.get_user_best_score(
+            test_db, username, GameMode.WALLS
+        ) == await sql.get_user_best_score(test_db, username, GameMode.WALLS)
+
+
+@pytest.mark.asyncio
+async def test_memory_store_mirrors_writes(test_db):
+    """Test that new bests written through the memory store are served from memory."""
+    memory = MemoryLeaderboardStore()
+    await memory.load(test_db)
+
+    result = await memory.add_leaderboard_entry(test_db, "alice", 1200, GameMode.WALLS)
+    assert result["is_new_best"] is True
+    rejected = await memory.add_leaderboard_entry(test_db, "alice", 10, GameMode.WALLS)
+    assert rejected["is_new_best"] is False
+    await memory.add_leaderboard_entries(
+        test_db, "bob", [(300, GameMode.WALLS), (400, GameMode.WALLS)]
+    )
+    await memory.add_coalesced_entries(test_db, [("carol", 50, GameMode.PASS_THROUGH)])
+    await test_db.commit()
+
+    page = await memory.get_leaderboard(test_db, GameMode.WALLS)
+    assert [(e.username, e.score) for e in page.entries] == [
+        ("alice", 1200),
+        ("Player1", 1000),
+        ("Player3", 600),
+        ("bob", 400),
+    ]
+    assert page.entries[0].id == str(result["entry_id"])
+    assert await memory.get_user_best_score(test_db, "bob", GameMode.WALLS) == 400
+    assert await memory.get_rank(test_db, 500, GameMode.WALLS) == 4
+
+    # Nothing was read back from the database for the all-time view
+    sql_page = await SQLLeaderboardStore().get_leaderboard(test_db, GameMode.WALLS)
+    assert page == sql_page
+
+    # Daily and weekly windows are read from the database
+    week = await memory.get_leaderboard(test_db, GameMode.WALLS, window=LeaderboardWindow.WEEK)
+    assert [e.username for e in week.entries] == ["alice", "bob"]
+
+
+@pytest.mark.asyncio
+async def test_memory_store_mirrors_only_committed_writes(test_db):
+    """Test that writes reach the sorted sets on commit and never after a rollback."""
+    memory = MemoryLeaderboardStore()
+    await memory.load(test_db)
+
+    await memory.add_leaderboard_entry(test_db, "alice", 1200, GameMode.WALLS)
+    assert await memory.get_user_best_score(test_db, "alice", GameMode.WALLS) is None
+    await test_db.rollback()
+    assert await memory.get_user_best_score(test_db, "alice", GameMode.WALLS) is None
+    assert await memory.get_rank(test_db, 1100, GameMode.WALLS) == 1
+
+    await memory.add_leaderboard_entry(test_db, "bob", 1100, GameMode.WALLS)
+    await test_db.commit()
+    assert await memory.get_user_best_score(test_db, "bob", GameMode.WALLS) == 1100
+    assert await memory.get_user_best_score(test_db, "alice", GameMode.WALLS) is None
+    assert await memory.get_rank(test_db, 1100, GameMode.WALLS) == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_store_caches_serialized_pages(test_db, monkeypatch):
+    """Test that unchanged pages are served from the cache until a write commits."""
+    memory = MemoryLeaderboardStore()
+    await memory.load(test_db)
+    etag, body = await memory.get_leaderboard_json(test_db, GameMode.WALLS)
+
+    async def no_paging(*args, **kwargs):
+        raise AssertionError("page rebuilt")
+
+    monkeypatch.setattr(memory, "get_leaderboard", no_paging)
+    assert await memory.get_leaderboard_json(test_db, GameMode.WALLS) == (etag, body)
+
+    # A write to another mode leaves the page cached; one to the mode replaces it
+    await memory.add_leaderboard_entry(test_db, "carol", 50, GameMode.PASS_THROUGH)
+    await test_db.commit()
+    assert await memory.get_leaderboard_json(test_db, GameMode.WALLS) == (etag, body)
+
+    monkeypatch.undo()
+    await memory.add_leaderboard_entry(test_db, "alice", 1200, GameMode.WALLS)
+    await test_db.commit()
+    new_etag, new_body = await memory.get_leaderboard_json(test_db, GameMode.WALLS)
+    assert new_etag != etag
+    assert b"alice" in new_body
+
+
+@pytest.mark.asyncio
+async def test_memory_store_falls_back_until_loaded(test_db):
+    """Test that an unloaded memory store reads from the database."""
+    test_db.add(UserBestScoreDB(username="Player1", mode="walls", score=1000))
+    await test_db.flush()
+
+    memory = MemoryLeaderboardStore()
+    assert await memory.get_user_best_score(test_db, "Player1", GameMode.WALLS) == 1000
+    page = await memory.get_leaderboard(test_db)
+    assert len(page.entries) == 3
+
+
+def test_leaderboard_store_selection():
+    """Test that stores are created from their setting name."""
+    assert isinstance(create_leaderboard_store("sql"), SQLLeaderboardStore)
+    assert isinstance(create_leaderboard_store("memory"), MemoryLeaderboardStore)
+    with pytest.raises(ValueError):
+        create_leaderboard_store("redis")
+
+
+@pytest.mark.asyncio
+async def test_api_with_memory_store(client, auth_headers, test_db):
+    """Test the leaderboard endpoints when the memory store is configured."""
+    from app.main import app
+
+    memory = MemoryLeaderboardStore()
+    await memory.load(test_db)
+    app.dependency_overrides[get_leaderboard_store] = lambda: memory
+
+    response = client.post(
+        "/api/v1/leaderboard/scores", json={"score": 1500, "mode": "walls"}, headers=auth_headers
+    )
+    assert response.status_code == 201
+    assert response.json()["rank"] == 1
+
+    response = client.get("/api/v1/leaderboard?mode=walls")
+    assert [e["username"] for e in response.json()["entries"]] == [
+        "DemoPlayer",
+        "Player1",
+        "Player3",
+    ]
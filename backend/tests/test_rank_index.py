@@ -0,0 +1,57 @@
+"""
+Tests for the in-memory rank index.
+"""
+
+import pytest
+
+from app.models.schemas import GameMode
+from app.services import leaderboard_service
+from app.services.rank_index import FenwickTree, RankIndex, rank_index
+
+
+def test_fenwick_tree_counts():
+    """Test prefix and suffix counts over sparse scores."""
+    tree = FenwickTree()
+    for score in [0, 10, 10, 500, 2**31 - 1]:
+        tree.add(score)
+
+    assert len(tree) == 5
+    assert tree.count_at_most(-1) == 0
+    assert tree.count_at_most(0) == 1
+    assert tree.count_at_most(10) == 3
+    assert tree.count_above(10) == 2
+    assert tree.count_above(2**31 - 1) == 0
+
+
+def test_rank_index_per_mode():
+    """Test that ranks are tracked separately per mode."""
+    index = RankIndex()
+    index.add(GameMode.WALLS, 100)
+    index.add(GameMode.WALLS, 300)
+    index.add(GameMode.PASS_THROUGH, 1000)
+
+    assert index.rank(GameMode.WALLS, 300) == 1
+    assert index.rank(GameMode.WALLS, 200) == 2
+    assert index.rank(GameMode.WALLS, 50) == 3
+    assert index.rank(GameMode.PASS_THROUGH, 50) == 2
+
+
+@pytest.mark.asyncio
+async def test_rank_index_only_gains_committed_scores(test_db):
+    """Test that a submission reaches the rank index on commit, not on rollback."""
+    # The seeded walls entries are 1000 and 600
+    await leaderboard_service.add_leaderboard_entry(test_db, "Rolled", 5000, GameMode.WALLS)
+    # Ranks within the transaction still count the uncommitted entry
+    assert await leaderboard_service.get_rank(test_db, 700, GameMode.WALLS) == 3
+    await test_db.rollback()
+    assert rank_index.rank(GameMode.WALLS, 700) == 2
+
+    await leaderboard_service.add_leaderboard_entry(test_db, "Kept", 5000, GameMode.WALLS)
+    assert rank_index.rank(GameMode.WALLS, 700) == 2
+    await test_db.commit()
+    assert rank_index.rank(GameMode.WALLS, 700) == 3
+
+    # A rollback after the commit does not replay the earlier callbacks
+    await test_db.rollback()
+    await test_db.commit()
+    assert rank_index.rank(GameMode.WALLS, 700) == 3
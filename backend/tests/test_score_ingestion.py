@@ -0,0 +1,114 @@
+"""
+Tests for micro-batched score ingestion.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.db import LeaderboardEntryDB, UserBestScoreDB
+from app.models.schemas import GameMode
+from app.services.score_ingestion import IngestorStoppedError, ScoreIngestor
+
+
+@pytest.fixture
+def session_factory(test_db_engine):
+    """Session factory bound to the test database."""
+    return async_sessionmaker(test_db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submissions_share_a_batch(test_db, session_factory):
+    """Test that concurrent submissions are written in one batch."""
+    ingestor = ScoreIngestor(session_factory, max_batch_size=100, max_latency=0.05)
+    ingestor.start()
+    try:
+        results = await asyncio.gather(
+            ingestor.submit("alice", 700, GameMode.WALLS),
+            ingestor.submit("bob", 1200, GameMode.WALLS),
+            ingestor.submit("carol", 300, GameMode.PASS_THROUGH),
+        )
+    finally:
+        await ingestor.stop()
+
+    assert [r["is_new_best"] for r in results] == [True, True, True]
+    assert results[1]["rank"] == 1
+    metrics = ingestor.metrics()
+    assert metrics["batches"] == 1
+    assert metrics["last_batch_size"] == 3
+    assert metrics["submissions"] == 3
+
+    async with session_factory() as session:
+        bests = await session.execute(select(UserBestScoreDB.username, UserBestScoreDB.score))
+        assert dict(bests.all()) == {"alice": 700, "bob": 1200, "carol": 300}
+
+
+@pytest.mark.asyncio
+async def test_same_user_scores_are_coalesced(test_db, session_factory):
+    """Test that only the highest score per user and mode is written."""
+    ingestor = ScoreIngestor(session_factory, max_batch_size=100, max_latency=0.05)
+    ingestor.start()
+    try:
+        results = await asyncio.gather(
+            ingestor.submit("alice", 400, GameMode.WALLS),
+            ingestor.submit("alice", 900, GameMode.WALLS),
+            ingestor.submit("alice", 500, GameMode.WALLS),
+        )
+    finally:
+        await ingestor.stop()
+
+    assert [r["is_new_best"] for r in results] == [False, True, False]
+    assert results[0]["previous_best"] == 900
+    assert ingestor.metrics()["coalesced"] == 2
+
+    async with session_factory() as session:
+        rows = await session.execute(
+            select(LeaderboardEntryDB.score).where(LeaderboardEntryDB.username == "alice")
+        )
+        assert rows.scalars().all() == [900]
+
+
+@pytest.mark.asyncio
+async def test_lower_score_reports_previous_best(test_db, session_factory):
+    """Test that a score below the stored best is rejected with that best."""
+    ingestor = ScoreIngestor(session_factory, max_batch_size=100, max_latency=0.001)
+    ingestor.start()
+    try:
+        first = await ingestor.submit("alice", 800, GameMode.WALLS)
+        second = await ingestor.submit("alice", 200, GameMode.WALLS)
+    finally:
+        await ingestor.stop()
+
+    assert first["is_new_best"] is True
+    assert second == {"rank": 4, "is_new_best": False, "previous_best": 800}
+    assert ingestor.metrics()["batches"] == 2
+
+
+@pytest.mark.asyncio
+async def test_submissions_during_shutdown(test_db, session_factory):
+    """Test that queued scores are written on stop and later ones are refused."""
+    ingestor = ScoreIngestor(session_factory, max_batch_size=2, max_latency=0.05, max_queue_size=1)
+    ingestor.start()
+
+    # One submission fits the queue; the others wait for space while stop begins
+    queued = [
+        asyncio.create_task(ingestor.submit(f"player{i}", 100 + i, GameMode.WALLS))
+        for i in range(5)
+    ]
+    await asyncio.sleep(0)
+    stopping = asyncio.create_task(ingestor.stop())
+    await asyncio.sleep(0)
+
+    assert not ingestor.is_running
+    with pytest.raises(IngestorStoppedError):
+        await asyncio.wait_for(ingestor.submit("late", 999, GameMode.WALLS), 1)
+
+    results = await asyncio.wait_for(asyncio.gather(*queued), 5)
+    await asyncio.wait_for(stopping, 5)
+    assert all(result["is_new_best"] for result in results)
+
+    async with session_factory() as session:
+        bests = await session.execute(select(UserBestScoreDB.username))
+        assert sorted(bests.scalars().all()) == [f"player{i}" for i in range(5)]
@@ -0,0 +1,63 @@
+"""
+Tests for the bucketed sorted set.
+"""
+
+import random
+
+from app.utils.sorted_set import SortedSet
+
+
+def test_sorted_set_matches_sorted_list():
+    """Test inserts, removals and positional lookups against a plain sorted list."""
+    rng = random.Random(7)
+    keys = SortedSet(load=4)
+    expected: set[int] = set()
+    for _ in range(500):
+        key = rng.randrange(200)
+        if rng.random() < 0.3:
+            assert keys.discard(key) == (key in expected)
+            expected.discard(key)
+        else:
+            keys.add(key)
+            expected.add(key)
+
+    ordered = sorted(expected)
+    assert list(keys) == ordered
+    assert len(keys) == len(ordered)
+    assert keys.slice(10, 25) == ordered[10:25]
+    for probe in (-1, 0, 57, 199, 250):
+        assert keys.count_below(probe) == sum(k < probe for k in ordered)
+        assert keys.count_at_most(probe) == sum(k <= probe for k in ordered)
+        assert (probe in keys) == (probe in expected)
+
+
+def test_sorted_set_bulk_load_and_tuple_keys():
+    """Test that bulk-loaded tuple keys order and slice like leaderboard keys."""
+    keys = SortedSet([(-100, 2), (-300, 1), (-100, 1), (-300, 1)], load=2)
+
+    assert list(keys) == [(-300, 1), (-100, 1), (-100, 2)]
+    assert keys.count_below((-100,)) == 1
+    assert keys.slice(1, 10) == [(-100, 1), (-100, 2)]
+    assert keys.slice(5, 10) == []
+
+
+def test_sorted_set_lookups_between_updates():
+    """Test that ranks and slices stay right as the bucket size index is updated."""
+    rng = random.Random(11)
+    keys = SortedSet(list(range(0, 300, 3)), load=4)
+    expected = set(range(0, 300, 3))
+    for _ in range(400):
+        key = rng.randrange(300)
+        if rng.random() < 0.4:
+            keys.discard(key)
+            expected.discard(key)
+        else:
+            keys.add(key)
+            expected.add(key)
+
+        ordered = sorted(expected)
+        probe = rng.randrange(-5, 305)
+        start = rng.randrange(len(ordered) + 2)
+        assert keys.count_below(probe) == sum(k < probe for k in ordered)
+        assert keys.count_at_most(probe) == sum(k <= probe for k in ordered)
+        assert keys.slice(start, start + 7) == ordered[start : start + 7]
@@ -2,7 +2,44 @@
 Tests for spectate endpoints.
 """
 
+import asyncio
+import json
+import time
+from contextlib import ExitStack
+
+import pytest
 from fastapi import status
+from fastapi.websockets import WebSocketDisconnect
+
+from app.models.schemas import ActivePlayer, Direction, GameMode, GameState, Position
+from app.services import active_players
+from app.services.db_session import get_db
+from app.services.spectate_hub import SpectateHub, spectate_hub
+from app.utils.game_codec import (
+    BINARY_MEDIA_TYPE,
+    BINARY_SUBPROTOCOL,
+    decode_message,
+    decode_player,
+    decode_players,
+)
+
+
+def make_player(player_id: str = "ws1", score: int = 0) -> ActivePlayer:
+    """Build an active player with a short snake."""
+    return ActivePlayer(
+        id=player_id,
+        username="Streamer",
+        score=score,
+        mode=GameMode.WALLS,
+        gameState=GameState(
+            snake=[Position(x=3, y=3), Position(x=2, y=3)],
+            food=Position(x=9, y=9),
+            direction=Direction.RIGHT,
+            score=score,
+            mode=GameMode.WALLS,
+            speed=150,
+        ),
+    )
 
 
 def test_get_active_players(client):
@@ -71,3 +108,384 @@ def test_active_player_has_valid_game_state(client):
 
         # Verify mode is valid
         assert player["mode"] in ["pass-through", "walls"]
+
+
+def test_get_active_players_etag(client):
+    """Test that an unchanged player list is answered with 304."""
+    response = client.get("/api/v1/spectate/players")
+    etag = response.headers["ETag"]
+
+    response = client.get("/api/v1/spectate/players", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+
+    response = client.get("/api/v1/spectate/players", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_get_player_game_state_etag(client):
+    """Test conditional requests for a single player's game state."""
+    response = client.get("/api/v1/spectate/players/ap1")
+    etag = response.headers["ETag"]
+
+    response = client.get("/api/v1/spectate/players/ap1", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # Other players' updates leave the ETag alone; the player's own update changes it
+    active_players.update_active_player(make_player("etag-other"))
+    response = client.get("/api/v1/spectate/players/ap1", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    active_players.remove_active_player("etag-other")
+
+    active_players.update_active_player(active_players.get_active_player("ap1"))
+    response = client.get("/api/v1/spectate/players/ap1", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_get_players_binary(client):
+    """Test that the binary encoding is served when the Accept header asks for it."""
+    headers = {"Accept": BINARY_MEDIA_TYPE}
+    json_etag = client.get("/api/v1/spectate/players").headers["ETag"]
+
+    response = client.get("/api/v1/spectate/players", headers=headers)
+    assert response.headers["Content-Type"] == BINARY_MEDIA_TYPE
+    assert "Accept" in response.headers["Vary"]
+    assert response.headers["ETag"] != json_etag
+    players = decode_players(response.content)
+    assert [player.id for player in players] == [
+        player["id"] for player in client.get("/api/v1/spectate/players").json()
+    ]
+
+    response = client.get(
+        "/api/v1/spectate/players",
+        headers={**headers, "If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = client.get("/api/v1/spectate/players/ap1", headers=headers)
+    assert response.headers["Content-Type"] == BINARY_MEDIA_TYPE
+    assert decode_player(response.content) == active_players.get_active_player("ap1")
+
+
+def test_get_player_binary_falls_back_to_json(client):
+    """Test that a state that does not fit the binary encoding is served as JSON."""
+    player = make_player()
+    player.gameState.food = Position(x=500, y=0)
+    active_players.update_active_player(player)
+    try:
+        response = client.get("/api/v1/spectate/players/ws1", headers={"Accept": BINARY_MEDIA_TYPE})
+        assert response.headers["Content-Type"] == "application/json"
+        assert response.json()["gameState"]["food"] == {"x": 500, "y": 0}
+    finally:
+        active_players.remove_active_player("ws1")
+
+
+def test_get_players_binary_fallback_etag(client):
+    """Test that a JSON fallback is tagged and revalidated as the JSON representation."""
+    headers = {"Accept": BINARY_MEDIA_TYPE}
+    player = make_player()
+    player.gameState.food = Position(x=500, y=0)
+    active_players.update_active_player(player)
+    try:
+        response = client.get("/api/v1/spectate/players", headers=headers)
+        assert response.headers["Content-Type"] == "application/json"
+        assert "Accept" in response.headers["Vary"]
+        etag = response.headers["ETag"]
+        assert etag == client.get("/api/v1/spectate/players").headers["ETag"]
+
+        response = client.get(
+            "/api/v1/spectate/players", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        # The binary representation was never sent, so its ETag does not match
+        binary_etag = active_players.get_players_etag(binary=True)
+        response = client.get(
+            "/api/v1/spectate/players", headers={**headers, "If-None-Match": binary_etag}
+        )
+        assert response.status_code == status.HTTP_200_OK
+    finally:
+        active_players.remove_active_player("ws1")
+
+
+def test_spectate_ws_streams_updates(client):
+    """Test that the WebSocket sends a keyframe, then a delta per update."""
+    active_players.update_active_player(make_player())
+    try:
+        with client.websocket_connect("/api/v1/spectate/ws/ws1") as websocket:
+            keyframe = websocket.receive_json()
+            assert keyframe["type"] == "keyframe"
+            assert keyframe["seq"] == 0
+            assert keyframe["player"]["score"] == 0
+
+            moved = make_player(score=10)
+            moved.gameState.snake = [Position(x=4, y=3), Position(x=3, y=3)]
+            restarted = make_player(score=20)
+            restarted.mode = restarted.gameState.mode = GameMode.PASS_THROUGH
+            # Flush each update instead of waiting for the tick, which would coalesce them
+            active_players.update_active_player(moved)
+            spectate_hub.flush()
+            active_players.update_active_player(restarted)
+            spectate_hub.flush()
+            assert websocket.receive_json() == {
+                "type": "delta",
+                "seq": 1,
+                "head": [{"x": 4, "y": 3}],
+                "drop": 1,
+                "score": 10,
+            }
+            # A new game is not a step, so it is sent as a keyframe
+            keyframe = websocket.receive_json()
+            assert keyframe["type"] == "keyframe"
+            assert keyframe["seq"] == 2
+            assert keyframe["player"]["gameState"]["score"] == 20
+
+            websocket.send_json({"type": "resync"})
+            assert websocket.receive_json() == keyframe
+
+            active_players.remove_active_player("ws1")
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                websocket.receive_json()
+            assert exc_info.value.code == status.WS_1000_NORMAL_CLOSURE
+    finally:
+        active_players.remove_active_player("ws1")
+
+
+def test_spectate_ws_binary_subprotocol(client):
+    """Test that offering the binary subprotocol streams binary frames."""
+    active_players.update_active_player(make_player())
+    try:
+        with client.websocket_connect(
+            "/api/v1/spectate/ws/ws1", subprotocols=[BINARY_SUBPROTOCOL]
+        ) as websocket:
+            assert websocket.accepted_subprotocol == BINARY_SUBPROTOCOL
+            keyframe = decode_message(websocket.receive_bytes())
+            assert keyframe["type"] == "keyframe"
+            assert keyframe["player"]["id"] == "ws1"
+
+            moved = make_player(score=10)
+            moved.gameState.snake = [Position(x=4, y=3), Position(x=3, y=3)]
+            active_players.update_active_player(moved)
+            assert decode_message(websocket.receive_bytes()) == {
+                "type": "delta",
+                "seq": 1,
+                "head": [{"x": 4, "y": 3}],
+                "drop": 1,
+                "score": 10,
+            }
+    finally:
+        active_players.remove_active_player("ws1")
+
+
+def test_spectate_ws_unknown_player(client):
+    """Test that spectating a player who is not playing is refused."""
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/api/v1/spectate/ws/invalid-id") as websocket:
+            websocket.receive_json()
+    assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
+
+
+@pytest.mark.asyncio
+async def test_spectate_hub_drops_slow_consumers():
+    """Test that a subscriber whose queue fills up is dropped, not buffered."""
+    hub = SpectateHub(max_queue_size=2, tick_interval=60)
+    players = {"ws1": make_player()}
+    with hub.subscribe("ws1", players.get) as slow, hub.subscribe("ws1", players.get) as fast:
+        assert json.loads(await fast.get())["type"] == "keyframe"
+        for score in range(1, 4):
+            hub.publish("ws1", make_player(score=score))
+            hub.flush()
+            assert json.loads(await fast.get())["score"] == score
+
+        assert slow.dropped
+        assert not fast.dropped
+        assert await slow.get() is None
+
+        hub.publish("ws1", make_player(score=4))
+        hub.flush()
+        assert json.loads(await fast.get())["seq"] == 4
+        assert hub.metrics()["subscribers"] == 2
+
+    assert hub.metrics() == {
+        "players": 0,
+        "subscribers": 0,
+        "published": 4,
+        "broadcasts": 4,
+        "keyframes": 0,
+        "encoded": 5,
+        "dropped": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_spectate_hub_sends_periodic_keyframes():
+    """Test that a keyframe replaces every Nth delta."""
+    hub = SpectateHub(keyframe_interval=3, tick_interval=60)
+    players = {"ws1": make_player()}
+    with hub.subscribe("ws1", players.get) as subscription:
+        types = []
+        for score in range(7):
+            if score:
+                hub.publish("ws1", make_player(score=score))
+                hub.flush()
+            types.append(json.loads(await subscription.get())["type"])
+
+    assert types == ["keyframe", "delta", "delta", "keyframe", "delta", "delta", "keyframe"]
+
+
+@pytest.mark.asyncio
+async def test_spectate_hub_encodes_once_per_player_and_tick():
+    """Test that every subscriber gets the same frame, encoded once per tick and format."""
+    hub = SpectateHub(tick_interval=60)
+    players = {"ws1": make_player(), "ws2": make_player("ws2")}
+    with ExitStack() as stack:
+        subscriptions = [
+            stack.enter_context(hub.subscribe(player_id, players.get, binary=binary))
+            for player_id in players
+            for binary in (False, True)
+            for _ in range(50)
+        ]
+        for subscription in subscriptions:
+            await subscription.get()
+        # Joining spectators share one keyframe per player and format
+        assert hub.metrics()["encoded"] == 4
+
+        # Updates published within a tick are coalesced into one
+        for score in range(1, 4):
+            hub.publish("ws1", make_player(score=score))
+        hub.publish("ws2", make_player("ws2", score=7))
+        assert hub.flush() == 2
+        assert hub.flush() == 0
+
+        frames = [await subscription.get() for subscription in subscriptions]
+        assert hub.metrics()["encoded"] == 8
+        for first in range(0, len(frames), 50):
+            assert all(frame is frames[first] for frame in frames[first : first + 50])
+        assert json.loads(frames[0]) == {"type": "delta", "seq": 1, "score": 3}
+        assert isinstance(frames[50], memoryview) and frames[50].readonly
+        assert decode_message(frames[50]) == json.loads(frames[0])
+
+
+@pytest.mark.asyncio
+async def test_spectate_hub_ticks_while_subscribed():
+    """Test that updates are flushed by the tick without an explicit flush."""
+    hub = SpectateHub(tick_interval=0.01)
+    players = {"ws1": make_player()}
+    with hub.subscribe("ws1", players.get) as subscription:
+        await subscription.get()
+        hub.publish("ws1", make_player(score=5))
+        message = json.loads(await asyncio.wait_for(subscription.get(), timeout=5))
+        assert message["score"] == 5
+        assert len(hub._tickers) == 1
+    assert hub._tickers == {}
+
+
+def test_publish_game_session(client, auth_headers):
+    """Test that an authenticated player can publish and end its game session."""
+    state = make_player(score=90).gameState.model_dump(by_alias=True, mode="json")
+    response = client.put("/api/v1/spectate/session", json=state, headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["username"] == "DemoPlayer"
+
+    response = client.get("/api/v1/spectate/players/1")
+    assert response.json()["gameState"]["score"] == 90
+
+    response = client.delete("/api/v1/spectate/session", headers=auth_headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    response = client.get("/api/v1/spectate/players/1")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_publish_game_session_requires_auth(client):
+    """Test that publishing a game state requires authentication."""
+    state = make_player().gameState.model_dump(by_alias=True, mode="json")
+    response = client.put("/api/v1/spectate/session", json=state)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_game_session_ws(client, auth_token):
+    """Test that game states sent over a WebSocket are published until it closes."""
+    state = make_player(score=40).gameState.model_dump_json(by_alias=True)
+    with client.websocket_connect(f"/api/v1/spectate/session/ws?token={auth_token}") as websocket:
+        websocket.send_text(state)
+        for _ in range(100):
+            if client.get("/api/v1/spectate/players/1").status_code == status.HTTP_200_OK:
+                break
+            time.sleep(0.01)
+        with client.websocket_connect("/api/v1/spectate/ws/1") as spectator:
+            assert spectator.receive_json()["player"]["score"] == 40
+
+    assert client.get("/api/v1/spectate/players/1").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_game_session_ws_overlapping_sessions(client, auth_token):
+    """Test that a closing session does not remove the state of a newer session."""
+    url = f"/api/v1/spectate/session/ws?token={auth_token}"
+
+    def wait_for_score(score):
+        for _ in range(100):
+            player = active_players.get_active_player("1")
+            if player is not None and player.score == score:
+                return
+            time.sleep(0.01)
+        raise AssertionError(f"score {score} was not published")
+
+    with client.websocket_connect(url) as old_session:
+        old_session.send_text(make_player(score=40).gameState.model_dump_json(by_alias=True))
+        wait_for_score(40)
+        with client.websocket_connect(url) as new_session:
+            new_session.send_text(make_player(score=50).gameState.model_dump_json(by_alias=True))
+            wait_for_score(50)
+            old_session.close()
+            time.sleep(0.1)
+            assert active_players.get_active_player("1").score == 50
+
+    assert active_players.get_active_player("1") is None
+
+
+def test_game_session_ws_does_not_hold_a_request_session(client, auth_token):
+    """Test that the publishing WebSocket authenticates without a request-scoped session."""
+    from app.main import app
+
+    async def no_request_session():
+        raise AssertionError("get_db used by the game session WebSocket")
+        yield
+
+    app.dependency_overrides[get_db] = no_request_session
+    state = make_player(score=40).gameState.model_dump_json(by_alias=True)
+    with client.websocket_connect(f"/api/v1/spectate/session/ws?token={auth_token}") as websocket:
+        websocket.send_text(state)
+        for _ in range(100):
+            if active_players.get_active_player("1") is not None:
+                break
+            time.sleep(0.01)
+        assert active_players.get_active_player("1").score == 40
+
+
+def test_game_session_ws_rejects_invalid_token(client):
+    """Test that the publishing WebSocket refuses unauthenticated clients."""
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/api/v1/spectate/session/ws?token=invalid") as websocket:
+            websocket.receive_text()
+    assert exc_info.value.code == status.WS_1008_POLICY_VIOLATION
+
+
+def test_players_without_heartbeat_are_evicted():
+    """Test that only players whose TTL has passed are evicted."""
+    now = time.monotonic()
+    active_players.update_active_player(make_player("ttl1"), ttl=10)
+    active_players.update_active_player(make_player("ttl2"), ttl=10)
+    # A heartbeat pushes the deadline out
+    active_players.update_active_player(make_player("ttl2", score=5), ttl=100)
+    try:
+        assert active_players.evict_expired_players(now + 5) == []
+        assert active_players.evict_expired_players(now + 50) == ["ttl1"]
+        assert active_players.get_active_player("ttl1") is None
+        assert active_players.get_active_player("ttl2").score == 5
+
+        # Players without a TTL, like the demo players, never expire
+        assert active_players.evict_expired_players(now + 1000) == ["ttl2"]
+        assert active_players.get_active_player("ap1") is not None
+    finally:
+        active_players.remove_active_player("ttl1")
+        active_players.remove_active_player("ttl2")
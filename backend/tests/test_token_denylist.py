@@ -0,0 +1,76 @@
+"""
+Tests for the revoked access token denylist.
+"""
+
+import time
+
+import pytest
+
+from app.services.token_denylist import TokenDenylist
+
+
+def test_denylist_expires_entries():
+    """Test that revocations stop applying, and are pruned, once tokens expire."""
+    denylist = TokenDenylist()
+    now = time.time()
+    denylist.add("expired", now - 1)
+    denylist.add("live", now + 60)
+
+    assert not denylist.is_revoked("expired")
+    assert denylist.is_revoked("live")
+    assert not denylist.is_revoked("unknown")
+
+    # Adding prunes entries whose tokens have expired
+    denylist.add("other", now + 60)
+    assert len(denylist) == 2
+
+
+@pytest.mark.asyncio
+async def test_denylist_survives_restart(test_db):
+    """Test that revocations are persisted and reloaded, minus expired ones."""
+    denylist = TokenDenylist()
+    now = time.time()
+    await denylist.revoke(test_db, "live", now + 60)
+    await denylist.revoke(test_db, "stale", now + 0.05)
+    await test_db.commit()
+
+    time.sleep(0.1)
+    restarted = TokenDenylist()
+    await restarted.load(test_db)
+    await test_db.commit()
+
+    assert restarted.is_revoked("live")
+    assert not restarted.is_revoked("stale")
+    assert len(restarted) == 1
+
+
+@pytest.mark.asyncio
+async def test_revocation_applies_once_committed(test_db):
+    """Test that a revocation only reaches memory when its transaction commits."""
+    denylist = TokenDenylist()
+    expires_at = time.time() + 60
+
+    await denylist.revoke(test_db, "rolled-back", expires_at)
+    assert not denylist.is_revoked("rolled-back")
+    await test_db.rollback()
+    assert not denylist.is_revoked("rolled-back")
+
+    await denylist.revoke(test_db, "committed", expires_at)
+    await test_db.commit()
+    assert denylist.is_revoked("committed")
+
+
+@pytest.mark.asyncio
+async def test_reload_picks_up_other_workers(test_db):
+    """Test that reloading adds revocations made elsewhere and keeps local ones."""
+    worker, other_worker = TokenDenylist(), TokenDenylist()
+    expires_at = time.time() + 60
+    worker.add("local", expires_at)
+    await other_worker.revoke(test_db, "elsewhere", expires_at)
+    await test_db.commit()
+
+    await worker.load(test_db)
+    await test_db.commit()
+
+    assert worker.is_revoked("elsewhere")
+    assert worker.is_revoked("local")
@@ -0,0 +1,195 @@
+"""
+Tests for the user service caches.
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services import user_service
+from app.utils.cache import TTLCache
+
+
+@pytest.fixture
+def session_factory(test_db_engine):
+    """Session factory bound to the test database."""
+    return async_sessionmaker(test_db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def statements(test_db_engine):
+    """Collect the SELECT and INSERT statements run against the test database."""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "INSERT")):
+            seen.append(statement)
+
+    event.listen(test_db_engine.sync_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(test_db_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.mark.asyncio
+async def test_session_memo_loads_user_once(test_db, session_factory, statements):
+    """Test that repeated lookups in one session query the database once."""
+    user_service.clear_cache()
+    async with session_factory() as session:
+        principal = await user_service.get_principal(session, "1")
+        user = await user_service.get_user_by_id(session, "1")
+        credentials = await user_service.get_credentials_by_email(session, "demo@snake.game")
+
+    assert principal.username == user.username == "DemoPlayer"
+    assert credentials[0] == principal
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_process_cache_is_shared_across_sessions(test_db, session_factory, statements):
+    """Test that a user loaded by one session is served to the next from the cache."""
+    user_service.clear_cache()
+    async with session_factory() as session:
+        await user_service.get_user_by_id(session, "1")
+    async with session_factory() as session:
+        await user_service.get_user_by_email(session, "demo@snake.game")
+
+    assert len(statements) == 1
+    stats = user_service.get_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_password_update_invalidates_cache(test_db, session_factory):
+    """Test that a password hash update is visible to later sessions."""
+    async with session_factory() as session:
+        _, old_hash = await user_service.get_user_by_email(session, "demo@snake.game")
+
+    async with session_factory() as session:
+        assert await user_service.update_password_hash(session, "1", "new-hash", old_hash)
+        _, current = await user_service.get_user_by_email(session, "demo@snake.game")
+        assert current == "new-hash"
+        await session.commit()
+
+    async with session_factory() as session:
+        _, stored = await user_service.get_user_by_email(session, "demo@snake.game")
+    assert stored == "new-hash"
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_update_does_not_invalidate_later(test_db, session_factory):
+    """Test that a rolled back update leaves no invalidation for the next commit."""
+    async with session_factory() as session:
+        _, old_hash = await user_service.get_user_by_email(session, "demo@snake.game")
+        assert await user_service.update_password_hash(session, "1", "new-hash", old_hash)
+        await session.rollback()
+
+        # Cached again by another request, then this session commits unrelated work
+        async with session_factory() as other:
+            await user_service.get_user_by_email(other, "demo@snake.game")
+        await session.commit()
+
+    assert user_service.get_cache_stats()["size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unknown_users_are_not_cached(test_db):
+    """Test that missing users are not cached, so a later signup is found."""
+    user_service.clear_cache()
+    assert await user_service.get_user_by_email(test_db, "new@snake.game") is None
+
+    await user_service.create_user(test_db, "new@snake.game", "Newbie", "hash")
+    found = await user_service.get_user_by_email(test_db, "new@snake.game")
+    assert found[0].username == "Newbie"
+    assert user_service.get_cache_stats()["size"] == 0
+
+
+def test_metrics_include_user_cache(client):
+    """Test that the metrics endpoint reports user cache statistics."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert {"size", "hits", "misses"} <= response.json()["user_cache"].keys()
+
+
+@pytest.mark.asyncio
+async def test_create_user_is_a_single_statement(test_db, statements):
+    """Test that signup inserts the user without a lookup or refresh."""
+    user = await user_service.create_user(test_db, "new@snake.game", "Newbie", "hash")
+
+    assert user.username == "Newbie"
+    assert len(statements) == 1
+    assert "RETURNING" in statements[0]
+    assert await user_service.get_user_by_id(test_db, user.id) == user
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_create_user_maps_unique_violations(test_db):
+    """Test that taken emails and usernames raise ValueError."""
+    with pytest.raises(ValueError, match="Email already registered"):
+        await user_service.create_user(test_db, "demo@snake.game", "Someone", "hash")
+    with pytest.raises(ValueError, match="Username already taken"):
+        await user_service.create_user(test_db, "someone@snake.game", "DemoPlayer", "hash")
+
+    # The session is usable again after a conflict
+    user = await user_service.create_user(test_db, "someone@snake.game", "Someone", "hash")
+    assert user.username == "Someone"
+
+
+@pytest.mark.asyncio
+async def test_create_user_conflict_keeps_pending_work(test_db, session_factory):
+    """Test that a signup conflict only rolls back the INSERT, not the caller's transaction."""
+    await user_service.create_user(test_db, "first@snake.game", "First", "hash")
+    with pytest.raises(ValueError, match="Email already registered"):
+        await user_service.create_user(test_db, "demo@snake.game", "Someone", "hash")
+    await test_db.commit()
+
+    async with session_factory() as db:
+        found = await user_service.get_user_by_email(db, "first@snake.game")
+    assert found is not None and found[0].username == "First"
+
+
+@pytest.mark.asyncio
+async def test_create_user_matches_the_violated_constraint(test_db):
+    """Test that conflicts are told apart by constraint, not by values in the message."""
+    await user_service.create_user(test_db, "fan@snake.game", "emailfan", "hash")
+    with pytest.raises(ValueError, match="Username already taken"):
+        await user_service.create_user(test_db, "other@snake.game", "emailfan", "hash")
+
+
+@pytest.mark.parametrize(
+    "message,column",
+    [
+        ("UNIQUE constraint failed: users.username", "username"),
+        ("UNIQUE constraint failed: users.email", "email"),
+        (
+            'duplicate key value violates unique constraint "ix_users_username"\n'
+            "DETAIL:  Key (username)=(emailfan) already exists.",
+            "username",
+        ),
+        (
+            'duplicate key value violates unique constraint "ix_users_email"\n'
+            "DETAIL:  Key (email)=(username@snake.game) already exists.",
+            "email",
+        ),
+        ('insert or update violates foreign key constraint "fk_other"', None),
+    ],
+)
+def test_violated_unique_column(message, column):
+    """Test constraint matching for SQLite and Postgres error messages."""
+    error = IntegrityError("INSERT INTO users ...", {}, Exception(message))
+    assert user_service._violated_unique_column(error) == column
+
+
+def test_known_versions_are_bounded(monkeypatch):
+    """Test that known user versions only move forward and are evicted by LRU."""
+    monkeypatch.setattr(user_service, "_known_versions", TTLCache(2, 60))
+    user_service._note_version("1", 2)
+    user_service._note_version("1", 1)
+    assert user_service.get_known_user_version("1") == 2
+
+    user_service._note_version("2", 1)
+    user_service._note_version("3", 1)
+    assert user_service.get_known_user_version("1") is None
+    assert user_service.get_known_user_version("3") == 1
@@ -11,8 +11,11 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 
 from app.main import app
 from app.models.db import Base
+from app.services import leaderboard_service, user_service
 from app.services.db_session import get_db
-from app.utils.security import get_password_hash
+from app.services.rank_index import rank_index
+from app.services.token_denylist import token_denylist
+from app.utils.security import get_password_hash, token_cache
 
 # Integration test database URL (in-memory SQLite)
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -64,15 +67,26 @@ async def test_db(test_db_engine):
 
         await session.commit()
 
+        # Load the rank index from the seeded data, as the app does at startup
+        await rank_index.load(session)
+
         yield session
 
+    rank_index.reset()
+    leaderboard_service.clear_cache()
+    token_cache.clear()
+    user_service.clear_cache()
+    token_denylist.reset()
+
 
 @pytest_asyncio.fixture
 async def async_client(test_db):
     """Create an async test client with database override."""
 
     async def override_get_db():
+        # Commit like get_db does, so after-commit hooks run as in production
         yield test_db
+        await test_db.commit()
 
     app.dependency_overrides[get_db] = override_get_db
 
@@ -140,7 +140,7 @@ describe('Leaderboard API', () => {
   describe('getAll', () => {
     it('should fetch leaderboard entries', async () => {
       const mockEntries = [{ id: '1', username: 'User', score: 100, mode: 'walls' }];
-      (apiClient.get as Mock).mockResolvedValue(mockEntries);
+      (apiClient.get as Mock).mockResolvedValue({ entries: mockEntries, next_cursor: null });
 
       const entries = await api.leaderboard.getAll();
 
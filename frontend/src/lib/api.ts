@@ -1,4 +1,4 @@
-import { User, LeaderboardEntry, ActivePlayer, GameMode, Token } from '@/types/game';
+import { User, LeaderboardEntry, LeaderboardPage, ActivePlayer, GameMode, Token } from '@/types/game';
 import { apiClient, ApiError } from './apiClient';
 import { tokenStorage } from './tokenStorage';
 
@@ -84,8 +84,8 @@ export const api = {
     getAll: async (mode?: GameMode): Promise<LeaderboardEntry[]> => {
       try {
         const endpoint = mode ? `/leaderboard?mode=${mode}` : '/leaderboard';
-        const entries = await apiClient.get<LeaderboardEntry[]>(endpoint);
-        return entries;
+        const page = await apiClient.get<LeaderboardPage>(endpoint);
+        return page.entries;
       } catch (error) {
         console.error('Failed to fetch leaderboard:', error);
         return [];
@@ -32,6 +32,11 @@ export interface LeaderboardEntry {
   date: string;
 }
 
+export interface LeaderboardPage {
+  entries: LeaderboardEntry[];
+  next_cursor: string | null;
+}
+
 export interface ActivePlayer {
   id: string;
   username: string;